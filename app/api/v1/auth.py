@@ -4,6 +4,7 @@ from app.database import get_db
 from app.auth import authenticate_user, create_access_token, create_user, get_current_user
 from app.models import User, UserWord, UserSituation, Conversation
 from app.schemas import LoginRequest, LoginResponse, RegisterRequest, UserProfileResponse, CatalanModeRequest
+from app.services.voice_turn_context import invalidate_user
 
 router = APIRouter()
 
@@ -104,6 +105,7 @@ async def set_catalan_mode(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     current_user.catalan_mode = request.enabled
     db.commit()
+    invalidate_user(current_user.id)
     return {"catalan_mode": current_user.catalan_mode}
 
 
@@ -124,6 +126,7 @@ async def reset_progress(
     deleted_situations = db.query(UserSituation).filter(UserSituation.user_id == current_user.id).delete()
     deleted_conversations = db.query(Conversation).filter(Conversation.user_id == current_user.id).delete()
     db.commit()
+    invalidate_user(current_user.id)
 
     return {
         "reset": True,
@@ -5,7 +5,7 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.auth import get_current_user, get_current_user_from_query
-from app.models import User, Conversation, Situation, Word
+from app.models import User, Conversation, Situation
 from app.services.word_selection_service import select_words_for_situation, sort_words_encounter_first
 from app.schemas import (
     CreateConversationRequest,
@@ -18,84 +18,28 @@ from app.schemas import (
 from app.services.llm_gateway import generate_conversation, ConversationContext, load_prompt
 from app.services.openai_media_gateway import transcribe_audio as gateway_transcribe_audio, synthesize_speech as gateway_synthesize_speech
 from fastapi import Request
-from app.services.word_detection import detect_words_in_text, get_words_by_ids
+from app.services.word_detection import detect_words_in_text
 from app.services.conversation_service import (
-    check_conversation_complete,
+    get_word_progress,
     update_user_word_stats,
-    get_missing_word_ids
+    get_missing_word_ids,
+    record_used_words,
 )
-from app.services.encounter_messages import get_initial_message_for_encounter
+from app.services.locales import get_locale
+from app.services.voice_turn_context import get_voice_turn_context
 from app.api.v1.situations import get_vocab_level
-from app.services.voice_turn_service import build_transcription_prompt, build_conversation_prompt, build_grammar_system_prompt, build_grammar_user_prompt, get_language_mode, get_conversation_system_prompt, build_system_prompt
-from app.data.grammar_situations import get_grammar_config
-from app.services.catalan_service import apply_catalan_mode
+from app.services.voice_turn_service import build_conversation_prompt, build_grammar_user_prompt, get_language_mode, build_system_prompt
+from app.services.word_catalog import get_word_views
+from app.services.conversation_history import start_session, append_turns, get_session_turns
+from app.services.context_compaction import compact_context, trim_messages, refresh_summary
 from app.utils.audio import generate_audio_filename, get_audio_path, get_audio_url, upload_to_r2
+from app.core.provider_limits import ProviderBusyError
 router = APIRouter()
 
 # Cache for initial message TTS audio URLs — avoids re-synthesizing the same audio
 # Key: (situation_id, catalan_mode) → R2/local URL
 _initial_tts_cache: dict[tuple[str, bool], str] = {}
 
-# OpenAI TTS voice + instructions per situation — keyed by animation_type
-_ACCENT = "Speak with a Mexican Spanish accent, mixing English and Spanish words naturally."
-_CATALAN_ACCENT = "Speak with a Catalan accent, mixing English and Catalan words naturally."
-SITUATION_VOICE_CONFIG = {
-    "police": {
-        "voice": "ash",
-        "instructions": f"{_ACCENT} Use an authoritative female voice, firm but professional.",
-    },
-    "banking": {
-        "voice": "shimmer",
-        "instructions": f"{_ACCENT} Use a professional, composed female voice with a warm undertone.",
-    },
-    "airport": {
-        "voice": "ash",
-        "instructions": f"{_ACCENT} Use a professional, clear female voice.",
-    },
-    "clothing": {
-        "voice": "coral",
-        "instructions": f"{_ACCENT} Use a casual, charming female voice.",
-    },
-    "small_talk": {
-        "voice": "shimmer",
-        "instructions": f"{_ACCENT} Use a warm, older female voice with a friendly, neighborly tone.",
-    },
-    "internet": {
-        "voice": "ash",
-        "instructions": f"{_ACCENT} Use a young, energetic female voice.",
-    },
-    "restaurant": {
-        "voice": "echo",
-        "instructions": f"{_ACCENT} Use a suave, charming male voice.",
-    },
-    "mechanic": {
-        "voice": "verse",
-        "instructions": f"{_ACCENT} Use a deep male voice.",
-    },
-    "groceries": {
-        "voice": "echo",
-        "instructions": f"{_ACCENT} Use a casual, charming male voice.",
-    },
-    "contractor": {
-        "voice": "verse",
-        "instructions": f"{_ACCENT} Use a deep, husky baritone male voice.",
-    },
-    "core": {
-        "voice": "echo",
-        "instructions": f"{_ACCENT} Use a casual, friendly male voice.",
-    },
-}
-
-
-def get_tts_instructions(animation_type: str, catalan_mode: bool = False) -> tuple[str, str | None]:
-    """Return (voice, instructions) for TTS, adjusted for Catalan mode."""
-    cfg = SITUATION_VOICE_CONFIG.get(animation_type, {})
-    voice = cfg.get("voice", "alloy")
-    instructions = cfg.get("instructions")
-    if catalan_mode and instructions:
-        instructions = instructions.replace(_ACCENT, _CATALAN_ACCENT)
-    return voice, instructions
-
 
 @router.post("", response_model=CreateConversationResponse)
 async def create_conversation(
@@ -113,6 +57,7 @@ async def create_conversation(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Situation not found"
         )
+    locale = get_locale(current_user)
     
     # Voice mode only - reuse words from existing conversation created by startSituation
     # startSituation creates a "text" mode conversation as the source of truth for words
@@ -125,7 +70,7 @@ async def create_conversation(
     if existing_conv and existing_conv.target_word_ids:
         # Reuse existing conversation's words
         target_word_ids = existing_conv.target_word_ids
-        words = get_words_by_ids(db, target_word_ids)
+        words = get_word_views(db, target_word_ids, locale.catalan_mode)
         final_words = sort_words_encounter_first(words, request.situation_id, db, target_word_ids)
         
         # Create or get voice conversation with same words
@@ -149,26 +94,24 @@ async def create_conversation(
             db.commit()
             db.refresh(voice_conv)
         
-        initial_message = get_initial_message_for_encounter(situation.id, situation.title)
+        initial_message = locale.initial_message(situation.id, situation.title)
         vocab_level = get_vocab_level(db, current_user.id)
-        language_mode = get_language_mode(situation.encounter_number, vocab_level)
-
-        # Catalan mode: swap words + adjust language_mode
-        if current_user.catalan_mode:
-            final_words = apply_catalan_mode(final_words, db)
-            if language_mode in ("spanish_text", "spanish_audio"):
-                language_mode = language_mode.replace("spanish_", "catalan_")
+        language_mode = locale.language_mode(get_language_mode(situation.encounter_number, vocab_level))
 
         # Use pre-generated R2 audio for initial message (no TTS call needed).
         # Audio files are uploaded by scripts/pregenerate_initial_audio.py with
         # deterministic filenames: initial_msg_{situation_id}.mp3
-        from app.config import settings as _settings
-        initial_audio_url = f"{_settings.r2_public_url}/initial_msg_{situation.id}.mp3" if _settings.r2_public_url else None
+        initial_audio_url = locale.initial_audio_url(situation.id)
 
         system_prompt = build_system_prompt(
             situation.animation_type, situation.id, language_mode,
-            catalan_mode=current_user.catalan_mode,
+            catalan_mode=locale.catalan_mode,
         )
+
+        # Server-held history: each (re)start opens a new session seeded with the opening line
+        start_session(db, voice_conv.id, initial_message)
+        db.commit()
+
         return CreateConversationResponse(
             conversation_id=voice_conv.id,
             words=[WordSchema(id=w.id, spanish=w.spanish, english=w.english, notes=w.notes) for w in final_words],
@@ -183,7 +126,7 @@ async def create_conversation(
         # But create one anyway as fallback
         encounter_word_ids, high_freq_word_ids = select_words_for_situation(db, current_user.id, request.situation_id)
         target_word_ids = encounter_word_ids + high_freq_word_ids
-        all_words = db.query(Word).filter(Word.id.in_(target_word_ids)).all()
+        all_words = get_word_views(db, target_word_ids, locale.catalan_mode)
         final_words = sort_words_encounter_first(all_words, request.situation_id, db, target_word_ids)
         
         conversation = Conversation(
@@ -198,23 +141,21 @@ async def create_conversation(
         db.commit()
         db.refresh(conversation)
         
-        initial_message = get_initial_message_for_encounter(situation.id, situation.title)
+        initial_message = locale.initial_message(situation.id, situation.title)
         vocab_level = get_vocab_level(db, current_user.id)
-        language_mode = get_language_mode(situation.encounter_number, vocab_level)
-
-        # Catalan mode: swap words + adjust language_mode
-        if current_user.catalan_mode:
-            final_words = apply_catalan_mode(final_words, db)
-            if language_mode in ("spanish_text", "spanish_audio"):
-                language_mode = language_mode.replace("spanish_", "catalan_")
+        language_mode = locale.language_mode(get_language_mode(situation.encounter_number, vocab_level))
 
         # Use pre-generated R2 audio for initial message
-        initial_audio_url = f"{_settings.r2_public_url}/initial_msg_{situation.id}.mp3" if _settings.r2_public_url else None
+        initial_audio_url = locale.initial_audio_url(situation.id)
 
         system_prompt = build_system_prompt(
             situation.animation_type, situation.id, language_mode,
-            catalan_mode=current_user.catalan_mode,
+            catalan_mode=locale.catalan_mode,
         )
+
+        start_session(db, conversation.id, initial_message)
+        db.commit()
+
         return CreateConversationResponse(
             conversation_id=conversation.id,
             words=[WordSchema(id=w.id, spanish=w.spanish, english=w.english) for w in final_words],
@@ -246,7 +187,7 @@ async def check_pronunciation(
     transcript = await gateway_transcribe_audio(
         audio_bytes=audio_bytes,
         filename=audio.filename or "audio.mp3",
-        prompt=f"The user is saying a {'Catalan' if current_user.catalan_mode else 'Spanish'} word or phrase: {expected_word}. Transcribe exactly what they say.",
+        prompt=f"The user is saying a {get_locale(current_user).language_name} word or phrase: {expected_word}. Transcribe exactly what they say.",
         language=None,
         request_id=str(current_user.id),
         user_id=str(current_user.id),
@@ -289,25 +230,14 @@ async def mark_word_detected(
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    current_used = set(conversation.used_spoken_word_ids or [])
-    current_used.add(word_id)
-    conversation.used_spoken_word_ids = list(current_used)
-
-    from app.services.conversation_service import update_user_word_stats, check_conversation_complete, get_missing_word_ids
-    update_user_word_stats(db, str(current_user.id), [word_id], "voice")
-
-    conversation_complete = check_conversation_complete(conversation, "voice")
-    if conversation_complete:
-        conversation.status = "complete"
-
-    db.commit()
-    missing_word_ids = get_missing_word_ids(conversation, "voice")
+    progress = record_used_words(db, conversation, [word_id], "voice", mark_complete=True)
+    update_user_word_stats(db, str(current_user.id), [word_id], "voice")  # commits
     logger.info(f"[MarkWord] User {current_user.id} manually marked word {word_id} in conversation {conversation_id}")
 
     return {
         "word_id": word_id,
-        "missing_word_ids": missing_word_ids,
-        "conversation_complete": conversation_complete,
+        "missing_word_ids": progress.missing_word_ids,
+        "conversation_complete": progress.complete,
     }
 
 
@@ -356,7 +286,7 @@ async def voice_turn_transcribe(
     start_time = time.time()
     request_id = getattr(request.state, "request_id", "unknown")
     learning_phase = request.headers.get("X-Learning-Phase", "2")
-    request.state.user_id = current_user.id
+    request.state.user_id = str(current_user.id)
 
     conversation = db.query(Conversation).filter(
         Conversation.id == conversation_id,
@@ -368,21 +298,12 @@ async def voice_turn_transcribe(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="This endpoint is for voice mode only")
 
     audio_bytes = await audio.read()
-    words = get_words_by_ids(db, conversation.target_word_ids)
-    situation = db.query(Situation).filter(Situation.id == conversation.situation_id).first()
-
-    catalan_mode = current_user.catalan_mode
-    if catalan_mode:
-        words = apply_catalan_mode(words, db)
-
-    transcription_prompt = build_transcription_prompt(
-        situation.title if situation else "a situation", words, catalan_mode=catalan_mode,
-    )
+    context = get_voice_turn_context(db, conversation, get_locale(current_user))
 
     stt_start = time.time()
     user_transcript = await gateway_transcribe_audio(
         audio_bytes=audio_bytes, filename=audio.filename or "audio.mp3",
-        prompt=transcription_prompt, language=None,
+        prompt=context.transcription_prompt, language=None,
         request_id=request_id, user_id=str(current_user.id),
         db=db, learning_phase=learning_phase,
     )
@@ -391,13 +312,9 @@ async def voice_turn_transcribe(
     if stt_time > 2.0:
         logger.warning(f"[Voice Turn] STT exceeded 2s threshold: {stt_time:.2f}s")
 
-    detected_word_ids = detect_words_in_text(user_transcript, words)
-    current_used = set(conversation.used_spoken_word_ids or [])
-    current_used.update(detected_word_ids)
-    conversation.used_spoken_word_ids = list(current_used)
-    update_user_word_stats(db, str(current_user.id), detected_word_ids, "voice")
-    missing_word_ids = get_missing_word_ids(conversation, "voice")
-    db.commit()
+    detected_word_ids = detect_words_in_text(user_transcript, context.words)
+    progress = record_used_words(db, conversation, detected_word_ids, "voice", mark_complete=True)
+    update_user_word_stats(db, str(current_user.id), detected_word_ids, "voice")  # commits
 
     total = time.time() - start_time
     logger.info(f"[Voice Turn] Transcribe total: {total:.2f}s (stt: {stt_time:.2f}s)")
@@ -405,7 +322,7 @@ async def voice_turn_transcribe(
     return {
         "user_transcript": user_transcript,
         "detected_word_ids": detected_word_ids,
-        "missing_word_ids": missing_word_ids,
+        "missing_word_ids": progress.missing_word_ids,
     }
 
 
@@ -413,6 +330,7 @@ from pydantic import BaseModel as _BaseModel
 
 class _RespondRequest(_BaseModel):
     user_transcript: str
+    # Deprecated: full client-side history. When omitted, the server-held history is used.
     messages_json: Optional[str] = None
 
 
@@ -421,17 +339,25 @@ async def voice_turn_respond(
     conversation_id: str,
     body: _RespondRequest,
     request: Request,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Step 2: LLM → TTS → R2 upload. Returns AI response + audio URL."""
+    """Step 2: LLM → TTS → R2 upload. Returns AI response + audio URL.
+
+    The model context is the system prompt + server-held history + the new
+    transcript; clients only send user_transcript. A client-supplied
+    messages_json (legacy) still takes precedence when present. Either way the
+    context is compacted (system prompt + summary + last K turns); the summary
+    is refreshed in a background task after the response.
+    """
     import time
     import logging
     logger = logging.getLogger(__name__)
     start_time = time.time()
     request_id = getattr(request.state, "request_id", "unknown")
     learning_phase = request.headers.get("X-Learning-Phase", "2")
-    request.state.user_id = current_user.id
+    request.state.user_id = str(current_user.id)
 
     conversation = db.query(Conversation).filter(
         Conversation.id == conversation_id,
@@ -440,12 +366,7 @@ async def voice_turn_respond(
     if not conversation:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
 
-    words = get_words_by_ids(db, conversation.target_word_ids)
-    situation = db.query(Situation).filter(Situation.id == conversation.situation_id).first()
-    catalan_mode = current_user.catalan_mode
-    if catalan_mode:
-        words = apply_catalan_mode(words, db)
-
+    context = get_voice_turn_context(db, conversation, get_locale(current_user))
     user_transcript = body.user_transcript
 
     # Parse frontend messages
@@ -456,60 +377,73 @@ async def voice_turn_respond(
         except (json_module.JSONDecodeError, TypeError):
             pass
 
-    vocab_level = get_vocab_level(db, current_user.id)
-    language_mode = get_language_mode(situation.encounter_number, vocab_level)
-    if catalan_mode and language_mode in ("spanish_text", "spanish_audio"):
-        language_mode = language_mode.replace("spanish_", "catalan_")
-
-    # Hidden word guidance — steer AI toward unused target words
+    # Hidden word guidance — steer AI toward unused target words. Sent as a trailing
+    # system message after the user turn, so the system prompt and history stay a
+    # stable prefix across turns (provider prompt caching).
     missing_ids = get_missing_word_ids(conversation, "voice")
-    word_guidance = ""
+    guidance_messages = []
     if missing_ids:
-        missing_words = get_words_by_ids(db, missing_ids)
+        missing_words = context.words_by_ids(missing_ids)
         word_list = ", ".join(w.spanish for w in missing_words)
-        word_guidance = (
-            f"\n\n[HIDDEN INSTRUCTION — do not repeat this to the user. "
-            f"Gently guide the conversation in a way that will require me to use "
-            f"one of these words/phrases. Do not state these Spanish words yourself: {word_list}]"
-        )
+        guidance_messages.append({"role": "system", "content": (
+            f"[HIDDEN INSTRUCTION — do not repeat this to the user. "
+            f"Gently guide the conversation in a way that will require the user to use "
+            f"one of these words/phrases. Do not state these {context.locale.language_name} words yourself: {word_list}]"
+        )})
 
     # Build messages for Realtime API
+    grammar_config = context.grammar_config
+    system_prompt = context.system_prompt
+    session_no, turns = (0, []) if frontend_messages else get_session_turns(db, conversation.id)
+    new_message = {"role": "user", "content": user_transcript}
+
+    compacted = None
     if frontend_messages:
-        llm_messages = list(frontend_messages)
-        llm_messages.append({"role": "user", "content": user_transcript + word_guidance})
+        compacted = trim_messages(list(frontend_messages) + [new_message])
+        llm_messages = compacted.messages
+    elif turns:
+        compacted = compact_context(system_prompt, turns, new_message, conversation.history_summary, session_no)
+        llm_messages = compacted.messages
+        if compacted.needs_summary_refresh:
+            background_tasks.add_task(
+                refresh_summary, str(conversation.id), session_no, compacted.pending_turns[-1]["seq"],
+                user_id=str(current_user.id), learning_phase=learning_phase,
+            )
     else:
-        grammar_config = get_grammar_config(conversation.situation_id)
+        # No stored history (conversation created before server-held history)
         if grammar_config:
-            system_prompt = build_grammar_system_prompt(conversation.situation_id, catalan_mode=catalan_mode)
             user_prompt = build_grammar_user_prompt(
-                situation.title, conversation.used_spoken_word_ids or [],
+                context.situation_title, conversation.used_spoken_word_ids or [],
                 user_transcript, grammar_config,
             )
         else:
-            system_prompt = get_conversation_system_prompt(
-                language_mode, catalan_mode=catalan_mode,
-                animation_type=situation.animation_type if situation else "",
-                situation_id=conversation.situation_id,
-            )
             user_prompt = build_conversation_prompt(
-                situation.title, words, conversation.used_spoken_word_ids or [],
-                user_transcript, catalan_mode=catalan_mode,
+                context.situation_title, context.words, conversation.used_spoken_word_ids or [],
+                user_transcript, catalan_mode=context.locale.catalan_mode,
             )
         llm_messages = [
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt + word_guidance},
+            {"role": "user", "content": user_prompt},
         ]
+    llm_messages = llm_messages + guidance_messages
 
     # TTS voice config
-    tts_voice, tts_instructions = get_tts_instructions(
-        situation.animation_type if situation else "", catalan_mode=catalan_mode,
-    )
+    tts_voice, tts_instructions = context.voice, context.tts_instructions
 
     # ── Realtime API: stream LLM + TTS as NDJSON ──
     # Audio chunks arrive at ~0.8s. Frontend plays PCM16 via Web Audio API.
-    from app.services.realtime_service import stream_realtime
+    from app.services.realtime_service import stream_realtime, record_realtime_request
     import base64 as _base64
 
+    def log_turn(success: bool, text=None, usage=None, error=None):
+        record_realtime_request(
+            db, llm_messages, request_id, str(current_user.id), success,
+            latency_ms=int((time.time() - start_time) * 1000), text=text, usage=usage, error=error,
+            context_tokens_before=compacted.tokens_before if compacted else None,
+            context_tokens_after=compacted.tokens_after if compacted else None,
+            learning_phase=learning_phase,
+        )
+
     async def generate_stream():
         assistant_text = ""
         try:
@@ -533,9 +467,11 @@ async def voice_turn_respond(
                     }) + "\n"
 
                 elif event["type"] == "done":
-                    conv_complete = check_conversation_complete(conversation, "voice")
-                    if conv_complete:
-                        conversation.status = "complete"
+                    # Completion was set atomically when /voice-turn recorded the words
+                    conv_complete = get_word_progress(db, conversation.id, "voice").complete
+                    if assistant_text:
+                        append_turns(db, conversation.id, [("user", user_transcript), ("assistant", assistant_text)])
+                    log_turn(True, text=assistant_text, usage=event.get("usage"))
                     db.commit()
 
                     total = time.time() - start_time
@@ -546,8 +482,27 @@ async def voice_turn_respond(
                         "conversation_complete": conv_complete,
                     }) + "\n"
 
+        except ProviderBusyError:
+            raise  # raised before the first event; answered with 503 below
         except Exception as e:
             logger.error(f"[Voice Turn] Realtime stream failed: {e}")
+            try:
+                db.rollback()
+                log_turn(False, text=assistant_text or None, error=e)
+                db.commit()
+            except Exception:
+                db.rollback()
             yield json_module.dumps({"type": "error", "message": str(e)}) + "\n"
 
-    return StreamingResponse(generate_stream(), media_type="application/x-ndjson")
+    # Wait for the first line before answering, so a saturated Realtime limiter
+    # (ProviderBusyError) becomes a 503 + Retry-After instead of an error line in a 200
+    stream = generate_stream()
+    first = await anext(stream, None)
+
+    async def body():
+        if first is not None:
+            yield first
+        async for line in stream:
+            yield line
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
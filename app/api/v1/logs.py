@@ -1,11 +1,23 @@
 """Frontend logging endpoint"""
-from fastapi import APIRouter, Request, Depends
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from fastapi import APIRouter, Request, Depends, HTTPException, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Optional, Dict, Any, List
+import gzip
+import io
+import json
+import random
+import threading
+import time
 from app.core.logger import log_event
+from app.config import settings
 
 router = APIRouter()
 
+# Batch limits — protect the worker from oversized or gzip-bomb payloads
+MAX_BATCH_EVENTS = 500
+MAX_BATCH_BYTES = 1024 * 1024  # 1 MB after decompression
+
 
 class FrontendLogRequest(BaseModel):
     """Schema for frontend log events"""
@@ -17,26 +29,87 @@ class FrontendLogRequest(BaseModel):
     metadata: Dict[str, Any] = {}
 
 
-@router.post("")
-async def log_frontend_event(
-    log_data: FrontendLogRequest,
-    request: Request
-):
-    """
-    Receive and log frontend events.
-    Only emits to stdout (Better Stack), does not store in Postgres.
-    """
-    # Get user_id from request state if available (from auth)
+_batch_adapter = TypeAdapter(List[FrontendLogRequest])
+
+
+def _parse_sample_rates(raw: str) -> Dict[str, float]:
+    """Parse "event:rate,event:rate" into {event: rate}. Invalid entries are ignored."""
+    rates = {}
+    for entry in raw.split(","):
+        name, _, rate = entry.strip().rpartition(":")
+        if not name:
+            continue
+        try:
+            rates[name] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+# Sampling rules by event name. Errors are never sampled out.
+EVENT_SAMPLE_RATES: Dict[str, float] = _parse_sample_rates(settings.frontend_log_sample_rates)
+
+
+class _EventRateLimiter:
+    """Per-user token bucket (events per minute), in-memory per worker."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.refill_per_second = per_minute / 60.0
+        self._buckets: Dict[str, tuple[float, float]] = {}  # key → (tokens, last_refill)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, requested: int) -> int:
+        """Consume up to `requested` tokens and return how many were granted."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.refill_per_second)
+            granted = min(requested, int(tokens))
+            self._buckets[key] = (tokens - granted, now)
+            # Drop full buckets so idle users don't accumulate forever
+            if len(self._buckets) > 10_000:
+                self._buckets = {
+                    k: v for k, v in self._buckets.items()
+                    if v[0] + (now - v[1]) * self.refill_per_second < self.capacity
+                }
+            return granted
+
+
+_rate_limiter = _EventRateLimiter(settings.frontend_log_rate_limit_per_minute)
+
+
+def _resolve_user_id(request: Request, claimed: Optional[str]) -> Optional[str]:
+    """Prefer the authenticated user_id (from JWT) over the one in the payload."""
     user_id = getattr(request.state, "user_id", None)
     if user_id:
-        user_id = str(user_id)
-    elif log_data.user_id:
-        user_id = log_data.user_id
+        return str(user_id)
+    return claimed
+
 
+def _rate_key(request: Request, user_id: Optional[str]) -> str:
+    """Rate-limit bucket: the authenticated user, else the client IP.
+
+    The payload's user_id is never used here; an anonymous client could rotate
+    it to get a fresh bucket per batch."""
+    if user_id:
+        return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _should_keep(log_data: FrontendLogRequest) -> bool:
+    """Apply server-side sampling rules by event name."""
+    rate = EVENT_SAMPLE_RATES.get(log_data.event)
+    if rate is None or log_data.level == "error":
+        return True
+    return random.random() < rate
+
+
+def _emit(log_data: FrontendLogRequest, user_id: Optional[str], extra_fields: Optional[Dict[str, Any]] = None) -> None:
     # Merge metadata into extra fields
     extra = log_data.metadata.copy()
+    extra.update(extra_fields or {})
 
-    # Log the event
     log_event(
         level=log_data.level,
         event=log_data.event,
@@ -46,4 +119,129 @@ async def log_frontend_event(
         extra=extra
     )
 
+
+async def _read_batch_body(request: Request) -> List[Any]:
+    """Read a batch payload: JSON array, {"events": [...]}, or NDJSON (optionally gzip).
+
+    MAX_BATCH_BYTES caps the raw body (checked on Content-Length, then while
+    streaming) and again the decompressed payload.
+    """
+    too_large = HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Batch too large")
+    declared = request.headers.get("Content-Length", "")
+    if declared.isdigit() and int(declared) > MAX_BATCH_BYTES:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BATCH_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    body = b"".join(chunks)
+
+    if "gzip" in request.headers.get("Content-Encoding", "").lower():
+        try:
+            with gzip.GzipFile(fileobj=io.BytesIO(body)) as f:
+                body = f.read(MAX_BATCH_BYTES + 1)
+        except (OSError, EOFError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid gzip payload")
+    if len(body) > MAX_BATCH_BYTES:
+        raise too_large
+
+    try:
+        text = body.decode("utf-8")
+        if "ndjson" in request.headers.get("Content-Type", "").lower():
+            items = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            items = json.loads(text)
+            if isinstance(items, dict):
+                items = items.get("events", [])
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed batch payload")
+
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Batch must be a list of events")
+    if len(items) > MAX_BATCH_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {MAX_BATCH_EVENTS} events"
+        )
+    return items
+
+
+@router.post("")
+async def log_frontend_event(
+    log_data: FrontendLogRequest,
+    request: Request
+):
+    """
+    Receive and log frontend events.
+    Only emits to stdout (Better Stack), does not store in Postgres.
+    """
+    user_id = _resolve_user_id(request, log_data.user_id)
+    _emit(log_data, user_id)
+
     return {"status": "logged"}
+
+
+@router.post("/batch")
+async def log_frontend_events_batch(request: Request):
+    """
+    Receive many frontend events in one request.
+
+    Accepts a JSON array (or {"events": [...]}) or NDJSON
+    (Content-Type: application/x-ndjson), optionally with Content-Encoding: gzip.
+    The whole batch is validated up front; events are then sampled by name,
+    limited per user (per client IP when anonymous), and fanned into the same pipeline as POST /v1/log.
+    """
+    items = await _read_batch_body(request)
+    try:
+        events = _batch_adapter.validate_python(items)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    request_user_id = _resolve_user_id(request, None)
+    rate_key = _rate_key(request, request_user_id)
+
+    kept = [e for e in events if _should_keep(e)]
+    sampled_out = len(events) - len(kept)
+
+    granted = _rate_limiter.take(rate_key, len(kept))
+    rate_limited = len(kept) - granted
+    if kept and granted == 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Log rate limit exceeded",
+            headers={"Retry-After": "60"},
+        )
+
+    for log_data in kept[:granted]:
+        rate = EVENT_SAMPLE_RATES.get(log_data.event)
+        _emit(
+            log_data,
+            request_user_id or log_data.user_id,
+            {"sample_rate": rate} if rate is not None and log_data.level != "error" else {},
+        )
+
+    # One HTTP request replaced len(events) single-event requests
+    log_event(
+        level="info",
+        event="frontend_log_batch",
+        message=f"Frontend log batch: {len(events)} events, {granted} logged",
+        request_id=getattr(request.state, "request_id", "unknown"),
+        user_id=request_user_id,
+        extra={
+            "batch_size": len(events),
+            "logged": granted,
+            "sampled_out": sampled_out,
+            "rate_limited": rate_limited,
+            "requests_saved": max(0, len(events) - 1),
+        }
+    )
+
+    return {
+        "status": "logged",
+        "received": len(events),
+        "logged": granted,
+        "sampled_out": sampled_out,
+        "rate_limited": rate_limited,
+    }
@@ -8,6 +8,8 @@ from app.database import get_db
 from app.auth import get_current_user
 from app.models import User, Situation, UserWord, UserSituation, Word
 from app.data.grammar_situations import GRAMMAR_SITUATIONS, get_all_grammar_situation_ids
+from app.services.locales import SPANISH_DIALECTS
+from app.services.voice_turn_context import invalidate_user
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,7 +35,7 @@ class SaveOnboardingSelectionsRequest(BaseModel):
             raise ValueError("Either selected_category or selected_animation_type is required")
         return value
 
-    dialect: str  # 'mexico', 'colombia', 'costa_rica'
+    dialect: str  # a SPANISH_DIALECTS key: 'mexico', 'colombia', 'costa_rica'
     grammar_score: str | None = None  # Quiz grammar score
     vocab_score: str | None = None  # Quiz vocab score
 
@@ -125,8 +127,7 @@ async def save_onboarding_selections(
         )
 
     # Validate dialect
-    valid_dialects = ['mexico', 'colombia', 'costa_rica']
-    if request.dialect not in valid_dialects:
+    if request.dialect not in SPANISH_DIALECTS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid dialect: {request.dialect}"
@@ -151,6 +152,7 @@ async def save_onboarding_selections(
         completed_grammar = _auto_complete_grammar(db, current_user.id, starting_vl)
 
     db.commit()
+    invalidate_user(current_user.id)
 
     logger.info(
         "Onboarding saved: user=%s grammar_score=%s vocab_score=%s starting_vl=%d seeded_words=%d completed_grammar=%d",
@@ -15,11 +15,11 @@ from app.services.refresh_service import (
     get_due_word_ids,
     bump_mastery_after_refresh,
 )
-from app.services.word_detection import get_words_by_ids
-from app.services.encounter_messages import get_initial_message_for_encounter
-from app.services.catalan_service import apply_catalan_mode
+from app.services.locales import get_locale
+from app.services.word_catalog import get_word_views
 from app.api.v1.situations import get_vocab_level
 from app.services.voice_turn_service import get_language_mode
+from app.services.voice_turn_context import invalidate_user
 
 router = APIRouter()
 
@@ -102,16 +102,11 @@ async def start_refresh(
     db.commit()
     db.refresh(conversation)
 
-    words = get_words_by_ids(db, due_word_ids)
-    initial_message = get_initial_message_for_encounter(situation.title)
+    locale = get_locale(current_user)
+    words = get_word_views(db, due_word_ids, locale.catalan_mode)
+    initial_message = locale.initial_message(situation.id, situation.title)
     vocab_level = get_vocab_level(db, current_user.id)
-    language_mode = get_language_mode(situation.encounter_number, vocab_level)
-
-    # Catalan mode: swap words + adjust language_mode
-    if current_user.catalan_mode:
-        words = apply_catalan_mode(words, db)
-        if language_mode in ("spanish_text", "spanish_audio"):
-            language_mode = language_mode.replace("spanish_", "catalan_")
+    language_mode = locale.language_mode(get_language_mode(situation.encounter_number, vocab_level))
 
     return StartRefreshResponse(
         conversation_id=conversation.id,
@@ -135,4 +130,5 @@ async def complete_refresh(
             detail="No words due for refresh in this situation",
         )
     db.commit()
+    invalidate_user(current_user.id)  # vocab level (language mode) may have changed
     return CompleteRefreshResponse(words_refreshed=count, new_mastery_level=new_level)
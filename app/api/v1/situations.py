@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from app.database import get_db
@@ -13,6 +13,7 @@ from app.schemas import (
     CompleteSituationResponse,
     AdminSkipEncounterResponse,
     GrammarConfigResponse,
+    LessonBundleResponse,
     WordSchema
 )
 from app.services.word_selection_service import (
@@ -22,16 +23,24 @@ from app.services.word_selection_service import (
 )
 from app.data.grammar_situations import get_grammar_config, get_all_grammar_situation_ids, GRAMMAR_SITUATIONS
 from app.data.seed_bank import ANIMATION_NAMES
-from app.services.catalan_service import apply_catalan_mode
+from app.services.word_catalog import get_word_views
 from app.services.refresh_service import set_initial_mastery
+from app.services.lesson_bundle_service import build_lesson_bundle, grammar_config_payload, load_lesson_gate
+from app.services.locales import get_locale
+from app.services.warmup_service import schedule_warmup
+from app.core import metrics
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Admin "recent calls" lists only look this far back (keeps scans on recent partitions)
+RECENT_AI_CALLS_WINDOW_DAYS = 7
+
 
 class AdminSituationItem(BaseModel):
     id: str
@@ -50,22 +59,22 @@ async def get_admin_ai_logs(
     if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
 
-    from app.models import TTSRequest, STTRequest, LLMRequest
-    from sqlalchemy import func as sql_func
+    from app.models import TTSRequest, STTRequest
+    from app.services.ai_rollup_service import ALL_TIME, get_rollup_stats
+
+    # All-time aggregates come from the hourly rollup table, so cost grows with
+    # hours x models, not with raw request volume
+    def stats_for(kind):
+        return get_rollup_stats(db, kind, start=ALL_TIME, group_by="model")
 
-    def stats_for(model_cls):
-        rows = db.query(
-            model_cls.model,
-            sql_func.count().label("calls"),
-            sql_func.round(sql_func.avg(model_cls.latency_ms)).label("avg_ms"),
-            sql_func.min(model_cls.latency_ms).label("min_ms"),
-            sql_func.max(model_cls.latency_ms).label("max_ms"),
-            sql_func.sum(model_cls.estimated_cost).label("total_cost"),
-        ).filter(model_cls.success == True).group_by(model_cls.model).all()
-        return [{"model": r.model, "calls": r.calls, "avg_ms": r.avg_ms, "min_ms": r.min_ms, "max_ms": r.max_ms, "total_cost": float(r.total_cost or 0)} for r in rows]
+    # Bounded window on created_at lets Postgres prune to the latest monthly partitions
+    from datetime import timedelta, timezone
+    recent_since = datetime.now(timezone.utc) - timedelta(days=RECENT_AI_CALLS_WINDOW_DAYS)
 
     # Recent individual TTS calls (last 20)
-    recent_tts = db.query(TTSRequest).order_by(TTSRequest.created_at.desc()).limit(20).all()
+    recent_tts = db.query(TTSRequest).filter(
+        TTSRequest.created_at >= recent_since
+    ).order_by(TTSRequest.created_at.desc()).limit(20).all()
     recent_tts_list = [
         {"id": str(r.id), "voice": r.voice, "input_chars": r.input_chars, "latency_ms": r.latency_ms,
          "success": r.success, "error_code": r.error_code, "created_at": str(r.created_at)}
@@ -73,23 +82,77 @@ async def get_admin_ai_logs(
     ]
 
     # Recent STT calls (last 20) — to spot whisper-1 fallback patterns
-    recent_stt = db.query(STTRequest).order_by(STTRequest.created_at.desc()).limit(20).all()
+    recent_stt = db.query(STTRequest).filter(
+        STTRequest.created_at >= recent_since
+    ).order_by(STTRequest.created_at.desc()).limit(20).all()
     recent_stt_list = [
         {"id": str(r.id), "model": r.model, "audio_format": r.audio_format, "audio_bytes": r.audio_bytes,
+         "audio_seconds": r.audio_seconds,
          "latency_ms": r.latency_ms, "success": r.success, "error_code": r.error_code,
-         "created_at": str(r.created_at)}
+         "winning_model": r.winning_model, "hedged": r.hedged, "created_at": str(r.created_at)}
         for r in recent_stt
     ]
 
     return {
-        "tts_stats": stats_for(TTSRequest),
-        "stt_stats": stats_for(STTRequest),
-        "llm_stats": stats_for(LLMRequest),
+        "tts_stats": stats_for("tts"),
+        "stt_stats": stats_for("stt"),
+        "llm_stats": stats_for("llm"),
         "recent_tts": recent_tts_list,
         "recent_stt": recent_stt_list,
     }
 
 
+@router.get("/admin/ai-stats")
+async def get_admin_ai_stats(
+    kind: str = "llm",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    group_by: str = "model",
+    interval: Optional[str] = "hour",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Time-range AI stats from hourly rollups (admin only).
+
+    kind: llm | stt | tts. group_by: model | agent_id | learning_phase.
+    interval: hour | day, or omit (interval=) for one row per group over the range.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+    from app.services.ai_rollup_service import default_start, get_rollup_stats, ROLLUP_KINDS
+
+    start = start or default_start()
+    if kind not in ROLLUP_KINDS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"kind must be one of {ROLLUP_KINDS}")
+    try:
+        stats = get_rollup_stats(db, kind, start=start, end=end, group_by=group_by, interval=interval or None)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return {
+        "kind": kind,
+        "group_by": group_by,
+        "interval": interval or None,
+        "start": start.isoformat(),
+        "end": end.isoformat() if end else None,
+        "stats": stats,
+    }
+
+
+@router.get("/admin/circuit-breakers")
+async def get_admin_circuit_breakers(
+    current_user: User = Depends(get_current_user),
+):
+    """Circuit breaker states in this worker, e.g. STT primary model per audio format (admin only)."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+    from app.core.circuit_breaker import breaker_states
+
+    return {"breakers": breaker_states()}
+
+
 @router.get("/admin/all", response_model=List[AdminSituationItem])
 async def get_admin_all_situations(
     current_user: User = Depends(get_current_user),
@@ -331,13 +394,9 @@ async def get_situation(
     # Select and sort words
     encounter_word_ids, high_freq_word_ids = select_words_for_situation(db, current_user.id, situation_id)
     target_word_ids = encounter_word_ids + high_freq_word_ids
-    words = db.query(Word).filter(Word.id.in_(target_word_ids)).all()
+    words = get_word_views(db, target_word_ids, current_user.catalan_mode)
     final_words = sort_words_encounter_first(words, situation_id, db, target_word_ids)
 
-    # Catalan mode: swap spanish → catalan for encounter/HF words
-    if current_user.catalan_mode:
-        final_words = apply_catalan_mode(final_words, db)
-
     return SituationDetail(
         id=situation.id,
         title=situation.title,
@@ -357,8 +416,7 @@ async def start_situation(
 ):
     """Start a situation: create/get conversation (single source of truth for words), upsert user_words, create user_situation"""
     from app.models import Conversation
-    from app.services.word_detection import get_words_by_ids
-    
+
     situation = db.query(Situation).filter(Situation.id == situation_id).first()
     if not situation:
         raise HTTPException(
@@ -394,12 +452,10 @@ async def start_situation(
     if conversation and conversation.target_word_ids:
         # Reuse existing conversation's words
         target_word_ids = conversation.target_word_ids
-        words = get_words_by_ids(db, target_word_ids)
     else:
         # Create new conversation with word selection
         encounter_word_ids, high_freq_word_ids = select_words_for_situation(db, current_user.id, situation_id)
         target_word_ids = encounter_word_ids + high_freq_word_ids
-        words = db.query(Word).filter(Word.id.in_(target_word_ids)).all()
 
         conversation = Conversation(
             user_id=current_user.id,
@@ -412,6 +468,7 @@ async def start_situation(
         db.add(conversation)
     
     # Upsert user_words and increment seen_count for all words
+    words = get_word_views(db, target_word_ids, current_user.catalan_mode)
     ensure_user_words(db, current_user.id, words)
     
     # Create or update user_situation
@@ -436,10 +493,6 @@ async def start_situation(
     # Sort words: encounter words by position, then high frequency words
     final_words = sort_words_encounter_first(words, situation_id, db, target_word_ids)
 
-    # Catalan mode: swap spanish → catalan for encounter/HF words
-    if current_user.catalan_mode:
-        final_words = apply_catalan_mode(final_words, db)
-
     return StartSituationResponse(
         words=[WordSchema(id=w.id, spanish=w.spanish, english=w.english, notes=w.notes) for w in final_words],
         encounter_number=situation.encounter_number,
@@ -448,6 +501,34 @@ async def start_situation(
     )
 
 
+@router.post("/{situation_id}/bundle", response_model=LessonBundleResponse)
+async def get_lesson_bundle(
+    situation_id: str,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Start a situation and return everything the lesson screen needs in one payload:
+    words with notes, conversation ID, initial message + audio URL, system prompt,
+    voice config and (grammar situations) grammar config.
+
+    Same effects as /start followed by POST /v1/conversations. Phase timings are
+    returned in the Server-Timing header."""
+    timing = metrics.ServerTiming("lesson_bundle_ms")
+    with timing.phase("gate"):
+        gate = load_lesson_gate(db, current_user.id, situation_id)
+    if gate is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Situation not found")
+    error = gate.error(current_user)
+    if error:
+        raise HTTPException(status_code=error[0], detail={"error": error[1]})
+
+    bundle = build_lesson_bundle(db, current_user, gate, timing)
+    response.headers["Server-Timing"] = timing.header()
+    response.headers["Cache-Control"] = "private, no-store"
+    return bundle
+
+
 @router.post("/{situation_id}/complete", response_model=CompleteSituationResponse)
 async def complete_situation(
     situation_id: str,
@@ -517,7 +598,10 @@ async def complete_situation(
             Situation.order_index > current_situation.order_index
         ).order_by(Situation.order_index).first()
         next_situation_id = next_situation.id if next_situation else None
-    
+
+    # Prepare the next encounter (words, prompts, Realtime session) while the user is on the results screen
+    schedule_warmup(current_user.id, next_situation_id, get_locale(current_user))
+
     return CompleteSituationResponse(next_situation_id=next_situation_id)
 
 
@@ -538,7 +622,7 @@ async def admin_skip_encounter(
     # 1. Select words (reuses existing logic)
     encounter_word_ids, hf_word_ids = select_words_for_situation(db, current_user.id, situation_id)
     target_word_ids = encounter_word_ids + hf_word_ids
-    words = db.query(Word).filter(Word.id.in_(target_word_ids)).all()
+    words = get_word_views(db, target_word_ids)
 
     # 2. Upsert UserWord records
     ensure_user_words(db, current_user.id, words)
@@ -637,17 +721,6 @@ async def get_grammar_config_endpoint(
     if not config:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not a grammar situation")
 
-    drill_config = config.get("drill_config")
-
-    return GrammarConfigResponse(
-        situation_type=situation.situation_type,
-        video_embed_id=config["video_embed_id"],
-        drill_type=config["drill_type"],
-        tense=config["tense"],
-        phases=config["phases"],
-        drill_config=drill_config,
-        phase_1c_config=config.get("phase_1c_config"),
-        phase_2_config=config.get("phase_2_config"),
-    )
+    return GrammarConfigResponse(**grammar_config_payload(situation.situation_type, config))
 
 
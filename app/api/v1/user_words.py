@@ -6,7 +6,7 @@ from app.database import get_db
 from app.auth import get_current_user
 from app.models import User, UserWord, Word
 from app.schemas import UserWordSchema, TypedCorrectRequest, HintRequest
-from app.services.catalan_service import apply_catalan_mode
+from app.services.word_catalog import WORD_COLUMNS, get_word_views, word_views_from_rows
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -31,10 +31,7 @@ async def get_user_words(
     ).all()
     
     # Get word details
-    word_ids = [uw.word_id for uw in user_words]
-    words = db.query(Word).filter(Word.id.in_(word_ids)).all()
-    if current_user.catalan_mode:
-        words = apply_catalan_mode(words, db)
+    words = get_word_views(db, [uw.word_id for uw in user_words], current_user.catalan_mode)
     word_dict = {w.id: w for w in words}
 
     result = []
@@ -131,7 +128,7 @@ async def get_unknown_words(
     )
     
     # Build query for unknown words
-    query = db.query(Word).filter(
+    query = db.query(*WORD_COLUMNS).filter(
         ~Word.id.in_(learned_word_ids) if learned_word_ids else True
     )
     
@@ -142,9 +139,10 @@ async def get_unknown_words(
         # Only return words with a category (high_frequency or encounter)
         query = query.filter(Word.word_category.isnot(None))
     
-    unknown_words = query.order_by(Word.frequency_rank.asc().nullslast(), Word.spanish.asc()).all()
-    if current_user.catalan_mode:
-        unknown_words = apply_catalan_mode(unknown_words, db)
+    unknown_words = word_views_from_rows(
+        query.order_by(Word.frequency_rank.asc().nullslast(), Word.spanish.asc()).all(),
+        current_user.catalan_mode,
+    )
 
     # Group by category
     high_frequency = []
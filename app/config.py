@@ -21,6 +21,123 @@ class Settings(BaseSettings):
     r2_secret_access_key: Optional[str] = None
     r2_bucket_name: str = "audio"
     r2_public_url: Optional[str] = None
+    # Uploads (app/services/r2_storage.py): pooled client, botocore retries, multipart above the threshold
+    r2_max_pool_connections: int = 32
+    r2_max_attempts: int = 4
+    r2_multipart_threshold_bytes: int = 8 * 1024 * 1024
+    r2_multipart_part_bytes: int = 8 * 1024 * 1024
+
+    # Frontend log batching (POST /v1/log/batch)
+    # Per-user event budget per minute; events over budget are dropped
+    frontend_log_rate_limit_per_minute: int = 600
+    # Server-side sampling by event name (comma-separated "event:rate", e.g. "ui_tap:0.1,scroll:0.05")
+    frontend_log_sample_rates: str = ""
+
+    # Raw AI request tables (llm/stt/tts_requests) are partitioned by month.
+    # Partitions older than this are dropped by scripts/ai_partition_maintenance.py,
+    # after being archived to ai_log_archive_dir (gzip NDJSON) if set.
+    ai_log_retention_months: int = 6
+    ai_log_archive_dir: Optional[str] = None
+
+    # Prompt templates (app/prompts/prompts.json) are loaded once and served from memory.
+    # The file's mtime is re-checked at most this often; edits are picked up without a
+    # restart. Set to a negative value to disable hot reload.
+    prompt_reload_interval_seconds: float = 2.0
+
+    # Server-held voice chat history (conversation_turns). The model context keeps
+    # at most this many of the most recent messages / characters of the session.
+    conversation_history_max_messages: int = 40
+    conversation_history_max_chars: int = 12000
+    # Conversations whose capped history is kept in memory per worker
+    conversation_history_cache_size: int = 1024
+
+    # Word views (app/services/word_catalog.py) are rebuilt from the words table this often
+    word_catalog_ttl_seconds: float = 600.0
+
+    # Per-conversation voice-turn context (words, prompts, voice; app/services/voice_turn_context.py)
+    voice_context_cache_size: int = 1024
+    voice_context_ttl_seconds: float = 300.0
+
+    # Context compaction: the last N turns (user + assistant) are sent verbatim; older
+    # turns are folded into a running summary, refreshed in the background once this
+    # many messages are waiting to be summarized.
+    context_keep_turns: int = 6
+    context_summary_batch_messages: int = 4
+
+    # Per-worker admission control for AI providers (app/core/provider_limits.py).
+    # Max calls in flight per provider ("provider:n", comma-separated); callers beyond
+    # that queue for up to provider_queue_timeout_seconds, and once provider_max_queue
+    # are waiting further calls fail fast with 503. 429s are retried after Retry-After.
+    provider_concurrency: str = "stt:16,llm:16,tts:8,realtime:8"
+    provider_max_queue: int = 32
+    provider_queue_timeout_seconds: float = 10.0
+    provider_rate_limit_retries: int = 2
+    provider_max_backoff_seconds: float = 20.0
+
+    # Hedged STT: if the primary model hasn't answered within the stt_hedge_percentile of
+    # its recent latencies (clamped to min/max; default until stt_hedge_min_samples are
+    # seen), the fallback model is fired in parallel and the first transcript wins.
+    stt_hedging_enabled: bool = True
+    stt_hedge_percentile: float = 0.95
+    stt_hedge_min_samples: int = 20
+    stt_hedge_default_delay_ms: float = 2500
+    stt_hedge_min_delay_ms: float = 800
+    stt_hedge_max_delay_ms: float = 5000
+    # Hard bound on a whole transcription, both legs included
+    stt_deadline_seconds: float = 15.0
+    # Uploads longer than this are rejected with 413 before any provider call; clips
+    # shorter than stt_min_audio_seconds get an empty transcript without one
+    stt_max_audio_seconds: float = 120.0
+    stt_min_audio_seconds: float = 0.2
+
+    # Optional STT preprocessing (app/services/audio_preprocess.py): mono 16 kHz, energy-VAD
+    # silence trim, Opus re-encode, in a bounded process pool. Requires ffmpeg.
+    stt_preprocess_enabled: bool = False
+    stt_preprocess_workers: int = 2
+    stt_preprocess_max_queue: int = 16
+    stt_preprocess_queue_timeout_seconds: float = 2.0
+    stt_preprocess_bitrate_kbps: int = 24
+    # Frames quieter than the loudest frame by this many dB (or below the RMS floor) are silence
+    stt_vad_threshold_db: float = 35.0
+    stt_vad_floor_rms: float = 150.0
+    stt_vad_padding_ms: int = 200
+    stt_silence_rms: float = 20.0  # loudest frame below this: silent upload, STT is skipped
+
+    # PCM16 -> MP3/Opus encoding (app/services/audio_encoder.py): in-process lameenc when
+    # installed, otherwise warm ffmpeg processes waiting on stdin, per (format, sample rate).
+    audio_encoder_warm_processes: int = 2
+    audio_encoder_prewarm: bool = False  # start the warm processes at startup (nothing encodes on the request path yet)
+    audio_encoder_max_concurrency: int = 4
+    audio_encoder_max_queue: int = 16
+    audio_encoder_queue_timeout_seconds: float = 5.0
+    audio_encoder_mp3_kbps: int = 64
+    audio_encoder_opus_kbps: int = 32
+
+    # Local audio directory as an LRU cache (app/services/audio_cache.py)
+    audio_cache_max_bytes: int = 512 * 1024 * 1024
+    audio_cache_max_age_hours: float = 24.0
+    audio_cache_min_age_seconds: float = 300.0  # never evict a file used more recently than this
+    audio_cache_janitor_interval_seconds: float = 300.0
+    audio_cache_control_max_age: int = 86400  # Cache-Control max-age for /audio responses
+
+    # Next-encounter warm-up after /complete (app/services/warmup_service.py): at most one
+    # warm-up per user (a newer one cancels it), warmup_max_concurrent per worker; prepared
+    # word selections are used by the lesson bundle for warmup_ttl_seconds.
+    warmup_enabled: bool = True
+    warmup_max_concurrent: int = 32
+    warmup_ttl_seconds: float = 600.0
+    # Pre-opened Realtime sessions waiting for the next lesson's first voice turn
+    realtime_warm_max_sessions: int = 8
+    realtime_warm_session_ttl_seconds: float = 120.0
+
+    # Circuit breakers (app/core/circuit_breaker.py), e.g. STT primary model per audio
+    # format: open after breaker_failure_threshold failures that are at least
+    # breaker_failure_ratio of the calls in the window; probe again after breaker_open_seconds.
+    breaker_failure_threshold: int = 5
+    breaker_failure_ratio: float = 0.5
+    breaker_window_seconds: float = 60.0
+    breaker_open_seconds: float = 30.0
+    breaker_half_open_successes: int = 2
 
     class Config:
         env_file = ".env"
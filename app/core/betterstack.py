@@ -52,6 +52,7 @@ async def ship_log(log_entry: Dict[str, Any]) -> None:
     # Remove large fields
     fields_to_remove = [
         "messages_json",
+        "message_hashes",
         "response_json",
         "transcript_text",
         "audio_bytes",
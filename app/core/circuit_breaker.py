@@ -0,0 +1,177 @@
+"""Circuit breakers for provider calls that are known to fail for some inputs.
+
+Used by STT, keyed by (model, audio_format): when the primary model keeps
+rejecting a format, requests in that format go straight to the fallback model
+instead of paying for a failed round-trip first.
+
+    breaker = get_breaker(STT_MODEL, audio_format)
+    if breaker.allow():
+        try:
+            ...
+            breaker.record_success()
+        except SomeError:
+            breaker.record_failure()
+
+States:
+    closed     calls allowed; opens once the rolling window holds at least
+               failure_threshold failures making up at least failure_ratio of calls
+    open       calls refused until open_seconds have passed
+    half_open  one probe call at a time (a probe that never reports is replaced
+               after open_seconds); success_threshold successes close the
+               breaker, any failure re-opens it
+
+State is per worker. get_breaker() instances are listed by breaker_states()
+(admin endpoint) and breaker_stats() (metrics collector).
+"""
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import threading
+import time
+
+from app.config import settings
+from app.core import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        failure_ratio: float = 0.5,
+        window_seconds: float = 60.0,
+        open_seconds: float = 30.0,
+        success_threshold: int = 2,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_ratio = failure_ratio
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.success_threshold = success_threshold
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()  # (monotonic time, ok) in the window
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._probe_successes = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance(time.monotonic())
+            return self._state
+
+    def _advance(self, now: float) -> None:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_started = None
+            self._probe_successes = 0
+
+    def _transition(self, state: str, now: float) -> None:
+        self._state = state
+        self._outcomes.clear()
+        self._probe_started = None
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = now
+        metrics.increment("circuit_breaker_transitions", breaker=self.name, state=state)
+
+    def allow(self) -> bool:
+        """Whether a call may go through now (in half-open, claims the probe slot)."""
+        now = time.monotonic()
+        with self._lock:
+            self._advance(now)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and (
+                self._probe_started is None or now - self._probe_started >= self.open_seconds
+            ):
+                self._probe_started = now
+                return True
+            metrics.increment("circuit_breaker_rejected", breaker=self.name)
+            return False
+
+    def record_success(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_started = None
+                self._probe_successes += 1
+                if self._probe_successes >= self.success_threshold:
+                    self._transition(CLOSED, now)
+            elif self._state == CLOSED:
+                self._record(now, True)
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(OPEN, now)
+            elif self._state == CLOSED:
+                self._record(now, False)
+                failures = sum(1 for _, ok in self._outcomes if not ok)
+                if failures >= self.failure_threshold and failures / len(self._outcomes) >= self.failure_ratio:
+                    self._transition(OPEN, now)
+
+    def _record(self, now: float, ok: bool) -> None:
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            self._advance(now)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "window_calls": len(self._outcomes),
+                "window_failures": failures,
+                "open_remaining_s": (
+                    round(max(self.open_seconds - (now - self._opened_at), 0), 1) if self._state == OPEN else None
+                ),
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(*key: str) -> CircuitBreaker:
+    """Breaker for a key such as (model, audio_format), created from settings on first use."""
+    name = ":".join(str(part) for part in key)
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=settings.breaker_failure_threshold,
+                failure_ratio=settings.breaker_failure_ratio,
+                window_seconds=settings.breaker_window_seconds,
+                open_seconds=settings.breaker_open_seconds,
+                success_threshold=settings.breaker_half_open_successes,
+            )
+        return breaker
+
+
+def breaker_states() -> List[dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [b.snapshot() for b in sorted(breakers, key=lambda b: b.name)]
+
+
+def breaker_stats() -> Dict[str, float]:
+    """Metrics collector: 0 closed, 1 half-open, 2 open, per breaker."""
+    return {f"circuit_breaker_state{{breaker={s['name']}}}": _STATE_GAUGE[s["state"]] for s in breaker_states()}
+
+
+def reset_breakers() -> None:
+    """Forget all breakers (tests)."""
+    with _breakers_lock:
+        _breakers.clear()
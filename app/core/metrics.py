@@ -0,0 +1,166 @@
+"""In-process metrics: counters, gauges and timings, served at GET /metrics.
+
+    from app.core import metrics
+    metrics.increment("prompt_registry_reloads")
+    metrics.set_gauge("prompt_registry_version", 3)
+    with metrics.timer("prompt_lookup_ms"):
+        ...
+
+Labels are keyword arguments and become part of the series key, e.g.
+    metrics.increment("provider_calls", provider="stt")  ->  "provider_calls{provider=stt}"
+
+Timings keep count/sum/min/max plus the most recent TIMING_WINDOW samples for
+p50/p95/p99. Components that already hold their own state (pools, limiters,
+caches) can register a collector returning a dict of gauges, evaluated on every
+snapshot. Values are per process; with several workers each reports its own.
+"""
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, List, Optional
+import threading
+import time
+
+TIMING_WINDOW = 1024
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, float] = {}
+_timings: Dict[str, "_Timing"] = {}
+_collectors: List[Callable[[], Dict[str, float]]] = []
+
+
+class _Timing:
+    __slots__ = ("count", "total", "min", "max", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.recent: Deque[float] = deque(maxlen=TIMING_WINDOW)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.recent.append(value)
+
+    def as_dict(self) -> dict:
+        ordered = sorted(self.recent)
+
+        def pct(q: float) -> Optional[float]:
+            return round(ordered[int(q * (len(ordered) - 1))], 3) if ordered else None
+
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 3) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": pct(0.5),
+            "p95": pct(0.95),
+            "p99": pct(0.99),
+        }
+
+
+def _key(name: str, labels: Dict[str, object]) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={labels[k]}" for k in sorted(labels)) + "}"
+
+
+def increment(name: str, value: float = 1, **labels) -> None:
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record one timing sample (milliseconds by convention, name ends in _ms)."""
+    key = _key(name, labels)
+    with _lock:
+        timing = _timings.get(key)
+        if timing is None:
+            timing = _timings[key] = _Timing()
+        timing.add(value)
+
+
+@contextmanager
+def timer(name: str, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - start) * 1000, **labels)
+
+
+class ServerTiming:
+    """Named request phases, observed as `name{phase=...}` and rendered as a Server-Timing header.
+
+        timing = metrics.ServerTiming("lesson_bundle_ms")
+        with timing.phase("words"):
+            ...
+        response.headers["Server-Timing"] = timing.header()
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.phases: List[tuple] = []
+
+    @contextmanager
+    def phase(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.phases.append((phase, elapsed))
+            observe(self.name, elapsed, phase=phase)
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def header(self) -> str:
+        total = self.total_ms()
+        observe(self.name, total, phase="total")
+        return ", ".join(f"{phase};dur={ms:.1f}" for phase, ms in self.phases + [("total", total)])
+
+
+def register_collector(collector: Callable[[], Dict[str, float]]) -> None:
+    """Register a callable returning {gauge_name: value}, evaluated on each snapshot."""
+    with _lock:
+        if collector not in _collectors:
+            _collectors.append(collector)
+
+
+def get_counter(name: str, **labels) -> float:
+    with _lock:
+        return _counters.get(_key(name, labels), 0)
+
+
+def snapshot() -> dict:
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        timings = {k: t.as_dict() for k, t in _timings.items()}
+        collectors = list(_collectors)
+    for collector in collectors:
+        try:
+            gauges.update(collector())
+        except Exception:
+            pass  # a broken collector must not take down /metrics
+    return {"counters": counters, "gauges": gauges, "timings": timings}
+
+
+def reset() -> None:
+    """Clear all values (tests)."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
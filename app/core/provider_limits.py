@@ -0,0 +1,241 @@
+"""Per-worker admission control for AI provider calls (STT, LLM, TTS, Realtime).
+
+Each provider has its own limiter: at most N calls in flight and at most
+provider_max_queue callers waiting for a slot.
+
+    from app.core import provider_limits
+
+    # Blocking SDK call, run in a thread while holding an "llm" slot
+    response = await provider_limits.call("llm", client.responses.create, **params)
+
+    # Long-lived stream (Realtime WebSocket): hold the slot for its duration
+    async with provider_limits.slot("realtime"):
+        ...
+
+When the queue is full, or a caller waits longer than
+provider_queue_timeout_seconds, ProviderBusyError is raised without
+contacting the provider (the API maps it to 503 + Retry-After). A 429 from
+the provider is retried after its Retry-After (bounded by
+provider_max_backoff_seconds), and the limiter holds back that provider's
+next calls until then, so a rate-limited provider isn't hammered by the rest
+of the worker.
+
+Limiters are thread-safe and not bound to an event loop: the same limiter
+serves request handlers, background tasks that call asyncio.run() and the
+executor-run TTS helper. Metrics (GET /metrics): provider_in_flight /
+provider_queue_depth gauges, provider_queue_wait_ms timings and
+provider_rejected / provider_rate_limited counters, all labelled by provider.
+"""
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Deque, Dict, Optional
+import asyncio
+import random
+import threading
+import time
+
+from app.config import settings
+from app.core import metrics
+
+PROVIDERS = ("stt", "llm", "tts", "realtime")
+
+
+class ProviderBusyError(Exception):
+    """The provider's limiter is saturated; the call was not attempted."""
+
+    def __init__(self, provider: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"{provider} provider is busy ({reason})")
+        self.provider = provider
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ProviderLimiter:
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._paused_until = 0.0  # time.monotonic() deadline set by a 429
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _retry_after_hint(self) -> float:
+        return max(1.0, round(self._paused_until - time.monotonic(), 1))
+
+    async def acquire(self) -> None:
+        start = time.perf_counter()
+        waiter = None
+        with self._lock:
+            if self._in_flight < self.max_concurrency and not self._waiters:
+                self._in_flight += 1
+            elif len(self._waiters) >= self.max_queue:
+                metrics.increment("provider_rejected", provider=self.name, reason="queue_full")
+                raise ProviderBusyError(self.name, "queue full", self._retry_after_hint())
+            else:
+                waiter = _Waiter(asyncio.get_running_loop())
+                self._waiters.append(waiter)
+
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(waiter.future, self.queue_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                with self._lock:
+                    granted = waiter.granted
+                    if not granted:
+                        self._waiters.remove(waiter)
+                if granted:
+                    # The slot was handed over just as we gave up; pass it on
+                    self.release()
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                metrics.increment("provider_rejected", provider=self.name, reason="queue_timeout")
+                raise ProviderBusyError(self.name, "queue timeout", self._retry_after_hint()) from None
+        metrics.observe("provider_queue_wait_ms", (time.perf_counter() - start) * 1000, provider=self.name)
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                try:
+                    waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+                except RuntimeError:
+                    continue  # the waiter's loop is closed
+                waiter.granted = True  # the slot moves to the waiter; in_flight is unchanged
+                return
+            self._in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back new calls to this provider for `seconds` (Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def _respect_pause(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def call(self, fn: Callable, *args, **kwargs):
+        """Run a blocking provider call in a thread while holding a slot, retrying 429s."""
+        async with self.slot():
+            attempt = 0
+            while True:
+                await self._respect_pause()
+                try:
+                    return await asyncio.to_thread(fn, *args, **kwargs)
+                except Exception as e:
+                    delay = retry_after_seconds(e, attempt)
+                    if delay is None or attempt >= settings.provider_rate_limit_retries:
+                        raise
+                    metrics.increment("provider_rate_limited", provider=self.name)
+                    self.pause(delay)
+                    attempt += 1
+
+
+def retry_after_seconds(error: Exception, attempt: int = 0) -> Optional[float]:
+    """Backoff for a rate-limit (429) error, None for anything else.
+
+    Uses the response's retry-after-ms / retry-after headers when present,
+    else exponential backoff with jitter; capped at provider_max_backoff_seconds.
+    """
+    if getattr(error, "status_code", None) != 429:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    delay = None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            delay = float(headers["retry-after-ms"]) / 1000
+        elif headers.get("retry-after") is not None:
+            delay = float(headers["retry-after"])
+    except (TypeError, ValueError):
+        delay = None
+    if delay is None:
+        delay = 0.5 * (2 ** attempt) * (1 + random.random() * 0.25)
+    return min(max(delay, 0.0), settings.provider_max_backoff_seconds)
+
+
+def _parse_concurrency(raw: str) -> Dict[str, int]:
+    limits = {}
+    for part in raw.split(","):
+        if ":" not in part:
+            continue
+        name, value = part.split(":", 1)
+        try:
+            limits[name.strip()] = int(value)
+        except ValueError:
+            continue
+    return limits
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            concurrency = _parse_concurrency(settings.provider_concurrency)
+            limiter = _limiters[provider] = ProviderLimiter(
+                provider,
+                max_concurrency=concurrency.get(provider, 8),
+                max_queue=settings.provider_max_queue,
+                queue_timeout=settings.provider_queue_timeout_seconds,
+            )
+        return limiter
+
+
+def slot(provider: str):
+    return get_limiter(provider).slot()
+
+
+async def call(provider: str, fn: Callable, *args, **kwargs):
+    return await get_limiter(provider).call(fn, *args, **kwargs)
+
+
+def limiter_stats() -> Dict[str, float]:
+    """Metrics collector: in-flight calls and queue depth per provider."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    stats = {}
+    for limiter in limiters:
+        stats[f"provider_in_flight{{provider={limiter.name}}}"] = limiter.in_flight
+        stats[f"provider_queue_depth{{provider={limiter.name}}}"] = limiter.queue_depth
+    return stats
+
+
+def reset_limiters() -> None:
+    """Drop all limiters so they are rebuilt from settings (tests)."""
+    with _limiters_lock:
+        _limiters.clear()
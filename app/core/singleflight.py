@@ -0,0 +1,111 @@
+"""Single-flight: concurrent callers with the same key share one computation.
+
+    _tts_flight = SingleFlight("tts")
+
+    audio_path, shared = await _tts_flight.do(key, lambda: synthesize(...))
+    transcript, shared = flight.do_sync(key, lambda: transcribe(...))
+
+The first caller for a key (the leader) runs the function; callers arriving
+while it is in flight wait for and receive the same result or exception
+(shared=True). Nothing is cached: once the leader finishes the key is free, so
+the next caller computes again. Keys should be content hashes of everything the
+result depends on.
+
+Meant for expensive upstream calls (STT, TTS), not for memoized helpers: every
+call takes the lock and allocates a Future.
+
+Works across threads and event loops (results travel through a
+concurrent.futures.Future). A follower that is cancelled stops waiting without
+affecting the others; if the leader is cancelled, its followers join again, so
+one of them becomes the new leader and runs the call itself.
+
+Coalesced calls are counted as singleflight_coalesced{flight=...}; in-flight keys
+per instance are reported by singleflight_stats() (metrics collector).
+"""
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, List, Tuple, TypeVar
+import asyncio
+import threading
+
+from app.core import metrics
+
+T = TypeVar("T")
+
+
+class SingleFlightAbandoned(RuntimeError):
+    """The leader was cancelled before producing a result (followers retry)."""
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        _flights.append(self)
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """(shared future, whether this caller leads)."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                metrics.increment("singleflight_coalesced", flight=self.name)
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _settle(self, key: str, future: Future, result=None, error: BaseException = None) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is None:
+            future.set_result(result)
+        elif isinstance(error, (asyncio.CancelledError, KeyboardInterrupt, SystemExit)):
+            future.set_exception(SingleFlightAbandoned(f"{self.name}: leader for {key[:16]} was cancelled"))
+        else:
+            future.set_exception(error)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                # shield: a cancelled follower must not cancel the shared future
+                return await asyncio.shield(asyncio.wrap_future(future)), True
+            except SingleFlightAbandoned:
+                continue
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result)
+        return result, False
+
+    def do_sync(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return future.result(), True
+            except SingleFlightAbandoned:
+                continue
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result)
+        return result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+_flights: List[SingleFlight] = []
+
+
+def singleflight_stats() -> Dict[str, float]:
+    """Metrics collector: keys currently in flight per instance."""
+    return {f"singleflight_in_flight{{flight={f.name}}}": f.in_flight() for f in _flights}
@@ -4,6 +4,10 @@ Each entry defines the grammar situation's word workload, drill type,
 phase availability, and conversation config for phases 2/3.
 """
 
+# animation_type of grammar Situation rows (scripts/seed_qa.py); the prompt
+# builders map it to a scene via GRAMMAR_SCENE_MAP
+GRAMMAR_ANIMATION_TYPE = "grammar"
+
 GRAMMAR_WORD_TRANSLATIONS = {
     # Pronouns
     "yo": "I (subject pronoun)",
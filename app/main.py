@@ -1,5 +1,4 @@
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
@@ -106,6 +105,53 @@ async def lifespan(app: FastAPI):
         logger.warning("⚠️  Database not available at startup. App will start but database operations may fail.")
         logger.warning("⚠️  This is normal if the database is still provisioning. It will be available shortly.")
     
+    # Create upcoming monthly partitions for AI request tables (no-op if not partitioned)
+    if db_connected:
+        try:
+            from sqlalchemy.orm import Session as _Session
+            from app.services.ai_partition_service import ensure_partitions
+            with _Session(engine) as _db:
+                ensure_partitions(_db)
+        except Exception as e:
+            logger.error(f"❌ Could not ensure AI request partitions (run scripts/ai_partition_maintenance.py): {e}")
+
+    # Load and validate prompt templates once; lookups are served from memory afterwards
+    from app.services.prompt_registry import load_prompt_registry
+    load_prompt_registry()
+
+    # Precompute system prompts for every catalog situation
+    from app.core import metrics
+    from app.services.voice_turn_service import warm_prompt_cache, prompt_cache_stats
+    metrics.register_collector(prompt_cache_stats)
+
+    # Per-provider admission control; created up front so /metrics shows every provider
+    from app.core import provider_limits
+    for _provider in provider_limits.PROVIDERS:
+        provider_limits.get_limiter(_provider)
+    metrics.register_collector(provider_limits.limiter_stats)
+    from app.core.circuit_breaker import breaker_stats
+    metrics.register_collector(breaker_stats)
+    from app.core.singleflight import singleflight_stats
+    metrics.register_collector(singleflight_stats)
+    from app.services.audio_encoder import encoder_stats, warm_encoders
+    metrics.register_collector(encoder_stats)
+    warm_encoders()
+    from app.services.warmup_service import warmup_stats
+    metrics.register_collector(warmup_stats)
+    from app.services.voice_turn_context import voice_context_stats
+    metrics.register_collector(voice_context_stats)
+    from app.services.word_catalog import word_catalog_stats
+    metrics.register_collector(word_catalog_stats)
+
+    # Index /tmp/audio and keep it within its byte budget
+    import asyncio
+    from app.services.audio_cache import audio_cache_stats, run_janitor
+    metrics.register_collector(audio_cache_stats)
+    audio_janitor = asyncio.create_task(run_janitor())
+    with metrics.timer("prompt_cache_warm_ms"):
+        warmed = warm_prompt_cache()
+    logger.info(f"🔥 Warmed {warmed} system prompts")
+
     # Ensure admin flags for known admin emails (runs on every startup, safe if users don't exist yet)
     try:
         from sqlalchemy.orm import Session as _Session
@@ -119,6 +165,13 @@ async def lifespan(app: FastAPI):
 
     yield
     # Shutdown
+    audio_janitor.cancel()
+    from app.services.audio_preprocess import shutdown_pool
+    shutdown_pool()
+    from app.services.audio_encoder import shutdown_encoders
+    shutdown_encoders()
+    from app.services.warmup_service import shutdown_warmup
+    await shutdown_warmup()
     print("👋 Spanish for Expats API shutting down...")
 
 app = FastAPI(
@@ -147,6 +200,9 @@ app.add_middleware(
 )
 
 # Global exception handlers
+from app.core.provider_limits import ProviderBusyError
+from app.utils.audio_duration import AudioTooLongError
+
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     from app.core.logger import log_event
@@ -176,6 +232,41 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         status_code=exc.status_code,
     )
 
+@app.exception_handler(ProviderBusyError)
+async def provider_busy_handler(request: Request, exc: ProviderBusyError):
+    from app.core.logger import log_event
+    from app.core.request_utils import get_user_id_from_request, get_request_id_from_request
+
+    # Shed load quickly instead of queueing more calls behind a saturated provider
+    log_event(
+        level="warning",
+        event="provider_busy",
+        message=f"503 on {request.method} {request.url.path}: {exc}",
+        request_id=get_request_id_from_request(request),
+        user_id=get_user_id_from_request(request),
+        extra={"status_code": 503, "provider": exc.provider, "reason": exc.reason, "path": str(request.url.path)},
+    )
+    return JSONResponse(
+        content={"detail": "The service is busy, please retry shortly.", "status_code": 503},
+        status_code=503,
+        headers={"Retry-After": str(int(exc.retry_after + 0.999))},
+    )
+
+@app.exception_handler(AudioTooLongError)
+async def audio_too_long_handler(request: Request, exc: AudioTooLongError):
+    from app.core.logger import log_event
+    from app.core.request_utils import get_user_id_from_request, get_request_id_from_request
+
+    log_event(
+        level="warning",
+        event="audio_too_long",
+        message=f"413 on {request.method} {request.url.path}: {exc}",
+        request_id=get_request_id_from_request(request),
+        user_id=get_user_id_from_request(request),
+        extra={"status_code": 413, "audio_seconds": exc.seconds, "path": str(request.url.path)},
+    )
+    return JSONResponse(content={"detail": str(exc), "status_code": 413}, status_code=413)
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     from app.core.logger import log_event
@@ -261,8 +352,9 @@ async def options_handler(request: Request, full_path: str):
         }
     )
 
-# Mount static files for audio
-app.mount("/audio", StaticFiles(directory="/tmp/audio"), name="audio")
+# Mount static files for audio (ETag/Range from Starlette, Cache-Control + LRU tracking added)
+from app.services.audio_cache import AudioFiles
+app.mount("/audio", AudioFiles(directory="/tmp/audio"), name="audio")
 
 # Log R2 config status
 from app.config import settings as _settings
@@ -278,7 +370,7 @@ logger.info("  ✅ /v1/auth")
 app.include_router(subscription.router, prefix="/v1/subscription", tags=["subscription"])
 logger.info("  ✅ /v1/subscription")
 app.include_router(situations.router, prefix="/v1/situations", tags=["situations"])
-logger.info("  ✅ /v1/situations (GET /, GET /{id}, POST /{id}/start, POST /{id}/complete)")
+logger.info("  ✅ /v1/situations (GET /, GET /{id}, POST /{id}/start, POST /{id}/bundle, POST /{id}/complete)")
 app.include_router(user_words.router, prefix="/v1/user/words", tags=["user-words"])
 logger.info("  ✅ /v1/user/words")
 app.include_router(conversations.router, prefix="/v1/conversations", tags=["conversations"])
@@ -287,7 +379,7 @@ from app.api.v1 import onboarding
 app.include_router(onboarding.router, prefix="/v1/onboarding", tags=["onboarding"])
 logger.info("  ✅ /v1/onboarding (POST /save-selections, GET /status, GET /available-categories)")
 app.include_router(logs.router, prefix="/v1/log", tags=["logs"])
-logger.info("  ✅ /v1/log (POST / - frontend logging)")
+logger.info("  ✅ /v1/log (POST / - frontend logging, POST /batch)")
 app.include_router(refreshes.router, prefix="/v1/refreshes", tags=["refreshes"])
 logger.info("  ✅ /v1/refreshes (GET /pending, POST /{id}/start, POST /{id}/complete)")
 logger.info("✅ All routes registered")
@@ -303,6 +395,20 @@ async def health():
     return {"status": "healthy"}
 
 
+from fastapi import Depends, HTTPException, status
+from app.auth import get_current_user
+from app.models import User
+
+
+@app.get("/metrics")
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    """In-process counters, gauges and timings for this worker (admin only)."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    from app.core import metrics
+    return metrics.snapshot()
+
+
 @app.get("/wakeup")
 async def wakeup():
     """Wakeup endpoint for Railway sleeping apps"""
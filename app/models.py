@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Text, JSON, CheckConstraint
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Text, JSON, CheckConstraint, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -142,6 +142,8 @@ class Conversation(Base):
     used_typed_word_ids = Column(JSONB, default=list, nullable=False)
     used_spoken_word_ids = Column(JSONB, default=list, nullable=False)
     status = Column(String, default="active", nullable=False)  # 'active' or 'complete'
+    # Running summary of older voice turns: {"session_no", "through_seq", "text"} (context compaction)
+    history_summary = Column(JSONB, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -150,6 +152,23 @@ class Conversation(Base):
     situation = relationship("Situation", back_populates="conversations")
 
 
+class ConversationTurn(Base):
+    __tablename__ = "conversation_turns"
+    __table_args__ = (
+        UniqueConstraint("conversation_id", "seq", name="uq_conversation_turns_conversation_seq"),
+        CheckConstraint("role IN ('assistant', 'user')", name="ck_conversation_turns_role"),
+        {"comment": "Append-only voice chat transcript; session_no increments each time the conversation is (re)started"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    conversation_id = Column(UUID(as_uuid=True), ForeignKey("conversations.id"), nullable=False, index=True)
+    session_no = Column(Integer, nullable=False)
+    seq = Column(Integer, nullable=False)  # Order within the conversation, across sessions
+    role = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class DailyEncounterLog(Base):
     __tablename__ = "daily_encounter_logs"
     __table_args__ = (
@@ -22,6 +22,7 @@ SituationWord = models_legacy.SituationWord
 UserWord = models_legacy.UserWord
 UserSituation = models_legacy.UserSituation
 Conversation = models_legacy.Conversation
+ConversationTurn = models_legacy.ConversationTurn
 Subscription = models_legacy.Subscription
 DailyEncounterLog = models_legacy.DailyEncounterLog
 # Base is imported from database, not from models.py
@@ -30,8 +31,10 @@ from app.database import Base
 # Import AI request models from ai_requests.py
 from app.models.ai_requests import (
     LLMRequest,
+    LLMMessageBlob,
     STTRequest,
     TTSRequest,
+    AIRequestRollup,
 )
 
 __all__ = [
@@ -42,11 +45,14 @@ __all__ = [
     "UserWord",
     "UserSituation",
     "Conversation",
+    "ConversationTurn",
     "Subscription",
     "DailyEncounterLog",
     "LLMRequest",
+    "LLMMessageBlob",
     "STTRequest",
     "TTSRequest",
+    "AIRequestRollup",
 ]
 
 # Also export Base if it exists
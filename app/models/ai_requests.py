@@ -1,10 +1,15 @@
-from sqlalchemy import Column, String, Boolean, Integer, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Boolean, Integer, BigInteger, Float, DateTime, Text, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import uuid
 from app.database import Base
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class LLMRequest(Base):
     __tablename__ = "llm_requests"
 
@@ -15,7 +20,8 @@ class LLMRequest(Base):
     model = Column(String, nullable=False)
     prompt_version = Column(String, nullable=True)
     agent_id = Column(String, nullable=True)
-    messages_json = Column(JSONB, nullable=True)
+    messages_json = Column(JSONB, nullable=True)  # Legacy inline copy; new rows use message_hashes
+    message_hashes = Column(JSONB, nullable=True)  # Ordered sha256 keys into llm_message_blobs
     temperature = Column(Float, nullable=True)
     max_tokens = Column(Integer, nullable=True)
     success = Column(Boolean, default=False, nullable=False)
@@ -23,9 +29,29 @@ class LLMRequest(Base):
     latency_ms = Column(Integer, nullable=True)
     tokens_in = Column(Integer, nullable=True)
     tokens_out = Column(Integer, nullable=True)
+    cached_tokens = Column(Integer, nullable=True)  # Part of tokens_in served from the provider's prompt cache
     estimated_cost = Column(Float, nullable=True)
+    # Estimated prompt tokens before/after context compaction (app/services/context_compaction.py)
+    context_tokens_before = Column(Integer, nullable=True)
+    context_tokens_after = Column(Integer, nullable=True)
     error_code = Column(String, nullable=True)
     error_message = Column(Text, nullable=True)
+    # Part of the primary key: the table is range-partitioned by month on created_at (migration 016)
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=_utcnow, server_default=func.now(), index=True)
+
+
+class LLMMessageBlob(Base):
+    """Content-addressed store for LLM messages (one row per distinct message).
+
+    Keyed by sha256 of the canonical JSON (see app/services/llm_message_store.py),
+    so a system prompt or history message repeated across turns and users is
+    stored once.
+    """
+    __tablename__ = "llm_message_blobs"
+
+    sha256 = Column(String, primary_key=True)
+    message = Column(JSONB, nullable=False)
+    byte_size = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -40,15 +66,24 @@ class STTRequest(Base):
     audio_sha256 = Column(String, nullable=True)
     audio_bytes = Column(Integer, nullable=True)
     audio_format = Column(String, nullable=True)
+    audio_seconds = Column(Float, nullable=True)  # From the container headers (app/utils/audio_duration.py)
     language = Column(String, nullable=True)
     success = Column(Boolean, default=False, nullable=False)
     transcript_text = Column(Text, nullable=True)
     output_json = Column(JSONB, nullable=True)
     latency_ms = Column(Integer, nullable=True)
     estimated_cost = Column(Float, nullable=True)
+    # Hedged STT (app/services/openai_media_gateway.py): model whose transcript was used,
+    # whether the fallback was fired while the primary was still running, and per-leg latency
+    # (primary_latency_ms is NULL when the circuit breaker skipped the primary)
+    winning_model = Column(String, nullable=True)
+    hedged = Column(Boolean, nullable=True)
+    primary_latency_ms = Column(Integer, nullable=True)
+    fallback_latency_ms = Column(Integer, nullable=True)
     error_code = Column(String, nullable=True)
     error_message = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Part of the primary key: the table is range-partitioned by month on created_at (migration 016)
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=_utcnow, server_default=func.now(), index=True)
 
 
 class TTSRequest(Base):
@@ -70,4 +105,31 @@ class TTSRequest(Base):
     estimated_cost = Column(Float, nullable=True)
     error_code = Column(String, nullable=True)
     error_message = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Part of the primary key: the table is range-partitioned by month on created_at (migration 016)
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=_utcnow, server_default=func.now(), index=True)
+
+
+class AIRequestRollup(Base):
+    """Hourly aggregates of AI requests, maintained incrementally by the gateways.
+
+    latency_sketch is a log-bucketed histogram ({bin: count}, see
+    app/services/ai_rollup_service.py) so rows can be merged across hours
+    and dimensions and still yield p50/p95/p99.
+    """
+    __tablename__ = "ai_request_rollups_hourly"
+
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    kind = Column(String, primary_key=True)  # 'llm', 'stt', 'tts'
+    model = Column(String, primary_key=True)
+    agent_id = Column(String, primary_key=True, default="", server_default="")
+    learning_phase = Column(String, primary_key=True, default="", server_default="")
+    calls = Column(Integer, default=0, nullable=False)  # successful calls
+    errors = Column(Integer, default=0, nullable=False)
+    latency_sum_ms = Column(BigInteger, default=0, nullable=False)
+    latency_min_ms = Column(Integer, nullable=True)
+    latency_max_ms = Column(Integer, nullable=True)
+    cost_sum = Column(Float, default=0, nullable=False)
+    tokens_in_sum = Column(BigInteger, default=0, nullable=False, server_default="0")
+    cached_tokens_sum = Column(BigInteger, default=0, nullable=False, server_default="0")
+    latency_sketch = Column(JSONB, default=dict, nullable=False, server_default="{}")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -171,6 +171,35 @@ class GrammarConfigResponse(BaseModel):
     phase_2_config: Optional[dict] = None
 
 
+class LessonSituation(BaseModel):
+    id: str
+    title: str
+    free: bool
+    encounter_number: int = 1
+    animation_type: str = ""
+    situation_type: str = "main"
+    goal: Optional[str] = None
+
+
+class VoiceConfig(BaseModel):
+    voice: str
+    instructions: Optional[str] = None
+
+
+class LessonBundleResponse(BaseModel):
+    """POST /v1/situations/{id}/bundle: everything needed to run an encounter."""
+    situation: LessonSituation
+    conversation_id: UUID
+    words: List[WordSchema]
+    initial_message: str
+    initial_audio_url: Optional[str] = None
+    language_mode: str = "english"
+    vocab_level: int = 0
+    system_prompt: Optional[str] = None
+    voice: VoiceConfig
+    grammar_config: Optional[GrammarConfigResponse] = None
+
+
 # Refresh (SRS) schemas
 class PendingRefreshSituation(BaseModel):
     situation_id: str
@@ -0,0 +1,181 @@
+"""Monthly partitions and retention for the raw AI request tables.
+
+llm_requests, stt_requests and tts_requests are range-partitioned on
+created_at, one partition per calendar month (migration 016):
+
+    llm_requests_p202610  FOR VALUES FROM ('2026-10-01') TO ('2026-11-01')
+    llm_requests_default  DEFAULT  (safety net, should stay empty)
+
+ensure_partitions() creates upcoming months ahead of time (called at startup
+and by scripts/ai_partition_maintenance.py, which should run daily as a cron
+job). If neither ran for longer than that, rows land in the default partition;
+ensure_partitions() then creates partitions for those months too and moves the
+rows over, since Postgres refuses to create a partition whose range has rows in
+the default partition. apply_retention() detaches
+partitions older than the retention window, optionally archives them to
+gzip-compressed NDJSON, and drops them. Dropping a partition is instant and
+leaves nothing behind for vacuum, unlike DELETE.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+import gzip
+import logging
+import re
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+AI_PARTITIONED_TABLES = ("llm_requests", "stt_requests", "tts_requests")
+
+_PARTITION_RE = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(ts: datetime) -> datetime:
+    """First instant of the month containing ts (UTC)."""
+    ts = ts.astimezone(timezone.utc) if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(ts: datetime, months: int) -> datetime:
+    """Shift a month-start datetime by N months."""
+    index = ts.year * 12 + (ts.month - 1) + months
+    return ts.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    """Parse the month out of a partition name (None for the default partition)."""
+    match = _PARTITION_RE.search(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def is_partitioned(db: Session, table: str) -> bool:
+    return bool(db.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:t)"),
+        {"t": table},
+    ).scalar())
+
+
+def list_partitions(db: Session, table: str) -> List[str]:
+    rows = db.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:t)
+        ORDER BY c.relname
+    """), {"t": table}).all()
+    return [r[0] for r in rows]
+
+
+def default_partition(table: str) -> str:
+    return f"{table}_default"
+
+
+def default_partition_months(db: Session, table: str) -> List[datetime]:
+    """Months that have rows in the table's default partition (should be none)."""
+    if default_partition(table) not in list_partitions(db, table):
+        return []
+    rows = db.execute(text(
+        f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') FROM {default_partition(table)}"
+    )).all()
+    return sorted(r[0].replace(tzinfo=timezone.utc) for r in rows)
+
+
+def create_month_partition(db: Session, table: str, month: datetime) -> str:
+    """Create the partition for one month if missing (table names come from AI_PARTITIONED_TABLES).
+
+    Rows of that month already in the default partition are moved into it: the
+    partition is built detached, filled from the default, then attached.
+    """
+    name = partition_name(table, month)
+    bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    if month not in default_partition_months(db, table):
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES {bounds}"))
+        return name
+
+    db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    moved = db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {default_partition(table)}
+            WHERE created_at >= '{month.isoformat()}' AND created_at < '{add_months(month, 1).isoformat()}'
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """)).rowcount
+    db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    logger.warning(f"[Partitions] Moved {moved} rows from {default_partition(table)} into {name}")
+    return name
+
+
+def ensure_partitions(db: Session, months_ahead: int = 3, now: Optional[datetime] = None) -> List[str]:
+    """Make sure partitions exist from the current month through months_ahead, and for
+    every month with rows in the default partition. Returns names created."""
+    current = month_start(now or datetime.now(timezone.utc))
+    created = []
+    for table in AI_PARTITIONED_TABLES:
+        if not is_partitioned(db, table):
+            continue
+        existing = set(list_partitions(db, table))
+        months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+        months.update(default_partition_months(db, table))
+        for month in sorted(months):
+            if partition_name(table, month) not in existing:
+                created.append(create_month_partition(db, table, month))
+    db.commit()
+    if created:
+        logger.info(f"[Partitions] Created {len(created)} AI request partitions: {', '.join(created)}")
+    return created
+
+
+def _archive_partition(db: Session, name: str, archive_dir: Path) -> Path:
+    """Stream a partition to <archive_dir>/<name>.ndjson.gz with COPY (constant memory)."""
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f"{name}.ndjson.gz"
+    raw = db.connection().connection  # DBAPI connection (psycopg2)
+    with gzip.open(path, "wb") as out:
+        with raw.cursor() as cur:
+            cur.copy_expert(f"COPY (SELECT row_to_json(t) FROM {name} t) TO STDOUT", out)
+    return path
+
+
+def apply_retention(
+    db: Session,
+    keep_months: int,
+    archive_dir: Optional[str] = None,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+) -> List[dict]:
+    """Detach, optionally archive, and drop partitions older than keep_months.
+
+    The current month counts as one of the kept months.
+    """
+    if keep_months < 1:
+        raise ValueError("keep_months must be >= 1")
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -(keep_months - 1))
+    results = []
+
+    for table in AI_PARTITIONED_TABLES:
+        if not is_partitioned(db, table):
+            continue
+        for name in list_partitions(db, table):
+            month = partition_month(name)
+            if month is None or month >= cutoff:
+                continue
+            result = {"table": table, "partition": name, "month": month.strftime("%Y-%m"), "archive": None}
+            if not dry_run:
+                db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                if archive_dir:
+                    result["archive"] = str(_archive_partition(db, name, Path(archive_dir)))
+                db.execute(text(f"DROP TABLE {name}"))
+                db.commit()
+                logger.info(f"[Partitions] Dropped {name} (archive={result['archive']})")
+            results.append(result)
+
+    return results
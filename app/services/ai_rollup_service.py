@@ -0,0 +1,220 @@
+"""Hourly rollups for AI request stats (LLM, STT, TTS).
+
+The gateways call record_ai_request() next to their own LLMRequest/STTRequest/
+TTSRequest writes, so admin stats read a small rollup table instead of
+aggregating the raw request tables on every page load.
+
+Latency percentiles use a log-bucketed sketch: each latency falls into bin
+ceil(log(ms) / log(SKETCH_GAMMA)). Bins from different hours/models simply add
+up, and any quantile is estimated within ~2.5% relative error.
+
+For LLM rows, tokens_in_sum / cached_tokens_sum give the provider prompt-cache
+hit rate (cached input tokens / input tokens).
+
+learning_phase comes from the request (X-Learning-Phase) and is not stored on
+the raw request rows, so rows backfilled from them (migration 015) carry
+BACKFILL_LEARNING_PHASE rather than a phase.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+import logging
+import math
+
+from sqlalchemy import Integer, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import AIRequestRollup
+
+logger = logging.getLogger(__name__)
+
+SKETCH_GAMMA = 1.05
+_LOG_GAMMA = math.log(SKETCH_GAMMA)
+
+ROLLUP_KINDS = ("llm", "stt", "tts")
+ROLLUP_DIMENSIONS = ("model", "agent_id", "learning_phase")
+BACKFILL_LEARNING_PHASE = "unknown"
+DEFAULT_WINDOW_DAYS = 30
+ALL_TIME = datetime(2000, 1, 1, tzinfo=timezone.utc)  # start for all-time totals
+
+
+def sketch_bin(latency_ms: int) -> int:
+    """Sketch bin for a latency value (latencies below 1ms share bin 0)."""
+    return int(math.ceil(math.log(max(latency_ms, 1)) / _LOG_GAMMA))
+
+
+def merge_sketches(sketches: Iterable[Optional[Dict[str, int]]]) -> Dict[int, int]:
+    """Add up sketches bin by bin."""
+    merged: Dict[int, int] = {}
+    for sketch in sketches:
+        for key, count in (sketch or {}).items():
+            merged[int(key)] = merged.get(int(key), 0) + int(count)
+    return merged
+
+
+def sketch_quantile(sketch: Dict[int, int], q: float) -> Optional[float]:
+    """Estimate the q-quantile (0..1) in ms from a merged sketch."""
+    total = sum(sketch.values())
+    if total == 0:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for key in sorted(sketch):
+        seen += sketch[key]
+        if seen > rank:
+            # Midpoint of (gamma^(k-1), gamma^k] keeps relative error symmetric
+            return round(2 * SKETCH_GAMMA ** key / (SKETCH_GAMMA + 1), 1)
+    return None
+
+
+def _bucket_start(ts: Optional[datetime] = None) -> datetime:
+    ts = ts or datetime.now(timezone.utc)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def default_start() -> datetime:
+    """Lower bound for stats queries that don't give one."""
+    return _bucket_start() - timedelta(days=DEFAULT_WINDOW_DAYS)
+
+
+def record_ai_request(
+    db: Session,
+    kind: str,
+    model: str,
+    success: bool,
+    latency_ms: Optional[int],
+    estimated_cost: Optional[float] = None,
+    agent_id: Optional[str] = None,
+    learning_phase: Optional[str] = None,
+    tokens_in: Optional[int] = None,
+    cached_tokens: Optional[int] = None,
+) -> None:
+    """Fold one AI request into its hourly rollup row (single UPSERT).
+
+    Runs in a SAVEPOINT so a rollup failure never breaks the caller's
+    transaction; the caller commits as usual.
+    """
+    values = dict(
+        bucket_start=_bucket_start(),
+        kind=kind,
+        model=model,
+        agent_id=agent_id or "",
+        learning_phase=str(learning_phase) if learning_phase else "",
+    )
+
+    if success and latency_ms is not None:
+        bin_key = str(sketch_bin(latency_ms))
+        stmt = insert(AIRequestRollup).values(
+            **values,
+            calls=1,
+            errors=0,
+            latency_sum_ms=latency_ms,
+            latency_min_ms=latency_ms,
+            latency_max_ms=latency_ms,
+            cost_sum=estimated_cost or 0,
+            tokens_in_sum=tokens_in or 0,
+            cached_tokens_sum=cached_tokens or 0,
+            latency_sketch={bin_key: 1},
+        )
+        existing_count = func.coalesce(AIRequestRollup.latency_sketch[bin_key].astext.cast(Integer), 0)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket_start", "kind", "model", "agent_id", "learning_phase"],
+            set_={
+                "calls": AIRequestRollup.calls + 1,
+                "latency_sum_ms": AIRequestRollup.latency_sum_ms + latency_ms,
+                "latency_min_ms": func.least(AIRequestRollup.latency_min_ms, latency_ms),
+                "latency_max_ms": func.greatest(AIRequestRollup.latency_max_ms, latency_ms),
+                "cost_sum": AIRequestRollup.cost_sum + (estimated_cost or 0),
+                "tokens_in_sum": AIRequestRollup.tokens_in_sum + (tokens_in or 0),
+                "cached_tokens_sum": AIRequestRollup.cached_tokens_sum + (cached_tokens or 0),
+                "latency_sketch": AIRequestRollup.latency_sketch.op("||")(
+                    func.jsonb_build_object(bin_key, existing_count + 1)
+                ),
+                "updated_at": func.now(),
+            },
+        )
+    else:
+        stmt = insert(AIRequestRollup).values(**values, calls=0, errors=1).on_conflict_do_update(
+            index_elements=["bucket_start", "kind", "model", "agent_id", "learning_phase"],
+            set_={"errors": AIRequestRollup.errors + 1, "updated_at": func.now()},
+        )
+
+    try:
+        with db.begin_nested():
+            db.execute(stmt)
+    except Exception as e:
+        logger.warning(f"[Rollup] Failed to record {kind} rollup for {model}: {e}")
+
+
+def get_rollup_stats(
+    db: Session,
+    kind: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    group_by: str = "model",
+    interval: Optional[str] = None,
+) -> List[dict]:
+    """Aggregate rollup rows for one kind.
+
+    group_by: one of ROLLUP_DIMENSIONS.
+    interval: None for one row per group, or "hour"/"day" for a time series.
+    start defaults to default_start() (the last DEFAULT_WINDOW_DAYS), so cost
+    is bounded by the number of rollup rows in that range, not table growth.
+    """
+    if group_by not in ROLLUP_DIMENSIONS:
+        raise ValueError(f"group_by must be one of {ROLLUP_DIMENSIONS}")
+    if interval not in (None, "hour", "day"):
+        raise ValueError("interval must be 'hour' or 'day'")
+
+    query = db.query(AIRequestRollup).filter(AIRequestRollup.kind == kind)
+    query = query.filter(AIRequestRollup.bucket_start >= _bucket_start(start or default_start()))
+    if end is not None:
+        query = query.filter(AIRequestRollup.bucket_start < end)
+
+    groups: Dict[tuple, dict] = {}
+    for row in query.all():
+        period = None
+        if interval == "hour":
+            period = row.bucket_start
+        elif interval == "day":
+            period = row.bucket_start.replace(hour=0)
+        key = (period, getattr(row, group_by))
+        agg = groups.setdefault(key, {
+            "calls": 0, "errors": 0, "latency_sum_ms": 0,
+            "min_ms": None, "max_ms": None, "total_cost": 0.0, "sketches": [],
+            "tokens_in": 0, "cached_tokens": 0,
+        })
+        agg["calls"] += row.calls
+        agg["errors"] += row.errors
+        agg["latency_sum_ms"] += row.latency_sum_ms or 0
+        agg["total_cost"] += row.cost_sum or 0
+        agg["tokens_in"] += row.tokens_in_sum or 0
+        agg["cached_tokens"] += row.cached_tokens_sum or 0
+        if row.latency_min_ms is not None:
+            agg["min_ms"] = row.latency_min_ms if agg["min_ms"] is None else min(agg["min_ms"], row.latency_min_ms)
+        if row.latency_max_ms is not None:
+            agg["max_ms"] = row.latency_max_ms if agg["max_ms"] is None else max(agg["max_ms"], row.latency_max_ms)
+        agg["sketches"].append(row.latency_sketch)
+
+    result = []
+    for (period, group_value), agg in sorted(groups.items(), key=lambda kv: (kv[0][0] or datetime.min.replace(tzinfo=timezone.utc), kv[0][1])):
+        sketch = merge_sketches(agg["sketches"])
+        item = {
+            group_by: group_value,
+            "calls": agg["calls"],
+            "errors": agg["errors"],
+            "avg_ms": round(agg["latency_sum_ms"] / agg["calls"]) if agg["calls"] else None,
+            "min_ms": agg["min_ms"],
+            "max_ms": agg["max_ms"],
+            "p50_ms": sketch_quantile(sketch, 0.50),
+            "p95_ms": sketch_quantile(sketch, 0.95),
+            "p99_ms": sketch_quantile(sketch, 0.99),
+            "total_cost": float(agg["total_cost"]),
+            "tokens_in": agg["tokens_in"],
+            "cached_tokens": agg["cached_tokens"],
+            "cache_hit_rate": round(agg["cached_tokens"] / agg["tokens_in"], 4) if agg["tokens_in"] else None,
+        }
+        if interval:
+            item["period_start"] = period.isoformat()
+        result.append(item)
+    return result
@@ -0,0 +1,189 @@
+"""Local audio directory (/tmp/audio) as a size-bounded LRU cache.
+
+The directory is scanned once at startup; after that an in-memory index
+(file name → size, last use) is the only thing consulted, so nothing on the
+request path globs or stats the directory:
+
+    register(path)     after writing a file (TTS output, encoded clips); evicts
+                       least recently used files while over audio_cache_max_bytes,
+                       sparing files used within audio_cache_min_age_seconds (a
+                       clip whose URL was just returned has not been fetched yet)
+    touch(name)        on every /audio hit (AudioFiles below), marks it recently used
+    run_janitor()      lifespan task: every audio_cache_janitor_interval_seconds
+                       drops files unused for audio_cache_max_age_hours and
+                       re-applies the byte budget
+
+Files written without register() are picked up at the next startup scan.
+Sizes and eviction counts are exported via audio_cache_stats().
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from starlette.staticfiles import StaticFiles
+
+from app.config import settings
+from app.core import metrics
+from app.utils.audio import AUDIO_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class AudioCache:
+    def __init__(self, directory: Path, max_bytes: int, min_age_seconds: float = 0.0):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.min_age_seconds = min_age_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()  # name -> (bytes, last used), LRU first
+        self._bytes = 0
+
+    def load(self) -> int:
+        """Index the files already on disk (oldest first); returns how many.
+
+        Files register()ed while the scan runs keep their entries."""
+        found = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file():
+                    stat = entry.stat()
+                    found.append((max(stat.st_atime, stat.st_mtime), entry.name, stat.st_size))
+        with self._lock:
+            entries = OrderedDict(
+                (name, (size, used)) for used, name, size in sorted(found) if name not in self._entries
+            )
+            entries.update(self._entries)
+            self._entries = entries
+            self._bytes = sum(size for size, _ in entries.values())
+        self.evict()
+        return len(found)
+
+    def register(self, path: str, size: Optional[int] = None) -> None:
+        path = Path(path)
+        if path.parent != self.directory:
+            return
+        if size is None:
+            size = path.stat().st_size
+        with self._lock:
+            previous = self._entries.pop(path.name, None)
+            if previous:
+                self._bytes -= previous[0]
+            self._entries[path.name] = (size, time.time())
+            self._bytes += size
+        self.evict()
+
+    def touch(self, name: str) -> None:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry:
+                self._entries[name] = (entry[0], time.time())
+                self._entries.move_to_end(name)
+
+    def _remove(self, name: str, reason: str) -> None:
+        try:
+            (self.directory / name).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"[AudioCache] Could not delete {name}: {e}")
+        metrics.increment("audio_cache_evictions", reason=reason)
+
+    def evict(self) -> int:
+        """Delete least recently used files until the cache fits its byte budget.
+
+        Files used within min_age_seconds are kept even if the cache stays over
+        budget; the next register() or janitor sweep retries."""
+        victims = []
+        cutoff = time.time() - self.min_age_seconds
+        with self._lock:
+            while self._bytes > self.max_bytes and self._entries:
+                name, (size, used) = next(iter(self._entries.items()))
+                if used > cutoff:
+                    break  # LRU order: everything after this was used more recently
+                del self._entries[name]
+                self._bytes -= size
+                victims.append(name)
+        for name in victims:
+            self._remove(name, "size")
+        return len(victims)
+
+    def expire(self, max_age_seconds: float) -> int:
+        """Delete files unused for longer than max_age_seconds."""
+        cutoff = time.time() - max_age_seconds
+        victims = []
+        with self._lock:
+            for name, (size, used) in self._entries.items():
+                if used >= cutoff:
+                    break  # LRU order: everything after this was used more recently
+                victims.append(name)
+            for name in victims:
+                self._bytes -= self._entries.pop(name)[0]
+        for name in victims:
+            self._remove(name, "age")
+        return len(victims)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "audio_cache_bytes": self._bytes,
+                "audio_cache_files": len(self._entries),
+                "audio_cache_max_bytes": self.max_bytes,
+            }
+
+
+_cache: Optional[AudioCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> AudioCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AudioCache(AUDIO_DIR, settings.audio_cache_max_bytes, settings.audio_cache_min_age_seconds)
+        return _cache
+
+
+def register(path: str, size: Optional[int] = None) -> None:
+    get_cache().register(path, size)
+
+
+def audio_cache_stats() -> Dict[str, float]:
+    """Metrics collector."""
+    return get_cache().stats()
+
+
+def sweep() -> int:
+    cache = get_cache()
+    return cache.expire(settings.audio_cache_max_age_hours * 3600) + cache.evict()
+
+
+async def run_janitor() -> None:
+    """Lifespan task: index the directory, then sweep it periodically until cancelled."""
+    cache = get_cache()
+    indexed = await asyncio.to_thread(cache.load)
+    logger.info(f"[AudioCache] Indexed {indexed} files in {cache.directory}")
+    while True:
+        await asyncio.sleep(settings.audio_cache_janitor_interval_seconds)
+        try:
+            removed = await asyncio.to_thread(sweep)
+            if removed:
+                logger.info(f"[AudioCache] Janitor removed {removed} files")
+        except Exception as e:
+            logger.warning(f"[AudioCache] Janitor sweep failed: {e}")
+
+
+class AudioFiles(StaticFiles):
+    """/audio mount: Starlette's ETag, Last-Modified, 304 and Range handling, plus
+    Cache-Control (file names are unique per clip, so content never changes) and
+    LRU bookkeeping."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Cache-Control"] = f"public, max-age={settings.audio_cache_control_max_age}, immutable"
+        get_cache().touch(os.path.basename(full_path))
+        return response
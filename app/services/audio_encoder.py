@@ -0,0 +1,300 @@
+"""PCM16 → MP3/Opus encoding without per-clip process startup.
+
+    async for frames in encode_stream(pcm_chunks, "mp3"):    # streams as PCM arrives
+        ...
+    mp3 = await encode_pcm(pcm_bytes, "mp3")                 # whole clip
+    pcm16_to_mp3(pcm_bytes, "/tmp/audio/x.mp3")              # sync, writes a file
+
+Backends:
+    lameenc     in-process MP3 encoder, used for "mp3" when the package is
+                installed (optional dependency)
+    ffmpeg      otherwise, and always for "opus". A few ffmpeg processes per
+                (format, sample rate) are kept started and blocked on stdin
+                (audio_encoder_warm_processes), so a clip never waits for
+                fork/exec + ffmpeg startup; a used process is replaced by one
+                background refill thread per key. The pool is filled on first
+                use, or at startup with audio_encoder_prewarm (off by default).
+
+Streams hold an "audio_encoder" slot (audio_encoder_max_concurrency, bounded
+queue, app/core/provider_limits.py). Each ffmpeg stream has a reader thread
+draining stdout, so encoded frames are yielded as soon as ffmpeg emits them and
+the pipes never deadlock. Process spawns, pipe writes, waits and encoder
+flushes run in worker threads, never on the event loop.
+"""
+from collections import deque
+from queue import Empty, SimpleQueue
+from typing import AsyncIterable, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import shutil
+import subprocess
+import threading
+import time
+
+from app.config import settings
+from app.core import metrics
+from app.core.provider_limits import ProviderLimiter
+
+try:
+    import lameenc
+except ImportError:  # optional: falls back to ffmpeg
+    lameenc = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("mp3", "opus")
+DEFAULT_SAMPLE_RATE = 24000  # Realtime API output
+READ_CHUNK_BYTES = 4096
+ENCODE_TIMEOUT_SECONDS = 10
+
+
+def encoder_command(fmt: str, sample_rate: int) -> List[str]:
+    """ffmpeg command reading mono PCM16 on stdin and writing the encoded stream to stdout."""
+    codec = (
+        ["-codec:a", "libmp3lame", "-b:a", f"{settings.audio_encoder_mp3_kbps}k", "-f", "mp3"]
+        if fmt == "mp3" else
+        ["-c:a", "libopus", "-b:a", f"{settings.audio_encoder_opus_kbps}k", "-application", "voip", "-f", "ogg"]
+    )
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+        *codec, "-flush_packets", "1", "pipe:1",
+    ]
+
+
+class _WarmPool:
+    """Started-but-idle encoder processes, keyed by (format, sample rate)."""
+
+    def __init__(self):
+        self._idle: Dict[Tuple[str, int], Deque[subprocess.Popen]] = {}
+        self._filling: Set[Tuple[str, int]] = set()  # keys with a refill thread running
+        self._lock = threading.Lock()
+
+    def _spawn(self, key: Tuple[str, int]) -> subprocess.Popen:
+        metrics.increment("audio_encoder_spawned", format=key[0])
+        return subprocess.Popen(
+            encoder_command(*key), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+
+    def _pop_idle(self, key: Tuple[str, int]) -> Optional[subprocess.Popen]:
+        proc = None
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            while idle and proc is None:
+                candidate = idle.popleft()
+                if candidate.poll() is None:
+                    proc = candidate
+        metrics.increment("audio_encoder_take", format=key[0], warm=proc is not None)
+        self._refill(key)
+        return proc
+
+    def _refill(self, key: Tuple[str, int]) -> None:
+        with self._lock:
+            if key in self._filling or len(self._idle.get(key, ())) >= settings.audio_encoder_warm_processes:
+                return
+            self._filling.add(key)
+
+        def run() -> None:
+            try:
+                self.fill(*key)
+            finally:
+                with self._lock:
+                    self._filling.discard(key)
+
+        threading.Thread(target=run, name=f"encoder-refill-{key[0]}", daemon=True).start()
+
+    async def take(self, fmt: str, sample_rate: int) -> subprocess.Popen:
+        key = (fmt, sample_rate)
+        return self._pop_idle(key) or await asyncio.to_thread(self._spawn, key)
+
+    def take_sync(self, fmt: str, sample_rate: int) -> subprocess.Popen:
+        key = (fmt, sample_rate)
+        return self._pop_idle(key) or self._spawn(key)
+
+    def fill(self, fmt: str, sample_rate: int = DEFAULT_SAMPLE_RATE) -> None:
+        key = (fmt, sample_rate)
+        while True:
+            with self._lock:
+                idle = self._idle.setdefault(key, deque())
+                if len(idle) >= settings.audio_encoder_warm_processes:
+                    return
+            try:
+                proc = self._spawn(key)
+            except OSError as e:
+                logger.warning(f"[Encoder] Could not start ffmpeg: {e}")
+                return
+            with self._lock:
+                self._idle[key].append(proc)
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+    def close(self) -> None:
+        with self._lock:
+            procs = [p for idle in self._idle.values() for p in idle]
+            self._idle.clear()
+        for proc in procs:
+            proc.kill()
+            proc.wait()
+
+
+_warm = _WarmPool()
+_limiter: Optional[ProviderLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def _get_limiter() -> ProviderLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = ProviderLimiter(
+                "audio_encoder",
+                max_concurrency=settings.audio_encoder_max_concurrency,
+                max_queue=settings.audio_encoder_max_queue,
+                queue_timeout=settings.audio_encoder_queue_timeout_seconds,
+            )
+        return _limiter
+
+
+class _FfmpegEncoder:
+    def __init__(self, proc: subprocess.Popen):
+        self.proc = proc
+        self._out: SimpleQueue = SimpleQueue()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self) -> None:
+        stdout = self.proc.stdout
+        while True:
+            chunk = stdout.read1(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            self._out.put(chunk)
+
+    def _drain(self) -> List[bytes]:
+        chunks = []
+        while True:
+            try:
+                chunks.append(self._out.get_nowait())
+            except Empty:
+                return chunks
+
+    def _write(self, pcm: bytes) -> None:
+        self.proc.stdin.write(pcm)
+        self.proc.stdin.flush()
+
+    async def feed(self, pcm: bytes) -> List[bytes]:
+        await asyncio.to_thread(self._write, pcm)
+        return self._drain()
+
+    def _finish(self) -> List[bytes]:
+        self.proc.stdin.close()
+        self._reader.join(ENCODE_TIMEOUT_SECONDS)
+        if self.proc.wait(ENCODE_TIMEOUT_SECONDS) != 0:
+            raise RuntimeError(f"ffmpeg exited with {self.proc.returncode}")
+        return self._drain()
+
+    async def finish(self) -> List[bytes]:
+        return await asyncio.to_thread(self._finish)
+
+    def abort(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class _LameEncoder:
+    def __init__(self, sample_rate: int):
+        self.encoder = lameenc.Encoder()
+        self.encoder.set_bit_rate(settings.audio_encoder_mp3_kbps)
+        self.encoder.set_in_sample_rate(sample_rate)
+        self.encoder.set_channels(1)
+        self.encoder.set_quality(7)
+
+    async def feed(self, pcm: bytes) -> List[bytes]:
+        data = await asyncio.to_thread(self.encoder.encode, pcm)
+        return [bytes(data)] if data else []
+
+    async def finish(self) -> List[bytes]:
+        data = await asyncio.to_thread(self.encoder.flush)
+        return [bytes(data)] if data else []
+
+    def abort(self) -> None:
+        pass
+
+
+async def _open_encoder(fmt: str, sample_rate: int):
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    if fmt == "mp3" and lameenc is not None:
+        return _LameEncoder(sample_rate)
+    return _FfmpegEncoder(await _warm.take(fmt, sample_rate))
+
+
+async def encode_stream(
+    pcm_chunks: AsyncIterable[bytes],
+    fmt: str = "mp3",
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+) -> AsyncIterator[bytes]:
+    """Encode mono PCM16 chunks, yielding encoded bytes as soon as they are available."""
+    start = time.perf_counter()
+    async with _get_limiter().slot():
+        encoder = await _open_encoder(fmt, sample_rate)
+        try:
+            async for pcm in pcm_chunks:
+                for chunk in await encoder.feed(pcm):
+                    yield chunk
+            for chunk in await encoder.finish():
+                yield chunk
+        finally:
+            encoder.abort()
+    metrics.observe("audio_encoder_encode_ms", (time.perf_counter() - start) * 1000, format=fmt)
+
+
+async def encode_pcm(pcm: bytes, fmt: str = "mp3", sample_rate: int = DEFAULT_SAMPLE_RATE) -> bytes:
+    async def single():
+        yield pcm
+
+    return b"".join([chunk async for chunk in encode_stream(single(), fmt, sample_rate)])
+
+
+def encode_pcm_sync(pcm: bytes, fmt: str = "mp3", sample_rate: int = DEFAULT_SAMPLE_RATE) -> bytes:
+    """Blocking variant for sync callers (uses a warm process, no concurrency slot)."""
+    if fmt == "mp3" and lameenc is not None:
+        encoder = _LameEncoder(sample_rate).encoder
+        return bytes(encoder.encode(pcm)) + bytes(encoder.flush())
+    proc = _warm.take_sync(fmt, sample_rate)
+    try:
+        out, _ = proc.communicate(pcm, timeout=ENCODE_TIMEOUT_SECONDS)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        raise
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {proc.returncode}")
+    return out
+
+
+def warm_encoders() -> int:
+    """Start the idle ffmpeg processes (startup, with audio_encoder_prewarm). Returns how many are waiting."""
+    if not settings.audio_encoder_prewarm or shutil.which(encoder_command("mp3", DEFAULT_SAMPLE_RATE)[0]) is None:
+        return 0
+    for fmt in FORMATS:
+        if fmt == "mp3" and lameenc is not None:
+            continue
+        _warm.fill(fmt, DEFAULT_SAMPLE_RATE)
+    return _warm.idle_count()
+
+
+def encoder_stats() -> Dict[str, float]:
+    """Metrics collector."""
+    stats = {"audio_encoder_warm_idle": _warm.idle_count()}
+    if _limiter is not None:
+        stats["audio_encoder_in_flight"] = _limiter.in_flight
+        stats["audio_encoder_queue_depth"] = _limiter.queue_depth
+    return stats
+
+
+def shutdown_encoders() -> None:
+    _warm.close()
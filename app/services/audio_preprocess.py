@@ -0,0 +1,206 @@
+"""Optional audio preprocessing before STT (stt_preprocess_enabled, off by default).
+
+Browser recordings arrive as 48 kHz (often stereo) webm/mp4 with silence at
+both ends. Before transcription they can be:
+
+    decoded to 16 kHz mono PCM       ffmpeg
+    trimmed of leading/trailing      energy VAD over 20 ms frames, keeping
+    silence                          stt_vad_padding_ms around the speech
+    re-encoded as Opus in Ogg        ~24 kbps VoIP profile
+
+Work runs in a bounded process pool (stt_preprocess_workers processes, at most
+stt_preprocess_max_queue uploads waiting), so decoding never blocks the event
+loop or competes with it for the GIL. Any failure -- no ffmpeg, unknown codec,
+a full queue, a result that isn't smaller -- returns the original upload
+unchanged: preprocessing can only make STT cheaper, never break it. So does
+an upload in which the VAD finds no speech; only one whose loudest frame is
+below stt_silence_rms (digital silence, a muted mic) comes back empty, and
+STT is skipped for it.
+
+scripts/stt_preprocess_benchmark.py measures bytes uploaded and STT latency,
+with and without preprocessing, on a directory of recordings.
+"""
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+import asyncio
+import logging
+import math
+import subprocess
+import sys
+import threading
+import time
+
+from app.config import settings
+from app.core import metrics
+from app.core.provider_limits import ProviderBusyError, ProviderLimiter
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+OUTPUT_FILENAME = "audio.ogg"
+FFMPEG_TIMEOUT_SECONDS = 10
+
+
+@dataclass
+class PreprocessResult:
+    audio_bytes: bytes
+    filename: str
+    original_bytes: int
+    speech_seconds: Optional[float] = None  # None if not preprocessed; 0.0 if the upload is silent
+    trimmed_seconds: float = 0.0
+    preprocess_ms: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return self.speech_seconds is not None
+
+
+def _samples(pcm: bytes) -> array:
+    samples = array("h")
+    samples.frombytes(pcm[:len(pcm) - len(pcm) % 2])
+    if sys.byteorder != "little":
+        samples.byteswap()
+    return samples
+
+
+def _frame_energies(samples: array, frame: int) -> list:
+    energies = []
+    for start in range(0, len(samples), frame):
+        chunk = samples[start:start + frame:2]  # every other sample is plenty for an energy estimate
+        energies.append(math.sqrt(sum(s * s for s in chunk) / len(chunk)) if chunk else 0.0)
+    return energies
+
+
+def peak_rms(pcm: bytes, sample_rate: int = SAMPLE_RATE) -> float:
+    """RMS of the loudest 20 ms frame."""
+    return max(_frame_energies(_samples(pcm), sample_rate * FRAME_MS // 1000), default=0.0)
+
+
+def trim_silence(pcm: bytes, sample_rate: int = SAMPLE_RATE, padding_ms: Optional[int] = None) -> bytes:
+    """Drop leading/trailing 20 ms frames whose RMS is below the speech threshold.
+
+    The threshold is relative to the loudest frame (stt_vad_threshold_db below
+    it) with an absolute floor, so quiet recordings aren't trimmed to nothing;
+    one with no frame above the floor comes back empty.
+    """
+    padding_ms = settings.stt_vad_padding_ms if padding_ms is None else padding_ms
+    samples = _samples(pcm)
+    frame = sample_rate * FRAME_MS // 1000
+    energies = _frame_energies(samples, frame)
+    if not energies:
+        return b""
+
+    threshold = max(max(energies) * 10 ** (-settings.stt_vad_threshold_db / 20), settings.stt_vad_floor_rms)
+    voiced = [i for i, energy in enumerate(energies) if energy >= threshold]
+    if not voiced:
+        return b""
+    pad = padding_ms // FRAME_MS
+    first = max(voiced[0] - pad, 0) * frame
+    last = min(voiced[-1] + 1 + pad, len(energies)) * frame
+    trimmed = samples[first:last]
+    if sys.byteorder != "little":
+        trimmed.byteswap()
+    return trimmed.tobytes()
+
+
+def _ffmpeg(args: list, data: bytes) -> bytes:
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", *args],
+        input=data, capture_output=True, timeout=FFMPEG_TIMEOUT_SECONDS,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace')[:200]}")
+    return result.stdout
+
+
+def _preprocess_in_worker(audio_bytes: bytes) -> tuple:
+    """Runs in a pool process: (encoded bytes, speech seconds, decoded seconds).
+
+    Encoded bytes are b"" for a silent upload and None when the VAD found no
+    speech in one that isn't silent (the original should be transcribed)."""
+    pcm = _ffmpeg(["-i", "pipe:0", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1"], audio_bytes)
+    speech = trim_silence(pcm)
+    decoded_seconds = len(pcm) / 2 / SAMPLE_RATE
+    speech_seconds = len(speech) / 2 / SAMPLE_RATE
+    if not speech:
+        if peak_rms(pcm) < settings.stt_silence_rms:
+            return b"", 0.0, decoded_seconds
+        return None, 0.0, decoded_seconds
+    encoded = _ffmpeg([
+        "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+        "-c:a", "libopus", "-b:a", f"{settings.stt_preprocess_bitrate_kbps}k", "-application", "voip",
+        "-f", "ogg", "pipe:1",
+    ], speech)
+    return encoded, speech_seconds, decoded_seconds
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_limiter: Optional[ProviderLimiter] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool, _limiter
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.stt_preprocess_workers)
+            # Bounds in-flight jobs to the pool size and the backlog to max_queue
+            _limiter = ProviderLimiter(
+                "stt_preprocess",
+                max_concurrency=settings.stt_preprocess_workers,
+                max_queue=settings.stt_preprocess_max_queue,
+                queue_timeout=settings.stt_preprocess_queue_timeout_seconds,
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool, _limiter
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _limiter = None, None
+
+
+async def preprocess_for_stt(audio_bytes: bytes, filename: str) -> PreprocessResult:
+    """Downmix, resample, trim and re-encode an upload; the original on any failure."""
+    original = PreprocessResult(audio_bytes=audio_bytes, filename=filename, original_bytes=len(audio_bytes))
+    if not settings.stt_preprocess_enabled or not audio_bytes:
+        return original
+
+    start = time.perf_counter()
+    try:
+        pool = _get_pool()
+        async with _limiter.slot():
+            encoded, speech_seconds, decoded_seconds = await asyncio.get_running_loop().run_in_executor(
+                pool, _preprocess_in_worker, audio_bytes,
+            )
+    except ProviderBusyError:
+        metrics.increment("stt_preprocess", result="busy")
+        return original
+    except Exception as e:
+        logger.warning(f"[Preprocess] Falling back to the original upload ({filename}): {e}")
+        metrics.increment("stt_preprocess", result="error")
+        return original
+
+    elapsed_ms = int((time.perf_counter() - start) * 1000)
+    metrics.observe("stt_preprocess_ms", elapsed_ms)
+    if encoded is None:
+        metrics.increment("stt_preprocess", result="no_speech")
+        return original
+    if speech_seconds and len(encoded) >= len(audio_bytes):
+        metrics.increment("stt_preprocess", result="not_smaller")
+        return original
+    metrics.increment("stt_preprocess", result="ok" if speech_seconds else "silent")
+    metrics.increment("stt_preprocess_bytes_saved", len(audio_bytes) - len(encoded))
+    return PreprocessResult(
+        audio_bytes=encoded,
+        filename=OUTPUT_FILENAME,
+        original_bytes=len(audio_bytes),
+        speech_seconds=round(speech_seconds, 3),
+        trimmed_seconds=round(decoded_seconds - speech_seconds, 3),
+        preprocess_ms=elapsed_ms,
+    )
@@ -0,0 +1,193 @@
+"""Context-window compaction for long conversations.
+
+The model context for a turn is, in this order (stable prefix first, so
+provider-side prompt caching can reuse it across turns):
+
+    system prompt                          identical for every user of a situation
+    [system: running summary]              changes only when the summary is refreshed
+    turns not yet covered by the summary   (older than the last K turns)
+    last K turns verbatim                  (context_keep_turns; one turn = user + assistant)
+    new user message
+    [trailing volatile messages]           per-turn guidance, added by the caller
+
+The summary lives on Conversation.history_summary as
+{"session_no", "through_seq", "text"}. It is refreshed in a background task
+after the response (refresh_summary, awaited on the app loop), never inside the
+turn: until it catches up, turns it does not cover yet are sent verbatim, so
+nothing is lost.
+
+trim_messages() is the summary-less variant for plain message lists (client
+supplied history; generate_conversation with trim_history=True): system
+messages + the last K turns.
+
+Token counts are estimated (~4 characters per token plus per-message overhead)
+and stored on LLMRequest as context_tokens_before / context_tokens_after.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+import logging
+import uuid
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_AGENT_ID = "history_summarizer"
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+_refreshing = set()  # conversation ids with a refresh running (all on the app loop)
+
+
+def estimate_tokens(messages: List[dict]) -> int:
+    return sum(len(str(m.get("content", ""))) // 4 + _MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def _plain(turns: List[dict]) -> List[dict]:
+    return [{"role": t["role"], "content": t["content"]} for t in turns]
+
+
+@dataclass
+class CompactedContext:
+    messages: List[dict]
+    tokens_before: int
+    tokens_after: int
+    # Older-than-K turns the summary doesn't cover yet (sent verbatim this turn)
+    pending_turns: List[dict] = field(default_factory=list)
+
+    @property
+    def needs_summary_refresh(self) -> bool:
+        return len(self.pending_turns) >= settings.context_summary_batch_messages
+
+
+def compact_context(
+    system_prompt: str,
+    turns: List[dict],
+    new_message: dict,
+    summary: Optional[dict],
+    session_no: int,
+    keep_turns: Optional[int] = None,
+) -> CompactedContext:
+    """Assemble the compacted context from server-held turns ({"seq", "role", "content"})."""
+    keep_messages = 2 * (settings.context_keep_turns if keep_turns is None else keep_turns)
+    split = max(len(turns) - keep_messages, 0)
+    older, recent = turns[:split], turns[split:]
+
+    through_seq = 0
+    if summary and summary.get("session_no") == session_no and summary.get("text"):
+        through_seq = summary["through_seq"]
+    pending = [t for t in older if t["seq"] > through_seq]
+
+    prefix = [{"role": "system", "content": system_prompt}]
+    # The summary may end before the first turn cap_history kept (or older may be
+    # empty); it still stands in for everything up to through_seq
+    if through_seq:
+        prefix.append({"role": "system", "content": f"[Summary of the earlier conversation: {summary['text']}]"})
+
+    full = [{"role": "system", "content": system_prompt}] + _plain(turns) + [new_message]
+    compacted = prefix + _plain(pending + recent) + [new_message]
+    return CompactedContext(
+        messages=compacted,
+        tokens_before=estimate_tokens(full),
+        tokens_after=estimate_tokens(compacted),
+        pending_turns=pending,
+    )
+
+
+def trim_messages(messages: List[dict], keep_turns: Optional[int] = None) -> CompactedContext:
+    """Keep the leading system messages plus the last K turns (and the final message) of a plain message list."""
+    keep_messages = 2 * (settings.context_keep_turns if keep_turns is None else keep_turns) + 1
+    split = 0
+    while split < len(messages) and messages[split].get("role") == "system":
+        split += 1
+    trimmed = messages[:split] + messages[split:][-keep_messages:]
+    return CompactedContext(
+        messages=trimmed,
+        tokens_before=estimate_tokens(messages),
+        tokens_after=estimate_tokens(trimmed),
+    )
+
+
+async def refresh_summary(
+    conversation_id: str,
+    session_no: int,
+    through_seq: int,
+    user_id: Optional[str] = None,
+    learning_phase: Optional[str] = None,
+) -> None:
+    """Fold turns up to through_seq into the conversation's running summary.
+
+    Meant for BackgroundTasks (awaited on the app's event loop after the
+    response, like the request's own LLM calls); opens its own DB session,
+    skips if a refresh for the conversation is already running, and never raises.
+    """
+    key = str(conversation_id)
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+
+    from app.database import SessionLocal
+    from app.models import Conversation, ConversationTurn
+    from app.services.llm_gateway import ConversationContext, generate_conversation
+    from app.services.prompt_registry import get_registry
+
+    db = SessionLocal()
+    try:
+        conversation = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+        if not conversation:
+            return
+        current = conversation.history_summary or {}
+        same_session = current.get("session_no") == session_no
+        after_seq = current.get("through_seq", 0) if same_session else 0
+        if after_seq >= through_seq:
+            return
+
+        rows = (
+            db.query(ConversationTurn.role, ConversationTurn.content)
+            .filter(
+                ConversationTurn.conversation_id == conversation_id,
+                ConversationTurn.session_no == session_no,
+                ConversationTurn.seq > after_seq,
+                ConversationTurn.seq <= through_seq,
+            )
+            .order_by(ConversationTurn.seq)
+            .all()
+        )
+        if not rows:
+            return
+
+        template = get_registry().get(SUMMARY_AGENT_ID)
+        prompt = template.render(
+            previous_summary=current.get("text", "(none yet)") if same_session else "(none yet)",
+            turns="\n".join(f"{r.role}: {r.content}" for r in rows),
+        )
+        result = await generate_conversation(
+            ConversationContext(
+                request_id=f"summary-{uuid.uuid4()}",
+                user_id=user_id,
+                system_prompt=prompt,
+                user_prompt="Write the updated summary.",
+                agent_id=SUMMARY_AGENT_ID,
+                prompt_version=template.prompt_version,
+                learning_phase=learning_phase,
+            ),
+            db,
+        )
+
+        db.refresh(conversation, with_for_update=True)
+        latest = conversation.history_summary or {}
+        if latest.get("session_no") == session_no and latest.get("through_seq", 0) >= through_seq:
+            db.rollback()
+            return
+        conversation.history_summary = {
+            "session_no": session_no,
+            "through_seq": through_seq,
+            "text": str(result["content"]).strip(),
+        }
+        db.commit()
+        logger.info(f"[Compaction] Summary for {key} now covers seq <= {through_seq}")
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[Compaction] Summary refresh failed for {key}: {e}")
+    finally:
+        db.close()
+        _refreshing.discard(key)
@@ -0,0 +1,202 @@
+"""Server-held voice chat history (conversation_turns).
+
+The transcript is stored append-only per conversation, so the client only
+sends the new user transcript each turn:
+
+    start_session(db, conversation.id, initial_message)    # POST /v1/conversations
+    history = get_history(db, conversation.id)              # voice-turn/respond
+    turns = get_turns(db, conversation.id)                  # same, with "seq" (compaction)
+    append_turns(db, conversation.id, [("user", transcript), ("assistant", reply)])
+
+Each (re)start of a conversation opens a new session_no; the model context only
+uses the latest session. History is capped to the most recent
+conversation_history_max_messages / conversation_history_max_chars.
+
+Writers lock the conversation row (SELECT ... FOR UPDATE) before picking the
+next seq, so concurrent turns on one conversation queue up instead of failing
+on the (conversation_id, seq) constraint at flush.
+
+Reads go through a per-process LRU cache of the capped history. A cache hit
+still runs one indexed query for turns with seq > the last cached seq, so turns
+written by other workers are picked up. Turns written here but rolled back may
+already be cached; a rollback of the session drops those conversations' entries.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import metrics
+from app.models import Conversation, ConversationTurn
+
+
+@dataclass
+class _CachedHistory:
+    session_no: int
+    last_seq: int
+    turns: List[dict]  # {"seq", "role", "content"}
+
+
+_cache: "OrderedDict[str, _CachedHistory]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+_WRITTEN = "conversation_history_written"  # Session.info key: conversation ids with uncommitted turns
+
+
+def cap_history(
+    messages: List[dict],
+    max_messages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> List[dict]:
+    """Keep the most recent messages within the message-count and character budgets."""
+    max_messages = settings.conversation_history_max_messages if max_messages is None else max_messages
+    max_chars = settings.conversation_history_max_chars if max_chars is None else max_chars
+
+    kept = []
+    total = 0
+    for message in reversed(messages):
+        size = len(message["content"])
+        if len(kept) >= max_messages or (kept and total + size > max_chars):
+            break
+        kept.append(message)
+        total += size
+    kept.reverse()
+    return kept
+
+
+def _latest_turn(db: Session, conversation_id) -> Tuple[int, int]:
+    """(session_no, seq) of the newest turn, or (0, 0) when there is none.
+
+    Locks the conversation row until the caller's transaction ends and marks it
+    as written in this session (see _drop_rolled_back).
+    """
+    db.query(Conversation.id).filter(Conversation.id == conversation_id).with_for_update().first()
+    db.info.setdefault(_WRITTEN, set()).add(str(conversation_id))
+    row = (
+        db.query(ConversationTurn.session_no, ConversationTurn.seq)
+        .filter(ConversationTurn.conversation_id == conversation_id)
+        .order_by(ConversationTurn.seq.desc())
+        .first()
+    )
+    return (row.session_no, row.seq) if row else (0, 0)
+
+
+def start_session(db: Session, conversation_id, initial_message: str) -> int:
+    """Open a new history session seeded with the assistant's opening line. Caller commits."""
+    session_no, seq = _latest_turn(db, conversation_id)
+    db.add(ConversationTurn(
+        conversation_id=conversation_id,
+        session_no=session_no + 1,
+        seq=seq + 1,
+        role="assistant",
+        content=initial_message,
+    ))
+    db.flush()
+    return session_no + 1
+
+
+def append_turns(db: Session, conversation_id, turns: Sequence[Tuple[str, str]]) -> None:
+    """Append (role, content) turns to the latest session. Caller commits.
+
+    The cache is not touched here; the next get_history() picks the rows up
+    incrementally once they are visible.
+    """
+    session_no, seq = _latest_turn(db, conversation_id)
+    for offset, (role, content) in enumerate(turns, 1):
+        db.add(ConversationTurn(
+            conversation_id=conversation_id,
+            session_no=max(session_no, 1),
+            seq=seq + offset,
+            role=role,
+            content=content,
+        ))
+    db.flush()
+
+
+def _load_latest_session(db: Session, conversation_id) -> Optional[_CachedHistory]:
+    latest = (
+        db.query(func.max(ConversationTurn.session_no))
+        .filter(ConversationTurn.conversation_id == conversation_id)
+        .scalar()
+    )
+    if latest is None:
+        return None
+    rows = (
+        db.query(ConversationTurn.seq, ConversationTurn.role, ConversationTurn.content)
+        .filter(ConversationTurn.conversation_id == conversation_id, ConversationTurn.session_no == latest)
+        .order_by(ConversationTurn.seq)
+        .all()
+    )
+    return _CachedHistory(
+        session_no=latest,
+        last_seq=rows[-1].seq,
+        turns=cap_history([{"seq": r.seq, "role": r.role, "content": r.content} for r in rows]),
+    )
+
+
+def get_session_turns(db: Session, conversation_id) -> Tuple[int, List[dict]]:
+    """(session_no, capped turns [{"seq", "role", "content"}, ...]) of the latest session."""
+    key = str(conversation_id)
+    with _cache_lock:
+        cached = _cache.get(key)
+
+    if cached is None:
+        metrics.increment("conversation_history_cache", result="miss")
+        entry = _load_latest_session(db, conversation_id)
+    else:
+        metrics.increment("conversation_history_cache", result="hit")
+        rows = (
+            db.query(ConversationTurn.session_no, ConversationTurn.seq, ConversationTurn.role, ConversationTurn.content)
+            .filter(ConversationTurn.conversation_id == conversation_id, ConversationTurn.seq > cached.last_seq)
+            .order_by(ConversationTurn.seq)
+            .all()
+        )
+        if not rows:
+            entry = cached
+        else:
+            newest_session = rows[-1].session_no
+            base = cached.turns if newest_session == cached.session_no else []
+            new = [{"seq": r.seq, "role": r.role, "content": r.content} for r in rows if r.session_no == newest_session]
+            entry = _CachedHistory(newest_session, rows[-1].seq, cap_history(base + new))
+
+    if entry is None:
+        return 0, []
+
+    with _cache_lock:
+        _cache[key] = entry
+        _cache.move_to_end(key)
+        while len(_cache) > settings.conversation_history_cache_size:
+            _cache.popitem(last=False)
+    return entry.session_no, list(entry.turns)
+
+
+def get_turns(db: Session, conversation_id) -> List[dict]:
+    return get_session_turns(db, conversation_id)[1]
+
+
+def get_history(db: Session, conversation_id) -> List[Dict[str, str]]:
+    """Capped message history ([{"role", "content"}, ...]) of the latest session."""
+    return [{"role": t["role"], "content": t["content"]} for t in get_turns(db, conversation_id)]
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_written(session: Session) -> None:
+    session.info.pop(_WRITTEN, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back(session: Session, previous_transaction) -> None:
+    written = session.info.pop(_WRITTEN, None)
+    if written:
+        with _cache_lock:
+            for key in written:
+                _cache.pop(key, None)
+
+
+def clear_history_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
@@ -1,19 +1,83 @@
+from dataclasses import dataclass
+from sqlalchemy import bindparam, case, cast, func, literal_column, select, update
 from sqlalchemy.orm import Session
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from app.models import Conversation, UserWord, Word
 from typing import List
 
 
-def check_conversation_complete(conversation: Conversation, mode: str) -> bool:
-    """Check if conversation is complete based on mode"""
-    if mode == "text":
-        used_word_ids = set(conversation.used_typed_word_ids or [])
-    else:  # voice
-        used_word_ids = set(conversation.used_spoken_word_ids or [])
-    
-    target_word_ids = set(conversation.target_word_ids or [])
-    
-    return target_word_ids.issubset(used_word_ids)
+@dataclass
+class WordProgress:
+    used_word_ids: List[str]
+    missing_word_ids: List[str]
+    complete: bool
+
+
+def _used_column(mode: str):
+    return Conversation.used_typed_word_ids if mode == "text" else Conversation.used_spoken_word_ids
+
+
+def _progress(target_word_ids, used_word_ids) -> WordProgress:
+    used = set(used_word_ids)
+    missing = [w for w in (target_word_ids or []) if w not in used]
+    return WordProgress(list(used_word_ids), missing, not missing)
+
+
+def record_used_words(
+    db: Session,
+    conversation: Conversation,
+    word_ids: List[str],
+    mode: str,
+    mark_complete: bool = False,
+) -> WordProgress:
+    """Add word_ids to the conversation's used words (text: typed, voice: spoken) in one statement.
+
+    UPDATE ... SET used = used || <ids not in used> ... RETURNING, evaluated against
+    the current row under its row lock, so concurrent turns can't lose each other's
+    words. With mark_complete the same statement sets status='complete' once every
+    target word is used. The loaded conversation is updated from the returned row
+    (no reload); the caller commits. Nothing is written when word_ids is empty.
+    """
+    column = _used_column(mode)
+    new_ids = list(dict.fromkeys(word_ids))
+    if not new_ids:
+        return _progress(conversation.target_word_ids, getattr(conversation, column.key) or [])
+
+    new = cast(bindparam("new_ids", new_ids, type_=JSONB), JSONB)
+    element = literal_column("new_id.value")
+    appended = column.op("||")(func.coalesce(
+        select(func.jsonb_agg(element))
+        .select_from(func.jsonb_array_elements(new).alias("new_id"))
+        .where(~column.op("@>")(func.jsonb_build_array(element)))
+        .scalar_subquery(),
+        func.jsonb_build_array(),
+    ))
+    values = {column.key: appended, "updated_at": func.now()}
+    if mark_complete:
+        values["status"] = case(
+            (Conversation.target_word_ids.op("<@")(column.op("||")(new)), "complete"),
+            else_=Conversation.status,
+        )
+    row = db.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation.id)
+        .values(values)
+        .returning(column, Conversation.target_word_ids, Conversation.status)
+        .execution_options(synchronize_session=False)
+    ).one()
+    set_committed_value(conversation, column.key, row[0])
+    set_committed_value(conversation, "status", row[2])
+    return _progress(row[1], row[0])
+
+
+def get_word_progress(db: Session, conversation_id, mode: str) -> WordProgress:
+    """Current used/missing words of a conversation, read from the row (not a loaded, possibly stale object)."""
+    column = _used_column(mode)
+    row = db.execute(
+        select(Conversation.target_word_ids, column).where(Conversation.id == conversation_id)
+    ).one()
+    return _progress(row[0], row[1] or [])
 
 
 def update_user_word_stats(
@@ -0,0 +1,248 @@
+"""Everything the lesson screen needs, in one request (POST /v1/situations/{id}/bundle).
+
+Equivalent to GET /situations/{id} + POST /situations/{id}/start +
+POST /conversations (+ /grammar-config for grammar situations), but without
+re-selecting words and recounting per call. Statements:
+
+    1  gate: situation, subscription, completed encounters, encounters today
+       and vocab level (scalar subqueries)
+    1  the user's text/voice conversations for the situation (FOR UPDATE)
+    1-2 words: with their situation position for an existing selection or one
+       prepared by the next-encounter warm-up, else situation words + unlearned
+       high-frequency words
+    1  the previous turn of the voice conversation (start_session)
+    writes: new conversations, user_words upsert (one multi-row statement),
+       user_situations insert-if-missing, daily encounter log, opening turn
+
+The router maps gate failures to the same 404/403/429 as /start and sends the
+per-phase timings as a Server-Timing header (also observed as
+lesson_bundle_ms{phase=...}), so the lesson screen's time-to-interactive can be
+broken down from the browser's resource timing.
+"""
+from dataclasses import dataclass
+from datetime import datetime, time, timezone
+from typing import List, Optional
+
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.data.grammar_situations import get_grammar_config
+from app.models import (
+    Conversation, DailyEncounterLog, Situation, SituationWord, Subscription, User, UserSituation, UserWord, Word,
+)
+from app.services.conversation_history import start_session
+from app.services.daily_encounter_service import DAILY_ENCOUNTER_LIMIT
+from app.services.subscription_service import FREE_ENCOUNTERS_LIMIT
+from app.services.locales import get_locale
+from app.services.warmup_service import initial_audio_available, take_warm_selection
+from app.services.word_catalog import WORD_COLUMNS, WordView, word_views_from_rows
+
+ENCOUNTER_WORD_LIMIT = 3
+HIGH_FREQ_WORD_LIMIT = 2
+
+
+@dataclass
+class LessonGate:
+    situation: Situation
+    subscription_active: bool
+    completed_encounters: int
+    encounters_today: int
+    vocab_level: int
+
+    def error(self, user: User) -> Optional[tuple]:
+        """(status_code, error) if the user may not start this lesson now (admins always may)."""
+        if user.is_admin:
+            return None
+        if not self.subscription_active and self.completed_encounters >= FREE_ENCOUNTERS_LIMIT:
+            return 403, "PAYWALL"
+        if self.encounters_today >= DAILY_ENCOUNTER_LIMIT:
+            return 429, "DAILY_LIMIT_REACHED"
+        return None
+
+
+def grammar_config_payload(situation_type: str, config: dict) -> dict:
+    """The client-facing part of a grammar config (GrammarConfigResponse fields)."""
+    return {
+        "situation_type": situation_type,
+        "video_embed_id": config["video_embed_id"],
+        "drill_type": config["drill_type"],
+        "tense": config["tense"],
+        "phases": config["phases"],
+        "drill_config": config.get("drill_config"),
+        "phase_1c_config": config.get("phase_1c_config"),
+        "phase_2_config": config.get("phase_2_config"),
+    }
+
+
+def vocab_level_subquery(user_id):
+    """get_vocab_level() as a scalar subquery, to fold it into another statement."""
+    return (
+        select(func.count()).select_from(UserWord).join(Word, Word.id == UserWord.word_id)
+        .where(UserWord.user_id == user_id, Word.word_category == "high_frequency", UserWord.mastery_level >= 2)
+        .scalar_subquery()
+    )
+
+
+def load_lesson_gate(db: Session, user_id, situation_id: str) -> Optional[LessonGate]:
+    """The situation plus everything the access checks need, in one query (None if not found)."""
+    today_start = datetime.combine(datetime.now(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+    subscription_active = (
+        select(Subscription.active).where(Subscription.user_id == user_id).scalar_subquery()
+    )
+    completed = (
+        select(func.count()).select_from(UserSituation)
+        .where(UserSituation.user_id == user_id, UserSituation.completed_at.isnot(None))
+        .scalar_subquery()
+    )
+    today = (
+        select(func.count()).select_from(DailyEncounterLog)
+        .where(DailyEncounterLog.user_id == user_id, DailyEncounterLog.created_at >= today_start)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        select(Situation, subscription_active, completed, today, vocab_level_subquery(user_id))
+        .where(Situation.id == situation_id)
+    ).first()
+    if row is None:
+        return None
+    return LessonGate(
+        situation=row[0],
+        subscription_active=bool(row[1]),
+        completed_encounters=row[2],
+        encounters_today=row[3],
+        vocab_level=row[4],
+    )
+
+
+def _words_in_order(db: Session, situation_id: str, target_word_ids: List[str], catalan_mode: bool = False) -> List[WordView]:
+    """Words of an existing selection: encounter words by position, then the rest in selection order."""
+    rows = db.execute(
+        select(*WORD_COLUMNS, SituationWord.position)
+        .outerjoin(SituationWord, and_(SituationWord.word_id == Word.id, SituationWord.situation_id == situation_id))
+        .where(Word.id.in_(target_word_ids))
+    ).all()
+    encounter = sorted((row for row in rows if row.position is not None), key=lambda row: row.position)
+    rest = {row.id: row for row in rows if row.position is None}
+    ordered = encounter + [rest[word_id] for word_id in target_word_ids if word_id in rest]
+    return word_views_from_rows(ordered, catalan_mode)
+
+
+def _select_words(db: Session, user_id, situation: Situation, catalan_mode: bool = False) -> List[WordView]:
+    """Same selection as select_words_for_situation, already in display order."""
+    query = (
+        select(*WORD_COLUMNS).join(SituationWord, SituationWord.word_id == Word.id)
+        .where(SituationWord.situation_id == situation.id)
+        .order_by(SituationWord.position)
+    )
+    if situation.situation_type == "grammar":
+        return word_views_from_rows(db.execute(query).all(), catalan_mode)
+    rows = db.execute(query.limit(ENCOUNTER_WORD_LIMIT)).all()
+    learned = exists().where(UserWord.user_id == user_id, UserWord.word_id == Word.id)
+    rows += db.execute(
+        select(*WORD_COLUMNS)
+        .where(Word.word_category == "high_frequency", ~learned)
+        .order_by(Word.frequency_rank.asc().nullslast())
+        .limit(HIGH_FREQ_WORD_LIMIT)
+    ).all()
+    return word_views_from_rows(rows, catalan_mode)
+
+
+def build_lesson_bundle(db: Session, user: User, gate: LessonGate, timing: metrics.ServerTiming) -> dict:
+    """Start the lesson (like /start + POST /conversations), commit, and return the bundle.
+
+    The payload is assembled before the commit so nothing has to be reloaded
+    from expired ORM instances afterwards.
+    """
+    from app.services.voice_turn_service import build_system_prompt, get_language_mode
+
+    situation = gate.situation
+    locale = get_locale(user)
+    with timing.phase("words"):
+        conversations = (
+            db.query(Conversation)
+            .filter(
+                Conversation.user_id == user.id,
+                Conversation.situation_id == situation.id,
+                Conversation.mode.in_(("text", "voice")),
+            )
+            .order_by(Conversation.created_at.desc())
+            .with_for_update()
+            .all()
+        )
+        text_conv = next((c for c in conversations if c.mode == "text"), None)
+        voice_conv = next((c for c in conversations if c.mode == "voice" and c.status == "active"), None)
+
+        if text_conv and text_conv.target_word_ids:
+            target_word_ids = text_conv.target_word_ids
+            words = _words_in_order(db, situation.id, target_word_ids, locale.catalan_mode)
+        else:
+            # Prepared by the warm-up that ran when the previous encounter was completed
+            warm_word_ids = take_warm_selection(user.id, situation.id)
+            if warm_word_ids:
+                words = _words_in_order(db, situation.id, warm_word_ids, locale.catalan_mode)
+            else:
+                words = _select_words(db, user.id, situation, locale.catalan_mode)
+            target_word_ids = [w.id for w in words]
+            db.add(Conversation(
+                user_id=user.id, situation_id=situation.id, mode="text",
+                target_word_ids=target_word_ids, used_typed_word_ids=[], used_spoken_word_ids=[],
+            ))
+
+    with timing.phase("prompt"):
+        initial_message = locale.initial_message(situation.id, situation.title)
+        language_mode = locale.language_mode(get_language_mode(situation.encounter_number, gate.vocab_level))
+        word_ids = [w.id for w in words]
+        system_prompt = build_system_prompt(
+            situation.animation_type, situation.id, language_mode, catalan_mode=locale.catalan_mode,
+        )
+        voice, instructions = locale.tts(situation.animation_type)
+        grammar_config = get_grammar_config(situation.id) if situation.situation_type == "grammar" else None
+        bundle = {
+            "situation": {
+                "id": situation.id,
+                "title": situation.title,
+                "free": situation.is_free,
+                "encounter_number": situation.encounter_number,
+                "animation_type": situation.animation_type,
+                "situation_type": situation.situation_type,
+                "goal": situation.goal,
+            },
+            "words": [{"id": w.id, "spanish": w.spanish, "english": w.english, "notes": w.notes} for w in words],
+            "initial_message": initial_message,
+            "initial_audio_url": (
+                locale.initial_audio_url(situation.id) if initial_audio_available(situation.id) is not False else None
+            ),
+            "language_mode": language_mode,
+            "vocab_level": gate.vocab_level,
+            "system_prompt": system_prompt,
+            "voice": {"voice": voice, "instructions": instructions},
+            "grammar_config": grammar_config_payload(situation.situation_type, grammar_config) if grammar_config else None,
+        }
+
+    with timing.phase("writes"):
+        if voice_conv is None:
+            voice_conv = Conversation(
+                user_id=user.id, situation_id=situation.id, mode="voice",
+                target_word_ids=target_word_ids, used_typed_word_ids=[], used_spoken_word_ids=[],
+            )
+            db.add(voice_conv)
+        if word_ids:
+            db.execute(
+                insert(UserWord)
+                .values([{"user_id": user.id, "word_id": word_id, "seen_count": 1} for word_id in word_ids])
+                .on_conflict_do_update(
+                    index_elements=["user_id", "word_id"],
+                    set_={"seen_count": UserWord.seen_count + 1},
+                )
+            )
+        db.execute(
+            insert(UserSituation).values(user_id=user.id, situation_id=situation.id).on_conflict_do_nothing()
+        )
+        db.add(DailyEncounterLog(user_id=user.id, situation_id=situation.id))
+        db.flush()
+        bundle["conversation_id"] = voice_conv.id
+        start_session(db, voice_conv.id, initial_message)
+        db.commit()
+    return bundle
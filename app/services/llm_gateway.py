@@ -7,6 +7,9 @@ import uuid
 from openai import OpenAI
 from sqlalchemy.orm import Session
 from app.models import LLMRequest
+from app.services.ai_rollup_service import record_ai_request
+from app.services.llm_message_store import store_messages
+from app.core import provider_limits
 from app.core.logger import log_event
 from app.config import settings
 import os
@@ -25,7 +28,8 @@ def get_client() -> OpenAI:
     """Get or create OpenAI client"""
     global _client
     if _client is None:
-        _client = OpenAI(api_key=settings.openai_api_key)
+        # 429s are retried by provider_limits.call, not also by the SDK
+        _client = OpenAI(api_key=settings.openai_api_key, max_retries=0)
     return _client
 
 
@@ -43,21 +47,28 @@ class ConversationContext:
     return_json: bool = False
     learning_phase: Optional[str] = None
     messages: Optional[List[Dict[str, str]]] = None  # Full message history (overrides system_prompt + user_prompt)
+    context_tokens_before: Optional[int] = None  # Set by callers that already compacted `messages`
+    context_tokens_after: Optional[int] = None
+    trim_history: bool = False  # Keep only system messages + the last K turns of `messages` (logged)
 
 
-def load_prompt(agent_id: str, prompt_version: str = "v2") -> str:
-    """Load prompt template from prompts.json by agent_id."""
-    import json
-    from pathlib import Path
+def estimate_cost(tokens_in: Optional[int], tokens_out: Optional[int]) -> Optional[float]:
+    """Estimated USD cost of a call; gpt-5.4-mini: $0.75/$4.50 per 1M tokens (input/output)."""
+    if not tokens_in or not tokens_out:
+        return None
+    cost_per_1m_input = 0.75
+    cost_per_1m_output = 4.50
+    return (
+        (tokens_in / 1_000_000) * cost_per_1m_input +
+        (tokens_out / 1_000_000) * cost_per_1m_output
+    )
 
-    prompts_path = Path(__file__).parent.parent / "prompts" / "prompts.json"
-    with open(prompts_path, "r") as f:
-        prompts = json.load(f)
 
-    if agent_id not in prompts:
-        raise ValueError(f"Agent ID '{agent_id}' not found in prompts.json")
+def load_prompt(agent_id: str, prompt_version: str = "v2") -> str:
+    """Return the prompt template content for agent_id (served from the in-memory prompt registry)."""
+    from app.services.prompt_registry import get_registry
 
-    return prompts[agent_id]["content"]
+    return get_registry().get(agent_id).content
 
 
 async def generate_conversation(
@@ -73,9 +84,19 @@ async def generate_conversation(
     start_time = time.time()
     llm_request_id = uuid.uuid4()
     
-    # Build messages — use full history if provided, otherwise system+user pair
+    # Build messages — use full history if provided (trimmed to the last K turns on request), otherwise system+user pair
+    tokens_before, tokens_after = context.context_tokens_before, context.context_tokens_after
     if context.messages:
         messages = context.messages
+        if context.trim_history and tokens_before is None:
+            from app.services.context_compaction import trim_messages
+            compacted = trim_messages(messages)
+            messages, tokens_before, tokens_after = compacted.messages, compacted.tokens_before, compacted.tokens_after
+            if len(messages) < len(context.messages):
+                logger.info(
+                    f"[LLM] Trimmed {context.agent_id} history from {len(context.messages)} to {len(messages)} messages "
+                    f"(~{tokens_before} -> ~{tokens_after} tokens)"
+                )
     else:
         messages = [
             {"role": "system", "content": context.system_prompt},
@@ -99,7 +120,9 @@ async def generate_conversation(
         model=MODEL,
         prompt_version=context.prompt_version,
         agent_id=context.agent_id,
-        messages_json=messages,
+        message_hashes=store_messages(db, messages),
+        context_tokens_before=tokens_before,
+        context_tokens_after=tokens_after,
         temperature=context.temperature,
         max_tokens=context.max_tokens,
         success=False
@@ -142,7 +165,7 @@ async def generate_conversation(
         if context.max_tokens is not None:
             api_params["max_output_tokens"] = context.max_tokens
 
-        response = client.responses.create(**api_params)
+        response = await provider_limits.call("llm", client.responses.create, **api_params)
 
         # Extract response — output_text excludes reasoning tokens
         import re
@@ -158,18 +181,10 @@ async def generate_conversation(
         usage = response.usage
         tokens_in = usage.input_tokens if usage else None
         tokens_out = usage.output_tokens if usage else None
+        cached_tokens = getattr(getattr(usage, 'input_tokens_details', None), 'cached_tokens', None) if usage else None
         reasoning_tokens = getattr(getattr(usage, 'output_tokens_details', None), 'reasoning_tokens', 0) if usage else 0
 
-        # Estimate cost
-        estimated_cost = None
-        if tokens_in and tokens_out:
-            # gpt-5.4-mini: $0.75/$4.50 per 1M tokens (input/output)
-            cost_per_1m_input = 0.75
-            cost_per_1m_output = 4.50
-            estimated_cost = (
-                (tokens_in / 1_000_000) * cost_per_1m_input +
-                (tokens_out / 1_000_000) * cost_per_1m_output
-            )
+        estimated_cost = estimate_cost(tokens_in, tokens_out)
         
         # Update record with success
         llm_record.success = True
@@ -177,7 +192,13 @@ async def generate_conversation(
         llm_record.latency_ms = latency_ms
         llm_record.tokens_in = tokens_in
         llm_record.tokens_out = tokens_out
+        llm_record.cached_tokens = cached_tokens
         llm_record.estimated_cost = estimated_cost
+        record_ai_request(
+            db, "llm", MODEL, True, latency_ms, estimated_cost,
+            agent_id=context.agent_id, learning_phase=context.learning_phase,
+            tokens_in=tokens_in, cached_tokens=cached_tokens,
+        )
         db.commit()
         
         # Log success event
@@ -188,6 +209,7 @@ async def generate_conversation(
             "latency_ms": latency_ms,
             "tokens_in": tokens_in,
             "tokens_out": tokens_out,
+            "cached_tokens": cached_tokens,
             "reasoning_tokens": reasoning_tokens,
             "estimated_cost": estimated_cost,
             "success": True,
@@ -225,6 +247,10 @@ async def generate_conversation(
         llm_record.latency_ms = latency_ms
         llm_record.error_code = error_code
         llm_record.error_message = error_message
+        record_ai_request(
+            db, "llm", MODEL, False, latency_ms,
+            agent_id=context.agent_id, learning_phase=context.learning_phase,
+        )
         db.commit()
         
         # Log failure event
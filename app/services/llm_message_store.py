@@ -0,0 +1,99 @@
+"""Content-addressed storage for LLM request messages.
+
+Every LLMRequest used to carry its full message list in messages_json: the same
+long system prompt and a growing history, i.e. O(turns²) bytes per conversation.
+Now each distinct message is stored once in llm_message_blobs under the sha256
+of its canonical JSON, and llm_requests.message_hashes keeps the ordered keys.
+
+    hashes = store_messages(db, messages)        # on write
+    messages = get_request_messages(db, record)  # on read / replay
+
+The llm_requests_expanded view (migration 017) does the same reconstruction in SQL.
+"""
+from typing import Dict, List, Optional
+import hashlib
+import json
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import LLMMessageBlob, LLMRequest
+
+
+def canonical_message_bytes(message: dict) -> bytes:
+    """Stable serialization used for hashing (key order and whitespace independent)."""
+    return json.dumps(message, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def message_hash(message: dict) -> str:
+    return hashlib.sha256(canonical_message_bytes(message)).hexdigest()
+
+
+def store_messages(db: Session, messages: List[dict]) -> List[str]:
+    """Store any messages not seen before and return the ordered list of hashes.
+
+    One INSERT ... ON CONFLICT DO NOTHING for the whole list; the caller commits.
+    """
+    hashes = []
+    rows: Dict[str, dict] = {}
+    for message in messages:
+        encoded = canonical_message_bytes(message)
+        digest = hashlib.sha256(encoded).hexdigest()
+        hashes.append(digest)
+        if digest not in rows:
+            rows[digest] = {"sha256": digest, "message": message, "byte_size": len(encoded)}
+
+    if rows:
+        db.execute(
+            insert(LLMMessageBlob).values(list(rows.values())).on_conflict_do_nothing(index_elements=["sha256"])
+        )
+    return hashes
+
+
+def load_messages(db: Session, hashes: List[str]) -> List[dict]:
+    """Rebuild an ordered message list from its hashes."""
+    if not hashes:
+        return []
+    blobs = {
+        b.sha256: b.message
+        for b in db.query(LLMMessageBlob).filter(LLMMessageBlob.sha256.in_(set(hashes))).all()
+    }
+    missing = [h for h in hashes if h not in blobs]
+    if missing:
+        raise LookupError(f"Missing {len(missing)} message blob(s), e.g. {missing[0]}")
+    return [blobs[h] for h in hashes]
+
+
+def get_request_messages(db: Session, record: LLMRequest) -> Optional[List[dict]]:
+    """Original messages for an LLMRequest, whether stored inline (legacy) or by hash."""
+    if record.messages_json is not None:
+        return record.messages_json
+    if record.message_hashes is not None:
+        return load_messages(db, record.message_hashes)
+    return None
+
+
+def storage_report(db: Session) -> dict:
+    """Compare inline vs content-addressed storage for llm_requests messages (bytes)."""
+    row = db.execute(text("""
+        SELECT
+            (SELECT COUNT(*) FROM llm_requests) AS requests,
+            (SELECT COUNT(*) FROM llm_requests WHERE messages_json IS NOT NULL) AS inline_requests,
+            (SELECT COALESCE(SUM(pg_column_size(messages_json)), 0) FROM llm_requests) AS inline_bytes,
+            (SELECT COALESCE(SUM(pg_column_size(message_hashes)), 0) FROM llm_requests) AS hash_list_bytes,
+            (SELECT COUNT(*) FROM llm_message_blobs) AS blobs,
+            (SELECT COALESCE(SUM(pg_column_size(message)), 0) FROM llm_message_blobs) AS blob_bytes,
+            (SELECT COALESCE(SUM(b.byte_size), 0)
+               FROM llm_requests r
+               CROSS JOIN LATERAL jsonb_array_elements_text(r.message_hashes) AS h(sha256)
+               JOIN llm_message_blobs b ON b.sha256 = h.sha256) AS logical_bytes
+    """)).mappings().one()
+
+    stored = row["inline_bytes"] + row["hash_list_bytes"] + row["blob_bytes"]
+    logical = row["logical_bytes"] + row["inline_bytes"]
+    return {
+        **dict(row),
+        "stored_bytes": stored,
+        "dedup_ratio": round(logical / stored, 2) if stored else None,
+    }
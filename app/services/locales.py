@@ -0,0 +1,133 @@
+"""Per-locale rendering data, precomputed once per (language, dialect).
+
+A user's locale is their language (Spanish, or Catalan in catalan_mode) plus
+their onboarding dialect. Everything that used to be adjusted per request is a
+field of the Locale built at import:
+
+    locale = get_locale(current_user)              # dict lookup
+    locale.catalan_mode                             # word views, prompt variants
+    locale.language_mode(base)                      # "spanish_text" -> "catalan_text"
+    locale.tts(animation_type)                      # (voice, instructions) with the accent
+    locale.initial_message(situation_id, title)     # opening line (memoized)
+    locale.initial_audio_url(situation_id)          # pregenerated opening audio in R2
+
+Adding a dialect is one SPANISH_DIALECTS entry (onboarding validates against
+it); adding a language is one LANGUAGES entry. Words carry no per-dialect
+spelling, so dialects of a language share word views and system prompts, which
+stay memoized per language (catalan_mode). Pregenerated opening audio is shared
+by all locales (initial_msg_{situation_id}.mp3, Mexican accent).
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+from app.config import settings
+from app.services.encounter_messages import get_initial_message_for_encounter
+
+DEFAULT_DIALECT = "mexico"
+
+# Onboarding dialect -> accent of synthesized Spanish speech
+SPANISH_DIALECTS: Dict[str, str] = {
+    "mexico": "a Mexican Spanish accent",
+    "colombia": "a Colombian Spanish accent",
+    "costa_rica": "a Costa Rican Spanish accent",
+}
+
+
+class Language(NamedTuple):
+    name: str  # as used in prompts
+    accent: Optional[str]  # fixed accent; None: the Spanish dialect's accent
+    mode_prefix: str  # language_mode prefix ("spanish_text", "catalan_audio", ...)
+
+
+LANGUAGES: Dict[str, Language] = {
+    "spanish": Language("Spanish", None, "spanish_"),
+    "catalan": Language("Catalan", "a Catalan accent", "catalan_"),
+}
+
+# TTS voice and speaking style per animation_type; the locale adds the accent
+DEFAULT_VOICE = "alloy"
+SITUATION_VOICES: Dict[str, Tuple[str, str]] = {
+    "police": ("ash", "Use an authoritative female voice, firm but professional."),
+    "banking": ("shimmer", "Use a professional, composed female voice with a warm undertone."),
+    "airport": ("ash", "Use a professional, clear female voice."),
+    "clothing": ("coral", "Use a casual, charming female voice."),
+    "small_talk": ("shimmer", "Use a warm, older female voice with a friendly, neighborly tone."),
+    "internet": ("ash", "Use a young, energetic female voice."),
+    "restaurant": ("echo", "Use a suave, charming male voice."),
+    "mechanic": ("verse", "Use a deep male voice."),
+    "groceries": ("echo", "Use a casual, charming male voice."),
+    "contractor": ("verse", "Use a deep, husky baritone male voice."),
+    "core": ("echo", "Use a casual, friendly male voice."),
+}
+
+_TARGET_LANGUAGE_MODES = ("spanish_text", "spanish_audio")
+
+
+@lru_cache(maxsize=4096)
+def _initial_message(situation_id: str, title: str) -> str:
+    return get_initial_message_for_encounter(situation_id, title)
+
+
+@dataclass(frozen=True)
+class Locale:
+    language: str
+    dialect: str
+    language_name: str
+    catalan_mode: bool
+    voices: Mapping[str, Tuple[str, Optional[str]]]
+    language_modes: Mapping[str, str]
+
+    @property
+    def key(self) -> str:
+        return f"{self.language}:{self.dialect}"
+
+    def language_mode(self, base: str) -> str:
+        """The get_language_mode() result in this locale's language."""
+        return self.language_modes.get(base, base)
+
+    def tts(self, animation_type: Optional[str]) -> Tuple[str, Optional[str]]:
+        """(voice, instructions) for TTS and Realtime sessions."""
+        return self.voices.get(animation_type or "", (DEFAULT_VOICE, None))
+
+    def initial_message(self, situation_id: str, title: str = "") -> str:
+        return _initial_message(situation_id, title)
+
+    def initial_audio_url(self, situation_id: str) -> Optional[str]:
+        if not settings.r2_public_url:
+            return None
+        return f"{settings.r2_public_url}/initial_msg_{situation_id}.mp3"
+
+
+def _build(language: str, dialect: str) -> Locale:
+    lang = LANGUAGES[language]
+    accent = lang.accent or SPANISH_DIALECTS[dialect]
+    speak = f"Speak with {accent}, mixing English and {lang.name} words naturally."
+    return Locale(
+        language=language,
+        dialect=dialect,
+        language_name=lang.name,
+        catalan_mode=language == "catalan",
+        voices={
+            animation_type: (voice, f"{speak} {style}")
+            for animation_type, (voice, style) in SITUATION_VOICES.items()
+        },
+        language_modes={
+            mode: mode.replace("spanish_", lang.mode_prefix) for mode in _TARGET_LANGUAGE_MODES
+        },
+    )
+
+
+LOCALES: Dict[Tuple[str, str], Locale] = {
+    (language, dialect): _build(language, dialect) for language in LANGUAGES for dialect in SPANISH_DIALECTS
+}
+
+
+def get_locale_for(catalan_mode: bool = False, dialect: Optional[str] = None) -> Locale:
+    language = "catalan" if catalan_mode else "spanish"
+    return LOCALES.get((language, dialect)) or LOCALES[(language, DEFAULT_DIALECT)]
+
+
+def get_locale(user) -> Locale:
+    """The user's locale (unknown or missing dialect: DEFAULT_DIALECT)."""
+    return get_locale_for(user.catalan_mode, user.dialect)
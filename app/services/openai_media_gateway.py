@@ -1,19 +1,69 @@
-"""OpenAI Media Gateway for STT and TTS with logging"""
+"""OpenAI Media Gateway for STT and TTS with logging
+
+STT is hedged: the primary model (STT_MODEL) gets a head start of roughly the
+stt_hedge_percentile of its recent latencies; if it hasn't answered by then,
+the fallback model is fired in parallel and the first successful transcript
+wins. A primary that fails outright triggers the fallback immediately. The
+whole call is bounded by stt_deadline_seconds. Which leg won and the latency
+of each leg are stored on STTRequest.
+
+Uploads are measured from their container headers (app/utils/audio_duration.py):
+the duration is stored on STTRequest.audio_seconds and prices the call, clips
+longer than stt_max_audio_seconds are rejected before any provider call,
+clips shorter than stt_min_audio_seconds are answered with an empty transcript
+without one, and hedge delays are tracked per clip-length bucket (a 2 s clip
+and a 20 s clip don't share a latency percentile).
+
+With stt_preprocess_enabled, uploads are first downmixed, resampled, trimmed
+of silence and re-encoded (app/services/audio_preprocess.py); STTRequest then
+describes the audio actually sent (audio_sha256 stays that of the upload).
+
+Primary failures feed a circuit breaker per (STT_MODEL, audio format): while
+it is open, that format goes straight to the fallback model, with a half-open
+probe every breaker_open_seconds (app/core/circuit_breaker.py).
+"""
+from collections import deque
+from dataclasses import dataclass
 from typing import Optional, Dict, Any
+import asyncio
 import hashlib
+import shutil
+import sys
+import threading
 import time
 import uuid
 import io
-from openai import OpenAI
+from openai import APITimeoutError, OpenAI
 from sqlalchemy.orm import Session
 from app.models import STTRequest, TTSRequest
+from app.services import audio_cache
+from app.services.audio_preprocess import preprocess_for_stt
+from app.services.ai_rollup_service import record_ai_request
+from app.core import metrics, provider_limits
+from app.core.circuit_breaker import get_breaker
+from app.core.singleflight import SingleFlight
 from app.core.logger import log_event
+from app.utils.audio_duration import AudioTooLongError, audio_duration_seconds
 from app.config import settings
 
 PROVIDER = "openai"
 STT_MODEL = "gpt-4o-mini-transcribe"
+STT_FALLBACK_MODEL = "whisper-1"
 TTS_MODEL = "gpt-4o-mini-tts"
 
+# USD per audio minute
+STT_COST_PER_MINUTE = {STT_MODEL: 0.003, STT_FALLBACK_MODEL: 0.006}
+
+# Recent primary STT latencies (ms) per clip-length bucket; the hedge delay is derived from them
+STT_LATENCY_WINDOW = 256
+STT_DURATION_BUCKETS = ((3.0, "short"), (10.0, "medium"), (float("inf"), "long"))
+_stt_latencies: Dict[str, deque] = {}
+_stt_latencies_lock = threading.Lock()
+
+# Identical concurrent STT/TTS requests share one provider call
+_stt_flight = SingleFlight("stt")
+_tts_flight = SingleFlight("tts")
+
 # Lazy initialization
 _client = None
 
@@ -21,7 +71,8 @@ def get_client() -> OpenAI:
     """Get or create OpenAI client"""
     global _client
     if _client is None:
-        _client = OpenAI(api_key=settings.openai_api_key)
+        # 429s are retried by provider_limits.call, not also by the SDK
+        _client = OpenAI(api_key=settings.openai_api_key, max_retries=0)
     return _client
 
 
@@ -30,6 +81,169 @@ def sha256_hash(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
+def _duration_bucket(audio_seconds: Optional[float]) -> str:
+    if audio_seconds is None:
+        return "unknown"
+    return next(name for limit, name in STT_DURATION_BUCKETS if audio_seconds < limit)
+
+
+def record_stt_latency(latency_ms: float, audio_seconds: Optional[float] = None) -> None:
+    bucket = _duration_bucket(audio_seconds)
+    with _stt_latencies_lock:
+        _stt_latencies.setdefault(bucket, deque(maxlen=STT_LATENCY_WINDOW)).append(latency_ms)
+
+
+def stt_hedge_delay_ms(audio_seconds: Optional[float] = None) -> float:
+    """How long the primary STT model gets before the fallback is fired in parallel."""
+    with _stt_latencies_lock:
+        samples = sorted(_stt_latencies.get(_duration_bucket(audio_seconds), ()))
+    if len(samples) < settings.stt_hedge_min_samples:
+        return settings.stt_hedge_default_delay_ms
+    value = samples[int(settings.stt_hedge_percentile * (len(samples) - 1))]
+    return min(max(value, settings.stt_hedge_min_delay_ms), settings.stt_hedge_max_delay_ms)
+
+
+@dataclass
+class STTHedge:
+    """Outcome of a hedged transcription (stored on STTRequest)."""
+    winner: Optional[str] = None  # model that produced the transcript
+    hedged: bool = False  # fallback fired while the primary was still running
+    primary_latency_ms: Optional[int] = None  # time until cancelled if the fallback won
+    fallback_latency_ms: Optional[int] = None  # None if never fired or cancelled
+
+
+def estimate_stt_cost(model: Optional[str], audio_seconds: Optional[float], audio_bytes: int) -> float:
+    if model is None:
+        return 0.0
+    if audio_seconds is None:
+        # Container we couldn't measure: rough size-based estimate (1 MB ~ 1 minute)
+        minutes = audio_bytes / (1024 * 1024)
+    else:
+        minutes = audio_seconds / 60
+    return minutes * STT_COST_PER_MINUTE.get(model, STT_COST_PER_MINUTE[STT_FALLBACK_MODEL])
+
+
+def _apply_hedge(record: STTRequest, hedge: STTHedge) -> None:
+    record.winning_model = hedge.winner
+    record.hedged = hedge.hedged
+    record.primary_latency_ms = hedge.primary_latency_ms
+    record.fallback_latency_ms = hedge.fallback_latency_ms
+
+
+def _stt_params(model: str, audio_bytes: bytes, filename: str, prompt, language, timeout: float) -> dict:
+    audio_file = io.BytesIO(audio_bytes)
+    audio_file.name = filename
+    params = {"model": model, "file": audio_file, "timeout": timeout}
+    if language:
+        params["language"] = language
+    if prompt:
+        params["prompt"] = prompt
+    return params
+
+
+async def _hedged_transcribe(
+    audio_bytes, filename, audio_format, audio_seconds, prompt, language, hedge: STTHedge, log_context: dict,
+):
+    """Race the primary STT model against a delayed fallback; first success wins.
+
+    Losers are cancelled: their provider slot is released at once, and the
+    per-request timeout bounds the abandoned HTTP call in its worker thread.
+    """
+    client = get_client()
+    start = time.perf_counter()
+    deadline = start + settings.stt_deadline_seconds
+    hedge_at = start + stt_hedge_delay_ms(audio_seconds) / 1000 if settings.stt_hedging_enabled else deadline
+    breaker = get_breaker(STT_MODEL, audio_format)
+
+    async def leg(model: str):
+        leg_start = time.perf_counter()
+        params = _stt_params(model, audio_bytes, filename, prompt, language, max(deadline - leg_start, 0.1))
+        try:
+            response = await provider_limits.call("stt", client.audio.transcriptions.create, **params)
+            if model == STT_MODEL:
+                breaker.record_success()
+            return response
+        except (provider_limits.ProviderBusyError, APITimeoutError):
+            raise  # not the primary model's fault (slowness is what hedging is for)
+        except Exception:
+            if model == STT_MODEL:
+                breaker.record_failure()
+            raise
+        finally:
+            elapsed = int((time.perf_counter() - leg_start) * 1000)
+            if model == STT_MODEL:
+                hedge.primary_latency_ms = elapsed
+            else:
+                hedge.fallback_latency_ms = elapsed
+
+    if breaker.allow():
+        tasks = {asyncio.create_task(leg(STT_MODEL)): STT_MODEL}
+    else:
+        # The primary keeps rejecting this format: skip straight to the fallback
+        log_event(
+            level="info",
+            event="stt_breaker_open",
+            message=f"STT breaker open for {breaker.name}, using {STT_FALLBACK_MODEL}",
+            **log_context,
+        )
+        tasks = {asyncio.create_task(leg(STT_FALLBACK_MODEL)): STT_FALLBACK_MODEL}
+    errors = {}
+    try:
+        while True:
+            fallback_started = STT_FALLBACK_MODEL in tasks.values() or STT_FALLBACK_MODEL in errors
+            wake_at = deadline if fallback_started else min(hedge_at, deadline)
+            done = set()
+            if tasks:
+                done, _ = await asyncio.wait(
+                    tasks, timeout=max(wake_at - time.perf_counter(), 0), return_when=asyncio.FIRST_COMPLETED,
+                )
+            for task in done:
+                model = tasks.pop(task)
+                try:
+                    response = task.result()
+                except provider_limits.ProviderBusyError:
+                    if not fallback_started:
+                        raise  # the fallback would queue on the same saturated limiter
+                    errors[model] = sys.exc_info()[1]
+                    continue
+                except Exception as e:
+                    errors[model] = e
+                    continue
+                hedge.winner = model
+                if model == STT_MODEL:
+                    record_stt_latency(hedge.primary_latency_ms, audio_seconds)
+                return response
+
+            if not tasks and fallback_started:
+                raise errors.get(STT_FALLBACK_MODEL) or errors[STT_MODEL]
+            if time.perf_counter() >= deadline:
+                raise TimeoutError(f"STT did not finish within {settings.stt_deadline_seconds}s")
+            if not fallback_started and (errors or time.perf_counter() >= hedge_at):
+                hedge.hedged = not errors
+                primary_error = errors.get(STT_MODEL)
+                log_event(
+                    level="warning",
+                    event="stt_fallback" if primary_error else "stt_hedge",
+                    message=(
+                        f"Primary STT failed ({STT_MODEL}), falling back to {STT_FALLBACK_MODEL}: {primary_error}"
+                        if primary_error else
+                        f"Primary STT ({STT_MODEL}) slow, hedging with {STT_FALLBACK_MODEL}"
+                    ),
+                    **log_context,
+                )
+                tasks[asyncio.create_task(leg(STT_FALLBACK_MODEL))] = STT_FALLBACK_MODEL
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if STT_MODEL in tasks.values() and hedge.primary_latency_ms is not None:
+                # A cancelled slow primary still tells us its latency was at least this
+                record_stt_latency(hedge.primary_latency_ms, audio_seconds)
+            if STT_FALLBACK_MODEL in tasks.values():
+                hedge.fallback_latency_ms = None
+
+
 async def transcribe_audio(
     audio_bytes: bytes,
     filename: str,
@@ -39,6 +253,35 @@ async def transcribe_audio(
     user_id: Optional[str] = None,
     db: Session = None,
     learning_phase: Optional[str] = None
+) -> str:
+    """Transcribe audio; identical concurrent uploads (a client retrying while the
+    first attempt is still running) share one transcription. Only the call that
+    ran writes an STTRequest row."""
+    key = sha256_hash(b"\0".join([audio_bytes, (prompt or "").encode(), (language or "").encode()]))
+    transcript, shared = await _stt_flight.do(key, lambda: _transcribe_audio(
+        audio_bytes, filename, prompt, language, request_id, user_id, db, learning_phase,
+    ))
+    if shared:
+        log_event(
+            level="info",
+            event="stt_coalesced",
+            message="STT request joined an identical in-flight transcription",
+            request_id=request_id or "unknown",
+            user_id=str(user_id) if user_id else None,
+            extra={"flight_key": key},
+        )
+    return transcript
+
+
+async def _transcribe_audio(
+    audio_bytes: bytes,
+    filename: str,
+    prompt: Optional[str] = None,
+    language: Optional[str] = None,
+    request_id: str = None,
+    user_id: Optional[str] = None,
+    db: Session = None,
+    learning_phase: Optional[str] = None
 ) -> str:
     """
     Transcribe audio using OpenAI STT with full logging.
@@ -58,11 +301,23 @@ async def transcribe_audio(
     start_time = time.time()
     stt_request_id = uuid.uuid4()
     
-    # Detect audio format from filename
-    audio_format = filename.split(".")[-1].lower() if "." in filename else "mp3"
-    
     # Calculate hash
     audio_sha256 = sha256_hash(audio_bytes)
+
+    # Duration from the container headers (None if the format isn't recognised)
+    audio_seconds = audio_duration_seconds(audio_bytes)
+    if audio_seconds is not None and audio_seconds > settings.stt_max_audio_seconds:
+        metrics.increment("stt_rejected_too_long")
+        raise AudioTooLongError(audio_seconds, settings.stt_max_audio_seconds)
+
+    # Optional mono/16 kHz/silence-trimmed re-encode (no-op unless enabled)
+    upload_bytes = len(audio_bytes)
+    prepared = await preprocess_for_stt(audio_bytes, filename)
+    if prepared.changed:
+        audio_bytes, filename, audio_seconds = prepared.audio_bytes, prepared.filename, prepared.speech_seconds
+
+    # Detect audio format from filename
+    audio_format = filename.split(".")[-1].lower() if "." in filename else "mp3"
     
     # Convert user_id to UUID if string
     user_id_uuid = None
@@ -84,6 +339,7 @@ async def transcribe_audio(
             audio_sha256=audio_sha256,
             audio_bytes=len(audio_bytes),
             audio_format=audio_format,
+            audio_seconds=audio_seconds,
             language=language,
             success=False
         )
@@ -97,8 +353,13 @@ async def transcribe_audio(
         "model": STT_MODEL,
         "audio_format": audio_format,
         "audio_bytes": len(audio_bytes),
+        "audio_seconds": audio_seconds,
         "language": language,
     }
+    if prepared.changed:
+        extra["upload_bytes"] = upload_bytes
+        extra["trimmed_seconds"] = prepared.trimmed_seconds
+        extra["preprocess_ms"] = prepared.preprocess_ms
     if learning_phase:
         extra["learning_phase"] = learning_phase
     log_event(
@@ -110,54 +371,25 @@ async def transcribe_audio(
         extra=extra
     )
     
+    hedge = STTHedge()
     try:
-        # Call OpenAI STT
-        client = get_client()
-        audio_file = io.BytesIO(audio_bytes)
-        audio_file.name = filename
-
-        params = {
-            "model": STT_MODEL,
-            "file": audio_file,
-        }
-
-        if language:
-            params["language"] = language
-        if prompt:
-            params["prompt"] = prompt
-
-        try:
-            transcript_response = client.audio.transcriptions.create(**params)
-        except Exception as primary_err:
-            # Fallback to whisper-1 if gpt-4o-mini-transcribe rejects the audio format
-            log_event(
-                level="warning",
-                event="stt_fallback",
-                message=f"Primary STT failed ({STT_MODEL}), falling back to whisper-1: {primary_err}",
-                request_id=request_id or "unknown",
-                user_id=str(user_id) if user_id else None,
+        if audio_seconds is not None and audio_seconds < settings.stt_min_audio_seconds:
+            # Too short to hold a word: skip the provider round-trip
+            metrics.increment("stt_skipped_short_clips")
+            transcript_text = ""
+        else:
+            # Call OpenAI STT (primary, hedged with the fallback model when slow or failing)
+            transcript_response = await _hedged_transcribe(
+                audio_bytes, filename, audio_format, audio_seconds, prompt, language, hedge,
+                log_context={"request_id": request_id or "unknown", "user_id": str(user_id) if user_id else None},
             )
-            audio_file_retry = io.BytesIO(audio_bytes)
-            audio_file_retry.name = filename
-            retry_params = {"model": "whisper-1", "file": audio_file_retry}
-            if language:
-                retry_params["language"] = language
-            if prompt:
-                retry_params["prompt"] = prompt
-            transcript_response = client.audio.transcriptions.create(**retry_params)
-
-        transcript_text = transcript_response.text
+            transcript_text = transcript_response.text
         
         # Calculate latency
         latency_ms = int((time.time() - start_time) * 1000)
         
-        # Estimate cost (Whisper: $0.006 per minute)
-        # Rough estimate: assume 1 minute per 1MB of audio
-        estimated_cost = None
-        if len(audio_bytes) > 0:
-            # Very rough estimate - actual duration would require audio analysis
-            estimated_minutes = len(audio_bytes) / (1024 * 1024)  # Assume 1MB = 1 minute
-            estimated_cost = estimated_minutes * 0.006
+        # Estimate cost from the measured duration and the model that answered
+        estimated_cost = estimate_stt_cost(hedge.winner, audio_seconds, len(audio_bytes))
         
         # Update record with success
         if db and stt_record:
@@ -166,14 +398,20 @@ async def transcribe_audio(
             stt_record.output_json = {"text": transcript_text}
             stt_record.latency_ms = latency_ms
             stt_record.estimated_cost = estimated_cost
+            _apply_hedge(stt_record, hedge)
+            if hedge.winner:
+                record_ai_request(db, "stt", hedge.winner, True, latency_ms, estimated_cost, learning_phase=learning_phase)
             db.commit()
         
         # Log success event
         extra_success = {
             "provider": PROVIDER,
-            "model": STT_MODEL,
+            "model": hedge.winner,
+            "hedged": hedge.hedged,
+            "primary_latency_ms": hedge.primary_latency_ms,
+            "fallback_latency_ms": hedge.fallback_latency_ms,
             "latency_ms": latency_ms,
-            "audio_seconds": None,  # Would need audio analysis
+            "audio_seconds": audio_seconds,
             "output_chars": len(transcript_text),
             "estimated_cost": estimated_cost,
             "success": True,
@@ -205,12 +443,17 @@ async def transcribe_audio(
             stt_record.latency_ms = latency_ms
             stt_record.error_code = error_code
             stt_record.error_message = error_message
+            _apply_hedge(stt_record, hedge)
+            record_ai_request(db, "stt", STT_MODEL, False, latency_ms, learning_phase=learning_phase)
             db.commit()
         
         # Log failure event
         extra_failure = {
             "provider": PROVIDER,
             "model": STT_MODEL,
+            "hedged": hedge.hedged,
+            "primary_latency_ms": hedge.primary_latency_ms,
+            "fallback_latency_ms": hedge.fallback_latency_ms,
             "latency_ms": latency_ms,
             "error_code": error_code,
             "error_message": error_message,
@@ -240,6 +483,40 @@ async def synthesize_speech(
     user_id: Optional[str] = None,
     db: Session = None,
     learning_phase: Optional[str] = None
+) -> str:
+    """Synthesize speech to output_path. Concurrent requests for the same text,
+    voice, instructions and format (many users opening the same encounter) share
+    one TTS call; the others get a copy of its file. Only the call that ran
+    writes a TTSRequest row."""
+    output_format = output_path.split(".")[-1].lower() if "." in output_path else "mp3"
+    key = sha256_hash("\0".join([TTS_MODEL, voice, instructions or "", output_format, text]).encode("utf-8"))
+    produced_path, shared = await _tts_flight.do(key, lambda: _synthesize_speech(
+        text, output_path, voice, instructions, request_id, user_id, db, learning_phase,
+    ))
+    if shared and produced_path != output_path:
+        await asyncio.to_thread(shutil.copyfile, produced_path, output_path)
+        audio_cache.register(output_path)
+    if shared:
+        log_event(
+            level="info",
+            event="tts_coalesced",
+            message="TTS request joined an identical in-flight synthesis",
+            request_id=request_id or "unknown",
+            user_id=str(user_id) if user_id else None,
+            extra={"flight_key": key},
+        )
+    return output_path
+
+
+async def _synthesize_speech(
+    text: str,
+    output_path: str,
+    voice: str = "alloy",
+    instructions: Optional[str] = None,
+    request_id: str = None,
+    user_id: Optional[str] = None,
+    db: Session = None,
+    learning_phase: Optional[str] = None
 ) -> str:
     """
     Synthesize speech using OpenAI TTS with full logging.
@@ -317,14 +594,20 @@ async def synthesize_speech(
         tts_kwargs = dict(model=TTS_MODEL, voice=voice, input=text)
         if instructions:
             tts_kwargs["instructions"] = instructions
-        response = client.audio.speech.create(**tts_kwargs)
-        
+
+        def _synthesize() -> int:
+            # The response body streams, so the download runs in the worker thread too
+            response = client.audio.speech.create(**tts_kwargs)
+            written = 0
+            with open(output_path, "wb") as f:
+                for chunk in response.iter_bytes():
+                    f.write(chunk)
+                    written += len(chunk)
+            return written
+
         # Save to file and get size
-        audio_bytes_written = 0
-        with open(output_path, "wb") as f:
-            for chunk in response.iter_bytes():
-                f.write(chunk)
-                audio_bytes_written += len(chunk)
+        audio_bytes_written = await provider_limits.call("tts", _synthesize)
+        audio_cache.register(output_path, audio_bytes_written)
         
         # Calculate latency
         latency_ms = int((time.time() - start_time) * 1000)
@@ -339,6 +622,7 @@ async def synthesize_speech(
             tts_record.audio_path = output_path
             tts_record.latency_ms = latency_ms
             tts_record.estimated_cost = estimated_cost
+            record_ai_request(db, "tts", TTS_MODEL, True, latency_ms, estimated_cost, learning_phase=learning_phase)
             db.commit()
         
         # Log success event
@@ -377,6 +661,7 @@ async def synthesize_speech(
             tts_record.latency_ms = latency_ms
             tts_record.error_code = error_code
             tts_record.error_message = error_message
+            record_ai_request(db, "tts", TTS_MODEL, False, latency_ms, learning_phase=learning_phase)
             db.commit()
         
         # Log failure event
@@ -3,6 +3,7 @@ from typing import AsyncGenerator, List, Dict, Union
 import json
 import io
 from app.config import settings
+from app.services import audio_cache
 
 MODEL = "gpt-4.1-mini"
 
@@ -97,6 +98,7 @@ async def generate_speech(text: str, output_path: str) -> str:
     with open(output_path, "wb") as f:
         for chunk in response.iter_bytes():
             f.write(chunk)
+    audio_cache.register(output_path)
     
     return output_path
 
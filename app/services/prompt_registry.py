@@ -0,0 +1,185 @@
+"""In-memory registry of prompt templates from app/prompts/prompts.json.
+
+Templates are loaded and validated once (at startup, or on first use), parsed
+into literal/field parts, and served from memory:
+
+    template = get_registry().get("conversation_agent_beginner")
+    prompt = template.render(ai_role=..., user_role=..., situation_description=..., language=...)
+
+Hot reload: at most every settings.prompt_reload_interval_seconds a lookup
+stats the file; if its mtime or size changed, the file is reloaded. A file that
+fails validation is rejected and the last good templates keep serving. Every
+successful load bumps `version`, which callers can use as a cache key.
+
+Metrics: prompt_registry_reloads, prompt_registry_reload_errors,
+prompt_registry_version, prompt_lookup_ms.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from string import Formatter
+from typing import Dict, FrozenSet, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+from app.core import metrics
+from app.core.logger import log_event
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_PATH = Path(__file__).parent.parent / "prompts" / "prompts.json"
+
+
+class PromptValidationError(ValueError):
+    """prompts.json (or one of its templates) is malformed."""
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    agent_id: str
+    prompt_version: str
+    content: str
+    fields: FrozenSet[str]
+    # (literal_text, field_name or None) pairs, precomputed from the content
+    parts: Tuple[Tuple[str, Optional[str]], ...]
+
+    def render(self, **values) -> str:
+        """Fill in the template; equivalent to content.format(**values)."""
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Prompt '{self.agent_id}' missing values for: {', '.join(sorted(missing))}")
+        return "".join(literal + (str(values[name]) if name is not None else "") for literal, name in self.parts)
+
+
+def compile_template(agent_id: str, entry: dict) -> PromptTemplate:
+    """Validate one prompts.json entry and precompile its format fields."""
+    if not isinstance(entry, dict) or not isinstance(entry.get("content"), str) or not entry["content"].strip():
+        raise PromptValidationError(f"Prompt '{agent_id}' must be an object with non-empty 'content'")
+    content = entry["content"]
+
+    try:
+        parsed = list(Formatter().parse(content))
+    except ValueError as e:
+        raise PromptValidationError(f"Prompt '{agent_id}' has invalid placeholders: {e}") from e
+
+    parts = []
+    for literal, field_name, format_spec, conversion in parsed:
+        if field_name is not None:
+            if not field_name.isidentifier():
+                raise PromptValidationError(f"Prompt '{agent_id}' has unsupported placeholder '{{{field_name}}}'")
+            if format_spec or conversion:
+                raise PromptValidationError(f"Prompt '{agent_id}' placeholder '{field_name}' must not use a format spec")
+        parts.append((literal, field_name))
+
+    return PromptTemplate(
+        agent_id=agent_id,
+        prompt_version=str(entry.get("prompt_version", "v1")),
+        content=content,
+        fields=frozenset(name for _, name in parts if name is not None),
+        parts=tuple(parts),
+    )
+
+
+class PromptRegistry:
+    def __init__(self, path: Path = PROMPTS_PATH, reload_interval: Optional[float] = None):
+        from app.config import settings
+
+        self.path = Path(path)
+        self.reload_interval = settings.prompt_reload_interval_seconds if reload_interval is None else reload_interval
+        self.version = 0
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._signature: Optional[Tuple[int, int]] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _file_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> None:
+        """(Re)load and validate the whole file; raises PromptValidationError and keeps the old templates."""
+        with self._lock:
+            signature = self._file_signature()
+            try:
+                with open(self.path, "r") as f:
+                    raw = json.load(f)
+            except ValueError as e:
+                raise PromptValidationError(f"{self.path.name} is not valid JSON: {e}") from e
+            if not isinstance(raw, dict) or not raw:
+                raise PromptValidationError(f"{self.path.name} must be a non-empty object")
+
+            self._templates = {agent_id: compile_template(agent_id, entry) for agent_id, entry in raw.items()}
+            self._signature = signature
+            self._last_check = time.monotonic()
+            self.version += 1
+
+        metrics.increment("prompt_registry_reloads")
+        metrics.set_gauge("prompt_registry_version", self.version)
+        log_event(
+            level="info",
+            event="prompt_registry_reload",
+            message=f"Loaded {len(self._templates)} prompt templates (version {self.version})",
+            request_id="system",
+            extra={"prompt_registry_version": self.version, "templates": sorted(self._templates)},
+        )
+
+    def _maybe_reload(self) -> None:
+        if self.version == 0:
+            self.load()
+            return
+        if self.reload_interval < 0 or time.monotonic() - self._last_check < self.reload_interval:
+            return
+        self._last_check = time.monotonic()
+        try:
+            if self._file_signature() == self._signature:
+                return
+            self.load()
+        except (OSError, PromptValidationError) as e:
+            # Keep serving the last good templates; don't retry until the file changes again
+            try:
+                self._signature = self._file_signature()
+            except OSError:
+                pass
+            metrics.increment("prompt_registry_reload_errors")
+            logger.error(f"[Prompts] Reload rejected, keeping version {self.version}: {e}")
+
+    def get(self, agent_id: str) -> PromptTemplate:
+        start = time.perf_counter()
+        self._maybe_reload()
+        template = self._templates.get(agent_id)
+        metrics.observe("prompt_lookup_ms", (time.perf_counter() - start) * 1000)
+        if template is None:
+            raise ValueError(f"Agent ID '{agent_id}' not found in prompts.json")
+        return template
+
+    def current_version(self) -> int:
+        """Registry version after any pending hot reload (for cache keys)."""
+        self._maybe_reload()
+        return self.version
+
+    def agent_ids(self):
+        self._maybe_reload()
+        return sorted(self._templates)
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> PromptRegistry:
+    """Process-wide registry, created (and loaded) on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry()
+    return _registry
+
+
+def load_prompt_registry() -> PromptRegistry:
+    """Load templates eagerly (startup), so a broken prompts.json fails loudly at boot."""
+    registry = get_registry()
+    registry.load()
+    return registry
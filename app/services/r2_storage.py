@@ -0,0 +1,158 @@
+"""R2 (S3-compatible) uploads straight from memory.
+
+    url = upload_bytes_sync("initial_msg_x.mp3", mp3_bytes)       # scripts / worker threads
+    exists = object_exists("initial_msg_x.mp3")                   # HEAD
+
+No request handler uploads to R2: opening audio is pregenerated by
+scripts/pregenerate_initial_audio.py, and TTS replies are streamed or served
+from /tmp/audio. Uploads are blocking and meant for scripts and worker threads.
+
+All calls share one boto3 client whose connection pool is sized by
+r2_max_pool_connections; botocore retries throttling, 5xx and connection errors
+(r2_max_attempts, "standard" mode). Objects of r2_multipart_threshold_bytes or
+more go up as multipart uploads in r2_multipart_part_bytes parts, aborted on
+failure so no orphaned parts are billed.
+
+Failures return None, like upload_to_r2(): callers fall back to local audio.
+"""
+from typing import Dict, List, Optional
+import logging
+import threading
+import time
+
+from app.config import settings
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+MIN_PART_BYTES = 5 * 1024 * 1024  # S3 minimum for every part but the last
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """Shared boto3 S3 client for R2, or None when R2 isn't configured."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if not settings.r2_endpoint_url:
+                return None
+            import boto3
+            from botocore.config import Config
+            _client = boto3.client(
+                "s3",
+                endpoint_url=settings.r2_endpoint_url,
+                aws_access_key_id=settings.r2_access_key_id,
+                aws_secret_access_key=settings.r2_secret_access_key,
+                region_name="auto",
+                config=Config(
+                    max_pool_connections=settings.r2_max_pool_connections,
+                    retries={"max_attempts": settings.r2_max_attempts, "mode": "standard"},
+                    tcp_keepalive=True,
+                ),
+            )
+        return _client
+
+
+def public_url(key: str) -> str:
+    return f"{settings.r2_public_url}/{key}"
+
+
+def _ready():
+    if not settings.r2_public_url:
+        logger.warning(f"[R2] Skipped upload — r2_public_url not configured (r2_endpoint_url={settings.r2_endpoint_url!r})")
+        return None
+    return get_s3_client()
+
+
+def _part_bytes() -> int:
+    return max(settings.r2_multipart_part_bytes, MIN_PART_BYTES)
+
+
+class _MultipartUpload:
+    def __init__(self, client, key: str, content_type: str):
+        self.client = client
+        self.key = key
+        self.upload_id = client.create_multipart_upload(
+            Bucket=settings.r2_bucket_name, Key=key, ContentType=content_type,
+        )["UploadId"]
+        self.parts: List[Dict] = []
+
+    def upload_part(self, data: bytes) -> None:
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=settings.r2_bucket_name, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=data,
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": number})
+
+    def complete(self) -> None:
+        self.client.complete_multipart_upload(
+            Bucket=settings.r2_bucket_name, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+
+    def abort(self) -> None:
+        try:
+            self.client.abort_multipart_upload(Bucket=settings.r2_bucket_name, Key=self.key, UploadId=self.upload_id)
+        except Exception as e:
+            logger.warning(f"[R2] Could not abort multipart upload of {self.key}: {e}")
+
+
+def _put(client, key: str, data: bytes, content_type: str) -> None:
+    if len(data) < settings.r2_multipart_threshold_bytes:
+        client.put_object(Bucket=settings.r2_bucket_name, Key=key, Body=data, ContentType=content_type)
+        return
+    upload = _MultipartUpload(client, key, content_type)
+    try:
+        part = _part_bytes()
+        for offset in range(0, len(data), part):
+            upload.upload_part(data[offset:offset + part])
+        upload.complete()
+    except Exception:
+        upload.abort()
+        raise
+
+
+def _uploaded(key: str, size: int, start: float, mode: str) -> str:
+    url = public_url(key)
+    metrics.increment("r2_upload", result="ok", mode=mode)
+    metrics.increment("r2_upload_bytes", size)
+    metrics.observe("r2_upload_ms", (time.perf_counter() - start) * 1000, mode=mode)
+    logger.info(f"[R2] Uploaded {key} ({size} bytes) → {url}")
+    return url
+
+
+def _failed(key: str, error: Exception, mode: str) -> None:
+    metrics.increment("r2_upload", result="error", mode=mode)
+    logger.error(f"[R2] Upload failed for {key}: {type(error).__name__}: {error}")
+
+
+def upload_bytes_sync(key: str, data: bytes, content_type: str = "audio/mpeg") -> Optional[str]:
+    """Blocking upload; the public URL, or None if R2 isn't configured or the upload failed."""
+    client = _ready()
+    if not client:
+        return None
+    start = time.perf_counter()
+    try:
+        _put(client, key, data, content_type)
+    except Exception as e:
+        _failed(key, e, "sync")
+        return None
+    return _uploaded(key, len(data), start, "sync")
+
+
+def object_exists(key: str) -> Optional[bool]:
+    """Whether the object is in the bucket (blocking HEAD); None if R2 isn't configured or the check failed."""
+    client = get_s3_client() if settings.r2_public_url else None
+    if not client:
+        return None
+    try:
+        client.head_object(Bucket=settings.r2_bucket_name, Key=key)
+        return True
+    except Exception as e:
+        status = getattr(e, "response", {}).get("Error", {}).get("Code")
+        if status in ("404", "NoSuchKey", "NotFound"):
+            return False
+        logger.warning(f"[R2] HEAD failed for {key}: {type(e).__name__}: {e}")
+        return None
@@ -3,28 +3,162 @@
 Uses WebSocket to get streamed text + audio in one call (~0.8s to first audio byte
 vs ~5s with separate LLM + TTS).
 
-Audio output is PCM16 24kHz mono, converted to MP3 via ffmpeg.
+Audio output is PCM16 24kHz mono, converted to MP3 by app/services/audio_encoder.py.
+
+Message layout is prompt-cache friendly: the first system message (+ the voice
+style, which only depends on the situation) becomes the session instructions,
+and everything else is sent as conversation items in order. Later system
+messages (running summary, per-turn guidance) therefore never change the
+instructions prefix shared by every turn and user of a situation.
+
+Warm sessions: prewarm_session() opens a socket and sends session.update ahead
+of time (next-encounter warm-up, app/services/warmup_service.py), then parks it
+keyed by a hash of (instructions, voice). stream_realtime() takes a parked
+socket with the same key instead of connecting. Parked sockets hold no
+"realtime" slot; at most realtime_warm_max_sessions are parked, each for up to
+realtime_warm_session_ttl_seconds.
 """
 
 import asyncio
 import base64
+import hashlib
 import json
 import logging
 import struct
-import subprocess
 import time
 import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 import websockets
+from websockets.protocol import State
 
 from app.config import settings
+from app.core import metrics, provider_limits
+from app.services import audio_cache, audio_encoder
 
 logger = logging.getLogger(__name__)
 
 REALTIME_MODEL = "gpt-4o-realtime-preview-2025-06-03"
 REALTIME_URL = f"wss://api.openai.com/v1/realtime?model={REALTIME_MODEL}"
+REALTIME_CONNECT_TIMEOUT_SECONDS = 10
+
+
+def session_instructions(system_prompt: str, tts_instructions: Optional[str]) -> str:
+    """Session instructions: the leading system prompt plus the voice style."""
+    if tts_instructions:
+        return f"{system_prompt}\n\n[Voice style: {tts_instructions}]"
+    return system_prompt
+
+
+def session_key(instructions: str, voice: str) -> str:
+    return hashlib.sha256(f"{voice}\n{instructions}".encode()).hexdigest()
+
+
+async def _open_session(instructions: str, voice: str):
+    """Connect and configure a Realtime session; the caller owns (and closes) the socket."""
+    headers = {
+        "Authorization": f"Bearer {settings.openai_api_key}",
+        "OpenAI-Beta": "realtime=v1",
+    }
+    ws = await asyncio.wait_for(
+        websockets.connect(REALTIME_URL, additional_headers=headers, close_timeout=5),
+        timeout=REALTIME_CONNECT_TIMEOUT_SECONDS,
+    )
+    try:
+        await ws.send(json.dumps({
+            "type": "session.update",
+            "session": {
+                "modalities": ["text", "audio"],
+                "voice": voice,
+                "instructions": instructions,
+                "output_audio_format": "pcm16",
+                "turn_detection": None,
+            }
+        }))
+    except BaseException:
+        await ws.close()
+        raise
+    return ws
+
+
+class _WarmSessions:
+    """Configured sockets waiting for their first turn, per session key (one event loop)."""
+
+    def __init__(self):
+        self._parked: Dict[str, List[Tuple[object, float]]] = {}
+
+    def count(self) -> int:
+        return sum(len(sockets) for sockets in self._parked.values())
+
+    def park(self, key: str, ws) -> bool:
+        if self.count() >= settings.realtime_warm_max_sessions:
+            return False
+        self._parked.setdefault(key, []).append((ws, time.monotonic()))
+        asyncio.get_running_loop().call_later(
+            settings.realtime_warm_session_ttl_seconds, lambda: self._expire(key, ws),
+        )
+        return True
+
+    def take(self, key: str):
+        """A parked open socket for key (most recent first), or None."""
+        sockets = self._parked.get(key, [])
+        while sockets:
+            ws, _ = sockets.pop()
+            if ws.state is State.OPEN:
+                if not sockets:
+                    self._parked.pop(key, None)
+                return ws
+            metrics.increment("realtime_warm_session", result="closed")
+        self._parked.pop(key, None)
+        return None
+
+    def _expire(self, key: str, ws) -> None:
+        sockets = self._parked.get(key, [])
+        for i, (parked, _) in enumerate(sockets):
+            if parked is ws:
+                del sockets[i]
+                if not sockets:
+                    self._parked.pop(key, None)
+                metrics.increment("realtime_warm_session", result="expired")
+                asyncio.ensure_future(ws.close())
+                return
+
+    async def close_all(self) -> None:
+        parked, self._parked = self._parked, {}
+        for sockets in parked.values():
+            for ws, _ in sockets:
+                await ws.close()
+
+
+_warm_sessions = _WarmSessions()
+
+
+async def prewarm_session(system_prompt: str, voice: str = "shimmer", tts_instructions: Optional[str] = None) -> bool:
+    """Open and park a session for a first turn with this system prompt and voice.
+
+    Returns False (without connecting) when the parking lot is full. Connection
+    errors propagate.
+    """
+    if _warm_sessions.count() >= settings.realtime_warm_max_sessions:
+        metrics.increment("realtime_warm_session", result="full")
+        return False
+    instructions = session_instructions(system_prompt, tts_instructions)
+    ws = await _open_session(instructions, voice)
+    if not _warm_sessions.park(session_key(instructions, voice), ws):
+        await ws.close()
+        metrics.increment("realtime_warm_session", result="full")
+        return False
+    metrics.increment("realtime_warm_session", result="parked")
+    return True
+
+
+def warm_session_count() -> int:
+    return _warm_sessions.count()
+
+
+async def close_warm_sessions() -> None:
+    await _warm_sessions.close_all()
 
 
 async def generate_with_realtime(
@@ -71,125 +205,155 @@ async def stream_realtime(
     Yields dicts:
         {"type": "audio", "data": bytes, "elapsed_ms": int}  — PCM16 24kHz mono chunk
         {"type": "text", "text": str, "elapsed_ms": int}      — full transcript (when complete)
-        {"type": "done", "elapsed_ms": int}
-    """
-    headers = {
-        "Authorization": f"Bearer {settings.openai_api_key}",
-        "OpenAI-Beta": "realtime=v1",
-    }
+        {"type": "done", "elapsed_ms": int, "usage": dict | None}  — usage as reported in response.done
 
+    Holds a "realtime" provider slot for the whole stream (ProviderBusyError when saturated).
+    Uses a parked warm session with the same instructions and voice when there is one.
+    """
     t0 = time.time()
     full_text = ""
 
-    # Extract system prompt from messages
+    # The leading system prompt becomes the instructions; later system messages stay in place as items
     system_content = ""
-    conversation_items = []
-    for msg in messages:
-        if msg["role"] == "system":
-            system_content = msg["content"]
-        else:
-            conversation_items.append(msg)
-
-    if tts_instructions:
-        system_content += f"\n\n[Voice style: {tts_instructions}]"
-
-    try:
-        async with websockets.connect(REALTIME_URL, additional_headers=headers, close_timeout=5) as ws:
-            logger.info(f"[Realtime] Connected in {int((time.time()-t0)*1000)}ms (request={request_id})")
-
-            await ws.send(json.dumps({
-                "type": "session.update",
-                "session": {
-                    "modalities": ["text", "audio"],
-                    "voice": voice,
-                    "instructions": system_content,
-                    "output_audio_format": "pcm16",
-                    "turn_detection": None,
-                }
-            }))
-
-            for item in conversation_items:
-                role = item["role"]
-                content = item["content"]
-                if role == "assistant":
-                    await ws.send(json.dumps({
-                        "type": "conversation.item.create",
-                        "item": {"type": "message", "role": "assistant",
-                                 "content": [{"type": "text", "text": content}]},
-                    }))
-                elif role == "user":
-                    await ws.send(json.dumps({
-                        "type": "conversation.item.create",
-                        "item": {"type": "message", "role": "user",
-                                 "content": [{"type": "input_text", "text": content}]},
-                    }))
-
-            await ws.send(json.dumps({"type": "response.create"}))
-
-            text_sent = False
-            while True:
-                msg = await asyncio.wait_for(ws.recv(), timeout=30)
-                event = json.loads(msg)
-                event_type = event.get("type", "")
-                elapsed_ms = int((time.time() - t0) * 1000)
-
-                # Log all event types for debugging
-                if event_type not in ("response.audio.delta", "response.audio_transcript.delta"):
-                    logger.info(f"[Realtime] Event: {event_type} at {elapsed_ms}ms")
-
-                if event_type == "response.audio.delta":
-                    chunk = base64.b64decode(event.get("delta", ""))
-                    yield {"type": "audio", "data": chunk, "elapsed_ms": elapsed_ms}
-
-                elif event_type == "response.audio_transcript.delta":
-                    full_text += event.get("delta", "")
-
-                elif event_type == "response.audio_transcript.done":
-                    # Use the transcript from this event if available, else use accumulated
-                    done_text = event.get("transcript", full_text)
-                    if done_text:
-                        full_text = done_text
-                    if full_text and not text_sent:
-                        yield {"type": "text", "text": full_text, "elapsed_ms": elapsed_ms}
-                        text_sent = True
-
-                elif event_type == "response.done":
-                    # Always send text if not sent yet
-                    if not text_sent and full_text:
-                        yield {"type": "text", "text": full_text, "elapsed_ms": elapsed_ms}
-                        text_sent = True
-                    yield {"type": "done", "elapsed_ms": elapsed_ms}
-                    break
-
-                elif event_type == "error":
-                    error_msg = event.get("error", {}).get("message", str(event))
-                    logger.error(f"[Realtime] Error: {error_msg}")
-                    raise RuntimeError(f"Realtime API error: {error_msg}")
-
-    except websockets.exceptions.ConnectionClosed as e:
-        logger.error(f"[Realtime] WebSocket closed: {e}")
-        raise
+    conversation_items = list(messages)
+    if conversation_items and conversation_items[0]["role"] == "system":
+        system_content = conversation_items.pop(0)["content"]
+    system_content = session_instructions(system_content, tts_instructions)
+
+    async with provider_limits.slot("realtime"):
+        try:
+            ws = _warm_sessions.take(session_key(system_content, voice))
+            if ws is not None:
+                metrics.increment("realtime_warm_session", result="used")
+                logger.info(f"[Realtime] Using warm session (request={request_id})")
+            else:
+                ws = await _open_session(system_content, voice)
+                logger.info(f"[Realtime] Connected in {int((time.time()-t0)*1000)}ms (request={request_id})")
+
+            async with ws:
+                for item in conversation_items:
+                    role = item["role"]
+                    content = item["content"]
+                    if role == "assistant":
+                        await ws.send(json.dumps({
+                            "type": "conversation.item.create",
+                            "item": {"type": "message", "role": "assistant",
+                                     "content": [{"type": "text", "text": content}]},
+                        }))
+                    elif role in ("user", "system"):
+                        await ws.send(json.dumps({
+                            "type": "conversation.item.create",
+                            "item": {"type": "message", "role": role,
+                                     "content": [{"type": "input_text", "text": content}]},
+                        }))
+
+                await ws.send(json.dumps({"type": "response.create"}))
+
+                text_sent = False
+                while True:
+                    msg = await asyncio.wait_for(ws.recv(), timeout=30)
+                    event = json.loads(msg)
+                    event_type = event.get("type", "")
+                    elapsed_ms = int((time.time() - t0) * 1000)
+
+                    # Log all event types for debugging
+                    if event_type not in ("response.audio.delta", "response.audio_transcript.delta"):
+                        logger.info(f"[Realtime] Event: {event_type} at {elapsed_ms}ms")
+
+                    if event_type == "response.audio.delta":
+                        chunk = base64.b64decode(event.get("delta", ""))
+                        yield {"type": "audio", "data": chunk, "elapsed_ms": elapsed_ms}
+
+                    elif event_type == "response.audio_transcript.delta":
+                        full_text += event.get("delta", "")
+
+                    elif event_type == "response.audio_transcript.done":
+                        # Use the transcript from this event if available, else use accumulated
+                        done_text = event.get("transcript", full_text)
+                        if done_text:
+                            full_text = done_text
+                        if full_text and not text_sent:
+                            yield {"type": "text", "text": full_text, "elapsed_ms": elapsed_ms}
+                            text_sent = True
+
+                    elif event_type == "response.done":
+                        # Always send text if not sent yet
+                        if not text_sent and full_text:
+                            yield {"type": "text", "text": full_text, "elapsed_ms": elapsed_ms}
+                            text_sent = True
+                        usage = (event.get("response") or {}).get("usage")
+                        yield {"type": "done", "elapsed_ms": elapsed_ms, "usage": usage}
+                        break
+
+                    elif event_type == "error":
+                        error_msg = event.get("error", {}).get("message", str(event))
+                        logger.error(f"[Realtime] Error: {error_msg}")
+                        raise RuntimeError(f"Realtime API error: {error_msg}")
+
+        except websockets.exceptions.ConnectionClosed as e:
+            logger.error(f"[Realtime] WebSocket closed: {e}")
+            raise
 
     total_ms = int((time.time() - t0) * 1000)
     logger.info(f"[Realtime] Stream done: {total_ms}ms (request={request_id})")
 
 
-def pcm16_to_mp3(pcm_bytes: bytes, output_path: str, sample_rate: int = 24000):
-    """Convert raw PCM16 audio to MP3 using ffmpeg."""
-    result = subprocess.run(
-        [
-            "ffmpeg", "-y",
-            "-f", "s16le",           # raw PCM16
-            "-ar", str(sample_rate), # 24kHz
-            "-ac", "1",              # mono
-            "-i", "pipe:0",          # stdin
-            "-codec:a", "libmp3lame",
-            "-b:a", "64k",           # 64kbps (plenty for speech)
-            output_path,
-        ],
-        input=pcm_bytes,
-        capture_output=True,
-        timeout=10,
+def record_realtime_request(
+    db,
+    messages: list,
+    request_id: str,
+    user_id: Optional[str],
+    success: bool,
+    latency_ms: int,
+    text: Optional[str] = None,
+    usage: Optional[dict] = None,
+    error: Optional[Exception] = None,
+    context_tokens_before: Optional[int] = None,
+    context_tokens_after: Optional[int] = None,
+    learning_phase: Optional[str] = None,
+    agent_id: str = "conversation_agent",
+    prompt_version: Optional[str] = None,
+) -> None:
+    """Log one Realtime turn to llm_requests (+ hourly rollup). Caller commits."""
+    import uuid
+    from app.models import LLMRequest
+    from app.services.ai_rollup_service import record_ai_request
+    from app.services.llm_message_store import store_messages
+
+    usage = usage or {}
+    tokens_in = usage.get("input_tokens")
+    cached_tokens = (usage.get("input_token_details") or {}).get("cached_tokens")
+    db.add(LLMRequest(
+        request_id=request_id,
+        user_id=uuid.UUID(str(user_id)) if user_id else None,
+        provider="openai",
+        model=REALTIME_MODEL,
+        prompt_version=prompt_version,
+        agent_id=agent_id,
+        message_hashes=store_messages(db, messages),
+        success=success,
+        response_json={"text": text} if text is not None else None,
+        latency_ms=latency_ms,
+        tokens_in=tokens_in,
+        tokens_out=usage.get("output_tokens"),
+        cached_tokens=cached_tokens,
+        context_tokens_before=context_tokens_before,
+        context_tokens_after=context_tokens_after,
+        error_code=type(error).__name__ if error else None,
+        error_message=str(error) if error else None,
+    ))
+    record_ai_request(
+        db, "llm", REALTIME_MODEL, success, latency_ms, agent_id=agent_id, learning_phase=learning_phase,
+        tokens_in=tokens_in, cached_tokens=cached_tokens,
     )
-    if result.returncode != 0:
-        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode()[:200]}")
+
+
+def pcm16_to_mp3(pcm_bytes: bytes, output_path: str, sample_rate: int = 24000):
+    """Convert raw PCM16 audio to an MP3 file (warm encoder, no per-clip ffmpeg startup).
+
+    Async callers should use audio_encoder.encode_stream() to encode while the
+    Realtime audio is still arriving.
+    """
+    mp3 = audio_encoder.encode_pcm_sync(pcm_bytes, "mp3", sample_rate)
+    Path(output_path).write_bytes(mp3)
+    audio_cache.register(output_path, len(mp3))
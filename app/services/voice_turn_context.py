@@ -0,0 +1,156 @@
+"""Per-conversation voice-turn context, cached per worker.
+
+Everything /voice-turn and /voice-turn/respond need that does not change from
+turn to turn:
+
+    situation       title, animation type, grammar config
+    words           target words in the locale's spelling, as WordViews
+    language_mode   from the encounter number and the user's vocab level
+    prompts         STT transcription prompt and the voice-turn system prompt
+    voice           TTS voice and instructions (the locale's accent)
+
+    context = get_voice_turn_context(db, conversation, get_locale(current_user))
+
+A miss costs at most two queries (target words, unless the word catalog has
+them; situation + vocab level), a hit none.
+Entries are kept in an LRU of voice_context_cache_size conversations for
+voice_context_ttl_seconds. An entry built for another locale or prompt
+registry version counts as a miss. Writes that change the vocab level or the
+user's words (refresh completion, onboarding placement, progress reset) call
+invalidate_user() after their commit. Which words have been used is not part of
+the context: that comes from the conversation row (record_used_words).
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import metrics
+from app.models import Conversation, Situation
+from app.services.locales import Locale
+from app.services.word_catalog import WordView, get_word_views
+
+
+@dataclass
+class VoiceTurnContext:
+    conversation_id: str
+    user_id: str
+    locale: Locale
+    prompt_version: int
+    situation_id: str
+    situation_title: str
+    animation_type: str
+    grammar_config: Optional[dict]
+    words: Tuple[WordView, ...]
+    vocab_level: int
+    language_mode: str
+    transcription_prompt: str
+    system_prompt: str
+    voice: str
+    tts_instructions: Optional[str]
+    created_at: float = field(default_factory=time.monotonic)
+
+    def words_by_ids(self, word_ids: List[str]) -> List[WordView]:
+        wanted = set(word_ids)
+        return [w for w in self.words if w.id in wanted]
+
+
+_cache: "OrderedDict[str, VoiceTurnContext]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _build(db: Session, conversation: Conversation, locale: Locale, prompt_version: int) -> VoiceTurnContext:
+    from app.data.grammar_situations import get_grammar_config
+    from app.services.lesson_bundle_service import vocab_level_subquery
+    from app.services.voice_turn_service import (
+        build_transcription_prompt, build_voice_system_prompt, get_language_mode,
+    )
+
+    catalan_mode = locale.catalan_mode
+    words = get_word_views(db, conversation.target_word_ids or [], catalan_mode)
+    row = db.execute(
+        select(Situation.title, Situation.animation_type, Situation.encounter_number,
+               vocab_level_subquery(conversation.user_id))
+        .where(Situation.id == conversation.situation_id)
+    ).first()
+    title, animation_type, encounter_number, vocab_level = row if row else ("a situation", "", 1, 0)
+
+    language_mode = locale.language_mode(get_language_mode(encounter_number, vocab_level))
+    voice, tts_instructions = locale.tts(animation_type)
+    return VoiceTurnContext(
+        conversation_id=str(conversation.id),
+        user_id=str(conversation.user_id),
+        locale=locale,
+        prompt_version=prompt_version,
+        situation_id=conversation.situation_id,
+        situation_title=title,
+        animation_type=animation_type or "",
+        grammar_config=get_grammar_config(conversation.situation_id),
+        words=tuple(words),
+        vocab_level=vocab_level,
+        language_mode=language_mode,
+        transcription_prompt=build_transcription_prompt(title, words, catalan_mode=catalan_mode),
+        system_prompt=build_voice_system_prompt(
+            conversation.situation_id, animation_type or "", language_mode, catalan_mode=catalan_mode,
+        ),
+        voice=voice,
+        tts_instructions=tts_instructions,
+    )
+
+
+def get_voice_turn_context(db: Session, conversation: Conversation, locale: Locale) -> VoiceTurnContext:
+    from app.services.prompt_registry import get_registry
+
+    key = str(conversation.id)
+    prompt_version = get_registry().current_version()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if (
+            cached is not None
+            and cached.locale.key == locale.key
+            and cached.prompt_version == prompt_version
+            and time.monotonic() - cached.created_at < settings.voice_context_ttl_seconds
+        ):
+            _cache.move_to_end(key)
+            metrics.increment("voice_context_cache", result="hit")
+            return cached
+
+    metrics.increment("voice_context_cache", result="miss")
+    context = _build(db, conversation, locale, prompt_version)
+    with _cache_lock:
+        _cache[key] = context
+        _cache.move_to_end(key)
+        while len(_cache) > settings.voice_context_cache_size:
+            _cache.popitem(last=False)
+    return context
+
+
+def invalidate_conversation(conversation_id) -> None:
+    with _cache_lock:
+        _cache.pop(str(conversation_id), None)
+
+
+def invalidate_user(user_id) -> int:
+    """Drop every cached context of the user's conversations; returns how many."""
+    user_id = str(user_id)
+    with _cache_lock:
+        stale = [key for key, context in _cache.items() if context.user_id == user_id]
+        for key in stale:
+            del _cache[key]
+    return len(stale)
+
+
+def clear_voice_context_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def voice_context_stats() -> Dict[str, float]:
+    """Metrics collector."""
+    with _cache_lock:
+        return {"voice_context_cache_size": len(_cache)}
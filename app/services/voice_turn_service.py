@@ -1,12 +1,24 @@
-from typing import List, Optional
-from app.models import Word, Situation
-from app.data.grammar_situations import get_grammar_config
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from app.models import Situation
+from app.services.word_catalog import WordView
+from app.data.grammar_situations import GRAMMAR_ANIMATION_TYPE, get_grammar_config
 from app.data.situation_roles import (
     get_roles_for_situation,
     get_grammar_structure,
     GRAMMAR_SCENE_MAP,
 )
 
+# Bounded memo sizes for the prompt builders below. System prompts are keyed by
+# (animation_type, situation_id, language_mode, catalan_mode) plus the prompt
+# registry version, so a prompts.json hot reload invalidates them. Role data is
+# static (app/data/situation_roles.py) and changes only with a deploy.
+SYSTEM_PROMPT_CACHE_SIZE = 4096
+TRANSCRIPTION_PROMPT_CACHE_SIZE = 2048
+
+# Language modes get_language_mode() currently produces; warmed at startup
+WARM_LANGUAGE_MODES = ("english",)
+
 
 def get_language_mode(encounter_number: int, vocab_level: int) -> str:
     """Derive language mode from encounter number (1-50) and vocab level.
@@ -37,9 +49,25 @@ def build_system_prompt(
 ) -> str:
     """Build the system prompt for conversation or grammar agents.
 
-    Uses role data from situation_roles.py and templates from prompts.json.
+    Uses role data from situation_roles.py and templates from the prompt registry.
+    Memoized; see _render_system_prompt.
     """
-    from app.services.llm_gateway import load_prompt
+    from app.services.prompt_registry import get_registry
+
+    args = (animation_type, situation_id, language_mode, catalan_mode, get_registry().current_version())
+    return _render_system_prompt(*args)
+
+
+@lru_cache(maxsize=SYSTEM_PROMPT_CACHE_SIZE)
+def _render_system_prompt(
+    animation_type: str,
+    situation_id: str,
+    language_mode: str,
+    catalan_mode: bool,
+    prompt_registry_version: int,
+) -> str:
+    """Uncached builder; prompt_registry_version only serves as a cache key part."""
+    from app.services.prompt_registry import get_registry
 
     language = "Catalan" if catalan_mode else "Spanish"
     roles = get_roles_for_situation(animation_type, situation_id)
@@ -50,9 +78,9 @@ def build_system_prompt(
 
     if grammar_struct:
         template_key = "grammar_agent_advanced" if advanced else "grammar_agent_beginner"
-        template = load_prompt(template_key, "v2")
+        template = get_registry().get(template_key)
         examples_text = "\n".join(f"- \"{ex}\"" for ex in grammar_struct["examples"])
-        return template.format(
+        return template.render(
             ai_role=roles["ai_role"],
             user_role=roles["user_role"],
             situation_description=roles["situation_description"],
@@ -62,8 +90,8 @@ def build_system_prompt(
         )
     else:
         template_key = "conversation_agent_advanced" if advanced else "conversation_agent_beginner"
-        template = load_prompt(template_key, "v2")
-        return template.format(
+        template = get_registry().get(template_key)
+        return template.render(
             ai_role=roles["ai_role"],
             user_role=roles["user_role"],
             situation_description=roles["situation_description"],
@@ -71,14 +99,19 @@ def build_system_prompt(
         )
 
 
-def build_transcription_prompt(situation_title: str, words: List[Word], catalan_mode: bool = False) -> str:
+def build_transcription_prompt(situation_title: str, words: List[WordView], catalan_mode: bool = False) -> str:
     """Build a context prompt for STT transcription (whisper-style format).
 
     Benchmark showed this format gives 0.997 accuracy + 100% Spanish word
     detection on gpt-4o-mini-transcribe, beating both whisper-1 and
     gpt-4o-transcribe.
     """
-    word_phrase_list = ", ".join([w.spanish for w in words])
+    return _render_transcription_prompt(situation_title, tuple(w.spanish for w in words), catalan_mode)
+
+
+@lru_cache(maxsize=TRANSCRIPTION_PROMPT_CACHE_SIZE)
+def _render_transcription_prompt(situation_title: str, spanish_words: Tuple[str, ...], catalan_mode: bool) -> str:
+    word_phrase_list = ", ".join(spanish_words)
     lang = "Catalan" if catalan_mode else "Spanish"
     return (
         f"This is a conversation about {situation_title}. "
@@ -87,6 +120,42 @@ def build_transcription_prompt(situation_title: str, words: List[Word], catalan_
     )
 
 
+def warm_prompt_cache() -> int:
+    """Precompute system prompts for every catalog situation and locale (startup). Returns the number built.
+
+    Goes through the same builders as the handlers: build_system_prompt for
+    conversation starts and lesson bundles, build_voice_system_prompt for voice
+    turns (grammar situations render there in their own language mode).
+    """
+    from app.data.seed_bank import SITUATIONS
+    from app.data.grammar_situations import GRAMMAR_SITUATIONS
+    from app.services.locales import LOCALES
+
+    targets = [(s["animation_type"], s["id"]) for s in SITUATIONS]
+    targets += [(GRAMMAR_ANIMATION_TYPE, situation_id) for situation_id in GRAMMAR_SITUATIONS]
+    # Dialects of a language share their prompts
+    variants = {
+        (locale.catalan_mode, locale.language_mode(mode)) for locale in LOCALES.values() for mode in WARM_LANGUAGE_MODES
+    }
+    for catalan_mode, language_mode in sorted(variants):
+        for animation_type, situation_id in targets:
+            build_system_prompt(animation_type, situation_id, language_mode, catalan_mode)
+            build_voice_system_prompt(situation_id, animation_type, language_mode, catalan_mode)
+    # Grammar voice turns add one prompt per variant in their own language mode
+    return (len(targets) + len(GRAMMAR_SITUATIONS)) * len(variants)
+
+
+def prompt_cache_stats() -> dict:
+    """Hit/miss gauges for /metrics."""
+    stats = {}
+    for name, fn in (("system_prompt_cache", _render_system_prompt), ("transcription_prompt_cache", _render_transcription_prompt)):
+        info = fn.cache_info()
+        stats[f"{name}_hits"] = info.hits
+        stats[f"{name}_misses"] = info.misses
+        stats[f"{name}_size"] = info.currsize
+    return stats
+
+
 # ── Legacy functions (kept for backward compatibility during transition) ──────
 
 def build_grammar_system_prompt(situation_id: str, catalan_mode: bool = False) -> Optional[str]:
@@ -95,7 +164,7 @@ def build_grammar_system_prompt(situation_id: str, catalan_mode: bool = False) -
     if not config:
         return None
     language_mode = "catalan_text" if catalan_mode else "spanish_text"
-    return build_system_prompt("grammar", situation_id, language_mode, catalan_mode)
+    return build_system_prompt(GRAMMAR_ANIMATION_TYPE, situation_id, language_mode, catalan_mode)
 
 
 def build_grammar_user_prompt(
@@ -126,9 +195,27 @@ def get_conversation_system_prompt(
     return build_system_prompt(animation_type, situation_id, language_mode, catalan_mode)
 
 
+def build_voice_system_prompt(
+    situation_id: str,
+    animation_type: str,
+    language_mode: str,
+    catalan_mode: bool = False,
+) -> str:
+    """System prompt of a voice turn (grammar prompt for grammar situations).
+
+    Also the Realtime session instructions prefix, so the next-encounter warm-up
+    (app/services/warmup_service.py) must build it the same way.
+    """
+    if get_grammar_config(situation_id):
+        return build_grammar_system_prompt(situation_id, catalan_mode=catalan_mode)
+    return get_conversation_system_prompt(
+        language_mode, catalan_mode=catalan_mode, animation_type=animation_type, situation_id=situation_id,
+    )
+
+
 def build_conversation_prompt(
     situation_title: str,
-    words: List[Word],
+    words: List[WordView],
     used_spoken_word_ids: List[str],
     user_transcript: str,
     catalan_mode: bool = False,
@@ -0,0 +1,202 @@
+"""Speculative warm-up of the next encounter, started when a situation is completed.
+
+POST /situations/{id}/complete returns next_situation_id; schedule_warmup() then
+prepares that encounter in the background so the lesson starts from warm caches:
+
+    word selection      computed now (own DB session) and handed to the lesson
+                        bundle by take_warm_selection() for warmup_ttl_seconds
+    prompts             system prompt (bundle and voice-turn variants) and the STT
+                        transcription prompt, into their memoized caches
+    initial audio       whether initial_msg_{id}.mp3 is in R2 (HEAD), remembered
+                        per situation; see initial_audio_available()
+    Realtime session    opened and configured with the voice-turn instructions,
+                        then parked for the first voice turn (realtime_service)
+
+Warm-ups are tasks on the event loop: at most one per user (a warm-up for a
+different situation cancels the previous one, the same situation is
+deduplicated) and at most warmup_max_concurrent per worker (further ones are
+skipped). cancel_warmup() and shutdown_warmup() cancel them. Failures are logged
+and counted as warmup{result=...}; they never reach the /complete response.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.core import metrics
+from app.services.locales import Locale, get_locale_for
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmLesson:
+    situation_id: str
+    word_ids: Optional[List[str]]  # None: the user already has a selection for the situation
+    system_prompt: str
+    voice: str
+    tts_instructions: Optional[str]
+    created_at: float = field(default_factory=time.monotonic)
+
+
+_tasks: Dict[str, Tuple[str, asyncio.Task]] = {}  # user id -> (situation id, warm-up task)
+_prepared: Dict[str, WarmLesson] = {}  # user id -> last prepared lesson
+_initial_audio: Dict[str, Tuple[bool, float]] = {}  # situation id -> (in R2, checked at)
+
+
+def _fresh(checked_at: float) -> bool:
+    return time.monotonic() - checked_at < settings.warmup_ttl_seconds
+
+
+def _prepare(user_id: str, situation_id: str, locale: Locale) -> Optional[WarmLesson]:
+    """Word selection and prompts for the lesson (blocking; opens its own DB session)."""
+    from app.database import SessionLocal
+    from app.models import Conversation
+    from app.services.lesson_bundle_service import _select_words, load_lesson_gate
+    from app.services.voice_turn_service import (
+        build_system_prompt, build_transcription_prompt, build_voice_system_prompt, get_language_mode,
+    )
+
+    catalan_mode = locale.catalan_mode
+    db = SessionLocal()
+    try:
+        gate = load_lesson_gate(db, user_id, situation_id)
+        if gate is None:
+            return None
+        situation = gate.situation
+        selected = db.query(Conversation.id).filter(
+            Conversation.user_id == user_id,
+            Conversation.situation_id == situation_id,
+            Conversation.mode == "text",
+            Conversation.target_word_ids.isnot(None),
+        ).first()
+        words = [] if selected else _select_words(db, user_id, situation, catalan_mode)
+        word_ids = None if selected else [w.id for w in words]
+
+        language_mode = locale.language_mode(get_language_mode(situation.encounter_number, gate.vocab_level))
+        build_system_prompt(situation.animation_type, situation.id, language_mode, catalan_mode=catalan_mode)
+        if words:
+            build_transcription_prompt(situation.title, words, catalan_mode=catalan_mode)
+        system_prompt = build_voice_system_prompt(
+            situation.id, situation.animation_type, language_mode, catalan_mode=catalan_mode,
+        )
+        voice, tts_instructions = locale.tts(situation.animation_type)
+        return WarmLesson(situation.id, word_ids, system_prompt, voice, tts_instructions)
+    finally:
+        db.close()
+
+
+async def _check_initial_audio(situation_id: str) -> None:
+    from app.services.r2_storage import object_exists
+
+    known = _initial_audio.get(situation_id)
+    if known and (known[0] or _fresh(known[1])):
+        return
+    exists = await asyncio.to_thread(object_exists, f"initial_msg_{situation_id}.mp3")
+    if exists is not None:
+        _initial_audio[situation_id] = (exists, time.monotonic())
+
+
+async def _warm(user_id: str, situation_id: str, locale: Locale) -> None:
+    from app.services.realtime_service import prewarm_session
+
+    start = time.perf_counter()
+    try:
+        lesson = await asyncio.to_thread(_prepare, user_id, situation_id, locale)
+        if lesson is None:
+            metrics.increment("warmup", result="not_found")
+            return
+        _prepared[user_id] = lesson
+        await _check_initial_audio(situation_id)
+        await prewarm_session(lesson.system_prompt, lesson.voice, lesson.tts_instructions)
+    except asyncio.CancelledError:
+        metrics.increment("warmup", result="cancelled")
+        raise
+    except Exception as e:
+        metrics.increment("warmup", result="error")
+        logger.warning(f"[Warmup] {situation_id} for user {user_id} failed: {type(e).__name__}: {e}")
+        return
+    metrics.increment("warmup", result="ok")
+    metrics.observe("warmup_ms", (time.perf_counter() - start) * 1000)
+
+
+def schedule_warmup(user_id, situation_id: Optional[str], locale: Optional[Locale] = None) -> bool:
+    """Start warming situation_id for the user (in their locale) on the running loop; False if skipped."""
+    if not settings.warmup_enabled or not situation_id:
+        return False
+    key = str(user_id)
+    current = _tasks.get(key)
+    if current and not current[1].done():
+        if current[0] == situation_id:
+            metrics.increment("warmup", result="deduplicated")
+            return False
+        current[1].cancel()
+    elif len(_tasks) >= settings.warmup_max_concurrent:
+        metrics.increment("warmup", result="skipped")
+        return False
+
+    for stale in [k for k, lesson in _prepared.items() if not _fresh(lesson.created_at)]:
+        _prepared.pop(stale, None)
+    _prepared.pop(key, None)
+
+    task = asyncio.get_running_loop().create_task(_warm(key, situation_id, locale or get_locale_for()))
+    _tasks[key] = (situation_id, task)
+
+    def _done(t: asyncio.Task) -> None:
+        if _tasks.get(key, (None, None))[1] is t:
+            del _tasks[key]
+
+    task.add_done_callback(_done)
+    return True
+
+
+def take_warm_selection(user_id, situation_id: str) -> Optional[List[str]]:
+    """Word ids prepared for this user's next lesson, if fresh (consumed)."""
+    lesson = _prepared.get(str(user_id))
+    if not lesson or lesson.situation_id != situation_id or lesson.word_ids is None:
+        return None
+    del _prepared[str(user_id)]
+    if not _fresh(lesson.created_at):
+        return None
+    metrics.increment("warmup_selection_used")
+    return lesson.word_ids
+
+
+def initial_audio_available(situation_id: str) -> Optional[bool]:
+    """Whether the situation's pregenerated opening audio is in R2, if a warm-up checked recently."""
+    known = _initial_audio.get(situation_id)
+    if not known or not (known[0] or _fresh(known[1])):
+        return None
+    return known[0]
+
+
+def cancel_warmup(user_id) -> bool:
+    current = _tasks.get(str(user_id))
+    if not current or current[1].done():
+        return False
+    current[1].cancel()
+    return True
+
+
+async def shutdown_warmup() -> None:
+    """Cancel running warm-ups and close parked Realtime sessions (lifespan shutdown)."""
+    from app.services.realtime_service import close_warm_sessions
+
+    tasks = [task for _, task in _tasks.values()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_warm_sessions()
+
+
+def warmup_stats() -> Dict[str, float]:
+    """Metrics collector."""
+    from app.services.realtime_service import warm_session_count
+
+    return {
+        "warmup_in_flight": len(_tasks),
+        "warmup_prepared": len(_prepared),
+        "realtime_warm_sessions": warm_session_count(),
+    }
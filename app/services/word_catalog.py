@@ -0,0 +1,102 @@
+"""Read-only word views for rendering, with the Catalan spelling precomputed.
+
+Words are reference data, so rendering code works on immutable WordView tuples
+instead of ORM instances:
+
+    words = get_word_views(db, target_word_ids, catalan_mode)     # by id, in that order
+    rows = db.execute(select(*WORD_COLUMNS).where(...)).all()
+    words = word_views_from_rows(rows, catalan_mode)                # from a column query
+
+Each word is kept per worker as a pair of views: Spanish, and Catalan (the
+catalan column for encounter / high-frequency words that have one, else the
+Spanish text). The display text is always in .spanish, like the API's "spanish"
+field. get_word_views() serves from that catalog and loads missing ids with one
+column query; the catalog is dropped every word_catalog_ttl_seconds so edits to
+the words table (seed scripts) are picked up.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import threading
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import metrics
+from app.models import Word
+
+CATALAN_CATEGORIES = ("encounter", "high_frequency")
+
+WORD_COLUMNS = (
+    Word.id, Word.spanish, Word.english, Word.notes, Word.word_category, Word.frequency_rank, Word.catalan,
+)
+
+
+class WordView(NamedTuple):
+    id: str
+    spanish: str  # display text: Catalan spelling in Catalan views
+    english: str
+    notes: Optional[str] = None
+    word_category: Optional[str] = None
+    frequency_rank: Optional[int] = None
+
+
+_catalog: Dict[str, Tuple[WordView, WordView]] = {}  # id -> (Spanish view, Catalan view)
+_catalog_lock = threading.Lock()
+_loaded_at = time.monotonic()
+
+
+def _views(row) -> Tuple[WordView, WordView]:
+    spanish = WordView(row.id, row.spanish, row.english, row.notes, row.word_category, row.frequency_rank)
+    if row.catalan and row.word_category in CATALAN_CATEGORIES:
+        return spanish, spanish._replace(spanish=row.catalan)
+    return spanish, spanish
+
+
+def _expire_if_due() -> None:
+    global _loaded_at
+    if time.monotonic() - _loaded_at > settings.word_catalog_ttl_seconds:
+        _catalog.clear()
+        _loaded_at = time.monotonic()
+
+
+def word_views_from_rows(rows: Iterable, catalan_mode: bool = False) -> List[WordView]:
+    """Views of rows selected with WORD_COLUMNS (in row order); also fills the catalog."""
+    pairs = [_views(row) for row in rows]
+    with _catalog_lock:
+        _expire_if_due()
+        for pair in pairs:
+            _catalog[pair[0].id] = pair
+    return [pair[1] if catalan_mode else pair[0] for pair in pairs]
+
+
+def get_word_views(db: Session, word_ids: Iterable[str], catalan_mode: bool = False) -> List[WordView]:
+    """Views of the given words in the given order; unknown ids are skipped."""
+    word_ids = list(word_ids)
+    with _catalog_lock:
+        _expire_if_due()
+        found = {word_id: _catalog[word_id] for word_id in word_ids if word_id in _catalog}
+    missing = [word_id for word_id in dict.fromkeys(word_ids) if word_id not in found]
+    if missing:
+        metrics.increment("word_catalog", result="miss")
+        rows = db.execute(select(*WORD_COLUMNS).where(Word.id.in_(missing))).all()
+        pairs = [_views(row) for row in rows]
+        with _catalog_lock:
+            for pair in pairs:
+                _catalog[pair[0].id] = pair
+        found.update((pair[0].id, pair) for pair in pairs)
+    else:
+        metrics.increment("word_catalog", result="hit")
+    index = 1 if catalan_mode else 0
+    return [found[word_id][index] for word_id in word_ids if word_id in found]
+
+
+def clear_word_catalog() -> None:
+    with _catalog_lock:
+        _catalog.clear()
+
+
+def word_catalog_stats() -> Dict[str, float]:
+    """Metrics collector."""
+    with _catalog_lock:
+        return {"word_catalog_size": len(_catalog)}
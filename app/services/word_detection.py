@@ -1,8 +1,7 @@
 import re
 import unicodedata
 from typing import List
-from sqlalchemy.orm import Session
-from app.models import Word
+from app.services.word_catalog import WordView
 
 
 def normalize_text(text: str) -> str:
@@ -20,7 +19,7 @@ def normalize_text(text: str) -> str:
     return text
 
 
-def detect_words_in_text(text: str, words: List[Word]) -> List[str]:
+def detect_words_in_text(text: str, words: List[WordView]) -> List[str]:
     """
     Detect which words/phrases appear in the given text.
     Returns list of word_ids that were detected.
@@ -48,8 +47,3 @@ def detect_words_in_text(text: str, words: List[Word]) -> List[str]:
                 detected_word_ids.append(word.id)
 
     return detected_word_ids
-
-
-def get_words_by_ids(db: Session, word_ids: List[str]) -> List[Word]:
-    """Get Word objects by their IDs"""
-    return db.query(Word).filter(Word.id.in_(word_ids)).all()
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
 from app.models import Word, Situation, SituationWord, UserWord
+from app.services.word_catalog import WordView
 from typing import List, Set, Tuple
 
 
@@ -60,11 +61,11 @@ def select_words_for_situation(
 
 
 def sort_words_encounter_first(
-    words: List[Word],
+    words: List[WordView],
     situation_id: str,
     db: Session,
     target_word_ids: List[str],
-) -> List[Word]:
+) -> List[WordView]:
     """Sort words: encounter words by position first, then high-frequency."""
     word_dict = {w.id: w for w in words}
     situation_words = db.query(SituationWord).filter(
@@ -78,7 +79,7 @@ def sort_words_encounter_first(
     return sorted_encounter + sorted_high_freq
 
 
-def ensure_user_words(db: Session, user_id, words: List[Word]) -> None:
+def ensure_user_words(db: Session, user_id, words: List[WordView]) -> None:
     """Create UserWord entries if they don't exist, increment seen_count."""
     for word in words:
         stmt = insert(UserWord).values(
@@ -8,26 +8,11 @@ logger = logging.getLogger(__name__)
 AUDIO_DIR = Path("/tmp/audio")
 AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 
-# Lazy-initialized S3 client for R2
-_s3_client = None
-
 
 def _get_s3_client():
-    """Get or create the boto3 S3 client for R2."""
-    global _s3_client
-    if _s3_client is None:
-        from app.config import settings
-        if not settings.r2_endpoint_url:
-            return None
-        import boto3
-        _s3_client = boto3.client(
-            "s3",
-            endpoint_url=settings.r2_endpoint_url,
-            aws_access_key_id=settings.r2_access_key_id,
-            aws_secret_access_key=settings.r2_secret_access_key,
-            region_name="auto",
-        )
-    return _s3_client
+    """Get the shared boto3 S3 client for R2 (app/services/r2_storage.py)."""
+    from app.services.r2_storage import get_s3_client
+    return get_s3_client()
 
 
 def generate_audio_filename() -> str:
@@ -49,42 +34,17 @@ def get_audio_url(filename: str, base_url: str = "") -> str:
 
 def upload_to_r2(local_path: str, filename: str) -> str | None:
     """Upload an audio file to R2 and return the public URL.
-    Returns None if R2 is not configured or upload fails."""
-    from app.config import settings
-    if not settings.r2_public_url:
-        logger.warning(f"[R2] Skipped upload — r2_public_url not configured (r2_endpoint_url={settings.r2_endpoint_url!r})")
-        return None
-
-    client = _get_s3_client()
-    if not client:
-        return None
-
-    try:
-        client.upload_file(
-            local_path,
-            settings.r2_bucket_name,
-            filename,
-            ExtraArgs={"ContentType": "audio/mpeg"},
-        )
-        public_url = f"{settings.r2_public_url}/{filename}"
-        logger.info(f"[R2] Uploaded {filename} → {public_url}")
-        return public_url
-    except Exception as e:
-        import traceback
-        logger.error(f"[R2] Upload failed for {filename}: {e}\n{traceback.format_exc()}")
-        return None
+    Returns None if R2 is not configured or upload fails.
 
+    Prefer app.services.r2_storage for audio that is already in memory."""
+    from app.services.r2_storage import upload_bytes_sync
+    return upload_bytes_sync(filename, Path(local_path).read_bytes())
 
-def cleanup_old_audio_files(max_age_hours: int = 24):
-    """Clean up audio files older than max_age_hours"""
-    import time
-    current_time = time.time()
-    max_age_seconds = max_age_hours * 3600
 
-    for file_path in AUDIO_DIR.glob("*.mp3"):
-        file_age = current_time - file_path.stat().st_mtime
-        if file_age > max_age_seconds:
-            file_path.unlink()
+def cleanup_old_audio_files(max_age_hours: int = 24):
+    """Clean up audio files unused for more than max_age_hours (from the cache index, no directory scan)."""
+    from app.services.audio_cache import get_cache
+    return get_cache().expire(max_age_hours * 3600)
 
 
 def concatenate_audio_files(paths: list, output_path: str):
@@ -93,3 +53,5 @@ def concatenate_audio_files(paths: list, output_path: str):
         for p in paths:
             with open(p, 'rb') as f:
                 out.write(f.read())
+    from app.services.audio_cache import register
+    register(output_path)
@@ -0,0 +1,318 @@
+"""Audio duration from container headers, without decoding.
+
+    seconds = audio_duration_seconds(audio_bytes)   # None if unknown
+
+Supported uploads (sniffed from the bytes, not the filename):
+    webm / mkv   Info/Duration, else last block timestamp + its Opus frame length
+                 (browser MediaRecorder files usually carry no Duration)
+    mp4 / m4a    mvhd duration, else mehd or the sum of fragment (trun) sample
+                 durations (Safari MediaRecorder writes fragmented mp4)
+    wav          data chunk size / byte rate
+    mp3          Xing/Info/VBRI frame count, else CBR size / bitrate
+    ogg          last page granule position (Opus pre-skip aware)
+
+Parsers only walk box/element/frame headers, so the cost is a few
+microseconds per upload regardless of length. Malformed or truncated input
+returns None rather than raising.
+"""
+from typing import Optional
+import struct
+
+
+class AudioTooLongError(ValueError):
+    """An upload exceeds the allowed duration (stt_max_audio_seconds)."""
+
+    def __init__(self, seconds: float, limit: float):
+        super().__init__(f"Audio is {seconds:.1f}s long; the limit is {limit:.0f}s")
+        self.seconds = seconds
+        self.limit = limit
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "wav"
+    if data[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if data[4:8] == b"ftyp":
+        return "mp4"
+    if data[:4] == b"OggS":
+        return "ogg"
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def audio_duration_seconds(data: bytes) -> Optional[float]:
+    parser = _PARSERS.get(sniff_format(data))
+    if parser is None:
+        return None
+    try:
+        seconds = parser(data)
+    except (IndexError, struct.error, ValueError, ZeroDivisionError):
+        return None
+    return round(seconds, 3) if seconds and seconds > 0 else None
+
+
+# ── WAV ──
+
+def _wav_duration(data: bytes) -> Optional[float]:
+    pos = 12
+    byte_rate = None
+    while pos + 8 <= len(data):
+        chunk_id, size = data[pos:pos + 4], struct.unpack_from("<I", data, pos + 4)[0]
+        if chunk_id == b"fmt ":
+            byte_rate = struct.unpack_from("<I", data, pos + 16)[0]
+        elif chunk_id == b"data" and byte_rate:
+            # Streamed recordings leave the size unset (0 / 0xFFFFFFFF): use what we got
+            available = len(data) - pos - 8
+            if size == 0 or size > available:
+                size = available
+            return size / byte_rate
+        pos += 8 + size + (size & 1)
+    return None
+
+
+# ── MP4 / M4A ──
+
+_MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"mvex", b"moof", b"traf"}
+
+
+def _mp4_boxes(data: bytes, start: int, end: int):
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _mp4_duration(data: bytes) -> Optional[float]:
+    found = {"mvhd": None, "mehd": None, "timescale": None, "trex_duration": 0, "tfhd_duration": 0, "fragments": 0}
+
+    def full_box_version(pos: int) -> int:
+        return data[pos]
+
+    def walk(start: int, end: int):
+        for kind, body, box_end in _mp4_boxes(data, start, end):
+            if kind in _MP4_CONTAINERS:
+                walk(body, box_end)
+            elif kind == b"mvhd":
+                if full_box_version(body) == 1:
+                    timescale, duration = struct.unpack_from(">IQ", data, body + 20)
+                else:
+                    timescale, duration = struct.unpack_from(">II", data, body + 12)
+                found["mvhd"] = (timescale, duration)
+            elif kind == b"mdhd":
+                offset = 20 if full_box_version(body) == 1 else 12
+                found["timescale"] = struct.unpack_from(">I", data, body + offset)[0]
+            elif kind == b"mehd":
+                fmt = ">Q" if full_box_version(body) == 1 else ">I"
+                found["mehd"] = struct.unpack_from(fmt, data, body + 4)[0]
+            elif kind == b"trex":
+                found["trex_duration"] = struct.unpack_from(">I", data, body + 12)[0]
+            elif kind == b"tfhd":
+                flags = int.from_bytes(data[body + 1:body + 4], "big")
+                pos = body + 8 + (8 if flags & 0x1 else 0) + (4 if flags & 0x2 else 0)
+                found["tfhd_duration"] = struct.unpack_from(">I", data, pos)[0] if flags & 0x8 else 0
+            elif kind == b"trun":
+                found["fragments"] += _trun_duration(data, body, found["tfhd_duration"] or found["trex_duration"])
+
+    walk(0, len(data))
+    if found["mvhd"] and found["mvhd"][0] and found["mvhd"][1] not in (0, 0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF):
+        timescale, duration = found["mvhd"]
+        return duration / timescale
+    if found["mehd"] and found["mvhd"] and found["mvhd"][0]:
+        return found["mehd"] / found["mvhd"][0]
+    if found["fragments"] and found["timescale"]:
+        return found["fragments"] / found["timescale"]
+    return None
+
+
+def _trun_duration(data: bytes, body: int, default_duration: int) -> int:
+    flags = int.from_bytes(data[body + 1:body + 4], "big")
+    sample_count = struct.unpack_from(">I", data, body + 4)[0]
+    if not flags & 0x100:
+        return sample_count * default_duration
+    pos = body + 8 + (4 if flags & 0x1 else 0) + (4 if flags & 0x4 else 0)
+    stride = 4 * sum(1 for bit in (0x100, 0x200, 0x400, 0x800) if flags & bit)
+    return sum(struct.unpack_from(">I", data, pos + i * stride)[0] for i in range(sample_count))
+
+
+# ── WebM / Matroska ──
+
+_EBML_SEGMENT = 0x18538067
+_EBML_CLUSTER = 0x1F43B675
+_EBML_INFO = 0x1549A966
+_EBML_BLOCK_GROUP = 0xA0
+_EBML_CONTAINERS = {_EBML_SEGMENT, _EBML_CLUSTER, _EBML_INFO, _EBML_BLOCK_GROUP}
+_EBML_TIMESTAMP_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+_EBML_CLUSTER_TIMESTAMP = 0xE7
+_EBML_SIMPLE_BLOCK = 0xA3
+_EBML_BLOCK = 0xA1
+
+
+def _ebml_vint(data: bytes, pos: int, keep_marker: bool):
+    first = data[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise ValueError("invalid EBML varint")
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, length, unknown
+
+
+def _opus_packet_seconds(packet: bytes) -> Optional[float]:
+    """Duration of one Opus packet from its TOC byte (RFC 6716, section 3.1)."""
+    if not packet:
+        return None
+    toc = packet[0]
+    config = toc >> 3
+    if config < 12:
+        frame_ms = (10, 20, 40, 60)[config % 4]
+    elif config < 16:
+        frame_ms = (10, 20)[config % 2]
+    else:
+        frame_ms = (2.5, 5, 10, 20)[config % 4]
+    code = toc & 0x3
+    frames = 1 if code == 0 else 2 if code in (1, 2) else (packet[1] & 0x3F if len(packet) > 1 else 1)
+    return frame_ms * frames / 1000
+
+
+def _webm_duration(data: bytes) -> Optional[float]:
+    scale = 1_000_000  # ns per timestamp unit (Matroska default)
+    declared = None
+    cluster_ts = 0
+    first_ts = last_ts = None
+    last_block = b""
+    pos = 0
+    end = len(data)
+    while pos < end:
+        element_id, id_len, _ = _ebml_vint(data, pos, keep_marker=True)
+        size, size_len, unknown = _ebml_vint(data, pos + id_len, keep_marker=False)
+        body = pos + id_len + size_len
+        if element_id in _EBML_CONTAINERS:
+            pos = body  # descend; also copes with unknown-size Segment/Cluster from live recorders
+            continue
+        if unknown or body + size > end:
+            break  # truncated upload: use what was seen so far
+        if element_id == _EBML_TIMESTAMP_SCALE:
+            scale = int.from_bytes(data[body:body + size], "big")
+        elif element_id == _EBML_DURATION:
+            declared = struct.unpack(">f" if size == 4 else ">d", data[body:body + size])[0]
+        elif element_id == _EBML_CLUSTER_TIMESTAMP:
+            cluster_ts = int.from_bytes(data[body:body + size], "big")
+        elif element_id in (_EBML_SIMPLE_BLOCK, _EBML_BLOCK):
+            _, track_len, _ = _ebml_vint(data, body, keep_marker=False)
+            relative = struct.unpack_from(">h", data, body + track_len)[0]
+            timestamp = cluster_ts + relative
+            first_ts = timestamp if first_ts is None else min(first_ts, timestamp)
+            if last_ts is None or timestamp >= last_ts:
+                last_ts = timestamp
+                flags = data[body + track_len + 2]
+                last_block = b"" if flags & 0x06 else data[body + track_len + 3:body + size]  # laced: unknown
+        pos = body + size
+
+    if declared:
+        return declared * scale / 1e9
+    if first_ts is None:
+        return None
+    tail = _opus_packet_seconds(last_block) or 0.02
+    return (last_ts - first_ts) * scale / 1e9 + tail
+
+
+# ── MP3 ──
+
+_MP3_BITRATES = {
+    # (mpeg1, layer) -> kbps by index
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _mp3_duration(data: bytes) -> Optional[float]:
+    pos = 0
+    if data[:3] == b"ID3":
+        size = 0
+        for byte in data[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+    end = len(data) - (128 if data[-128:-125] == b"TAG" else 0)
+
+    # First frame sync within a small search window (padding between tag and audio)
+    limit = min(end - 4, pos + 4096)
+    while pos < limit and not (data[pos] == 0xFF and data[pos + 1] & 0xE0 == 0xE0):
+        pos += 1
+    if pos >= limit:
+        return None
+
+    header = struct.unpack_from(">I", data, pos)[0]
+    version = (header >> 19) & 0x3  # 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+    layer = 4 - ((header >> 17) & 0x3)
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 0x3
+    mono = (header >> 6) & 0x3 == 3
+    if version == 1 or layer == 4 or rate_index == 3 or bitrate_index in (0, 15):
+        return None
+    mpeg1 = version == 3
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    samples_per_frame = 384 if layer == 1 else 1152 if (layer == 2 or mpeg1) else 576
+
+    # VBR headers (Xing/Info right after the side info, VBRI at a fixed offset)
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = pos + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info") and struct.unpack_from(">I", data, xing + 4)[0] & 0x1:
+        frames = struct.unpack_from(">I", data, xing + 8)[0]
+        return frames * samples_per_frame / sample_rate
+    vbri = pos + 36
+    if data[vbri:vbri + 4] == b"VBRI":
+        frames = struct.unpack_from(">I", data, vbri + 14)[0]
+        return frames * samples_per_frame / sample_rate
+
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    return (end - pos) * 8 / bitrate
+
+
+# ── Ogg ──
+
+def _ogg_duration(data: bytes) -> Optional[float]:
+    last_page = data.rfind(b"OggS")
+    if last_page < 0 or last_page + 14 > len(data):
+        return None
+    granule = struct.unpack_from("<q", data, last_page + 6)[0]
+    if granule <= 0:
+        return None
+    head = data.find(b"OpusHead")
+    if head >= 0:
+        pre_skip = struct.unpack_from("<H", data, head + 10)[0]
+        return (granule - pre_skip) / 48000  # Opus granules always count 48 kHz samples
+    vorbis = data.find(b"\x01vorbis")
+    if vorbis >= 0:
+        sample_rate = struct.unpack_from("<I", data, vorbis + 12)[0]
+        return granule / sample_rate
+    return None
+
+
+_PARSERS = {
+    "wav": _wav_duration,
+    "mp4": _mp4_duration,
+    "webm": _webm_duration,
+    "mp3": _mp3_duration,
+    "ogg": _ogg_duration,
+}
@@ -0,0 +1,97 @@
+"""Add hourly AI request rollups and created_at indexes
+
+Revision ID: 015_ai_rollups
+Revises: 014_daily_enc_log
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '015_ai_rollups'
+down_revision = '014_daily_enc_log'
+branch_labels = None
+depends_on = None
+
+# Must match SKETCH_GAMMA and BACKFILL_LEARNING_PHASE in app/services/ai_rollup_service.py
+SKETCH_GAMMA = 1.05
+# The raw request tables don't store the learning phase (it only arrives in the
+# X-Learning-Phase header), so backfilled rows are kept apart from live rows
+# recorded without a phase ('') instead of being merged into them.
+BACKFILL_LEARNING_PHASE = 'unknown'
+
+
+def _backfill(kind: str, table: str, agent_expr: str) -> None:
+    """Fold existing raw rows into hourly rollups (one pass per table)."""
+    op.execute(f"""
+        INSERT INTO ai_request_rollups_hourly
+            (bucket_start, kind, model, agent_id, learning_phase, calls, errors,
+             latency_sum_ms, latency_min_ms, latency_max_ms, cost_sum, latency_sketch)
+        SELECT g.bucket_start, '{kind}', g.model, g.agent_id, '{BACKFILL_LEARNING_PHASE}',
+               g.calls, g.errors, g.latency_sum_ms, g.latency_min_ms, g.latency_max_ms, g.cost_sum,
+               COALESCE(s.sketch, '{{}}'::jsonb)
+        FROM (
+            SELECT date_trunc('hour', created_at) AS bucket_start, model, {agent_expr} AS agent_id,
+                   COUNT(*) FILTER (WHERE success AND latency_ms IS NOT NULL) AS calls,
+                   COUNT(*) FILTER (WHERE NOT success) AS errors,
+                   COALESCE(SUM(latency_ms) FILTER (WHERE success), 0) AS latency_sum_ms,
+                   MIN(latency_ms) FILTER (WHERE success) AS latency_min_ms,
+                   MAX(latency_ms) FILTER (WHERE success) AS latency_max_ms,
+                   COALESCE(SUM(estimated_cost) FILTER (WHERE success), 0) AS cost_sum
+            FROM {table}
+            WHERE created_at IS NOT NULL
+            GROUP BY 1, 2, 3
+        ) g
+        LEFT JOIN (
+            SELECT bucket_start, model, agent_id, jsonb_object_agg(bin::text, n) AS sketch
+            FROM (
+                SELECT date_trunc('hour', created_at) AS bucket_start, model, {agent_expr} AS agent_id,
+                       CEIL(LN(GREATEST(latency_ms, 1)) / LN({SKETCH_GAMMA}))::int AS bin,
+                       COUNT(*) AS n
+                FROM {table}
+                WHERE created_at IS NOT NULL AND success AND latency_ms IS NOT NULL
+                GROUP BY 1, 2, 3, 4
+            ) b
+            GROUP BY 1, 2, 3
+        ) s USING (bucket_start, model, agent_id)
+    """)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ai_request_rollups_hourly',
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('agent_id', sa.String(), nullable=False, server_default=''),
+        sa.Column('learning_phase', sa.String(), nullable=False, server_default=''),
+        sa.Column('calls', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('errors', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('latency_sum_ms', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('latency_min_ms', sa.Integer(), nullable=True),
+        sa.Column('latency_max_ms', sa.Integer(), nullable=True),
+        sa.Column('cost_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('latency_sketch', postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default='{}'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('bucket_start', 'kind', 'model', 'agent_id', 'learning_phase'),
+    )
+    op.create_index('ix_ai_request_rollups_kind_bucket', 'ai_request_rollups_hourly', ['kind', 'bucket_start'])
+
+    # "Recent calls" admin lists sort by created_at
+    op.create_index('ix_llm_requests_created_at', 'llm_requests', ['created_at'])
+    op.create_index('ix_stt_requests_created_at', 'stt_requests', ['created_at'])
+    op.create_index('ix_tts_requests_created_at', 'tts_requests', ['created_at'])
+
+    _backfill('llm', 'llm_requests', "COALESCE(agent_id, '')")
+    _backfill('stt', 'stt_requests', "''")
+    _backfill('tts', 'tts_requests', "''")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tts_requests_created_at', table_name='tts_requests')
+    op.drop_index('ix_stt_requests_created_at', table_name='stt_requests')
+    op.drop_index('ix_llm_requests_created_at', table_name='llm_requests')
+    op.drop_index('ix_ai_request_rollups_kind_bucket', table_name='ai_request_rollups_hourly')
+    op.drop_table('ai_request_rollups_hourly')
@@ -0,0 +1,88 @@
+"""Range-partition AI request tables by month on created_at
+
+Revision ID: 016_ai_partitions
+Revises: 015_ai_rollups
+Create Date: 2026-10-19 00:00:00.000000
+
+The copy into the partitioned table runs inside the migration transaction.
+The old tables stay locked ACCESS EXCLUSIVE from the first statement until
+commit, so request logging blocks for the whole copy: run it in a maintenance
+window on large tables.
+
+Partitions are created up to MONTHS_AHEAD; after that the app's startup and
+scripts/ai_partition_maintenance.py (daily cron) keep creating them. Rows that
+arrive for a month without a partition go to {table}_default and are moved
+out once that month's partition is created.
+"""
+from datetime import datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '016_ai_partitions'
+down_revision = '015_ai_rollups'
+branch_labels = None
+depends_on = None
+
+TABLES = ('llm_requests', 'stt_requests', 'tts_requests')
+MONTHS_AHEAD = 3
+
+
+def _add_months(ts: datetime, months: int) -> datetime:
+    index = ts.year * 12 + (ts.month - 1) + months
+    return ts.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _create_indexes(table: str) -> None:
+    op.create_index(f'ix_{table}_request_id', table, ['request_id'])
+    op.create_index(f'ix_{table}_user_id', table, ['user_id'])
+    op.create_index(f'ix_{table}_created_at', table, ['created_at'])
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    this_month = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    for table in TABLES:
+        # Partition key must be NOT NULL and part of the primary key
+        op.execute(f"UPDATE {table} SET created_at = now() WHERE created_at IS NULL")
+
+        op.execute(f"CREATE TABLE {table}_new (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+        op.execute(f"ALTER TABLE {table}_new ALTER COLUMN created_at SET NOT NULL")
+        op.execute(f"ALTER TABLE {table}_new ADD CONSTRAINT {table}_pkey_new PRIMARY KEY (id, created_at)")
+        op.execute(f"ALTER TABLE {table}_new ADD CONSTRAINT {table}_user_id_fkey_new "
+                   f"FOREIGN KEY (user_id) REFERENCES users (id)")
+
+        oldest = conn.execute(sa.text(f"SELECT min(created_at) FROM {table}")).scalar()
+        first = this_month
+        if oldest is not None:
+            first = oldest.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        month = first
+        while month <= _add_months(this_month, MONTHS_AHEAD):
+            name = f"{table}_p{month.year:04d}{month.month:02d}"
+            op.execute(
+                f"CREATE TABLE {name} PARTITION OF {table}_new "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            )
+            month = _add_months(month, 1)
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table}_new DEFAULT")
+
+        op.execute(f"INSERT INTO {table}_new SELECT * FROM {table}")
+        op.drop_table(table)
+        op.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {table}_pkey_new TO {table}_pkey")
+        op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {table}_user_id_fkey_new TO {table}_user_id_fkey")
+        _create_indexes(table)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"CREATE TABLE {table}_old (LIKE {table} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {table}_old SELECT * FROM {table}")
+        op.drop_table(table)  # drops all partitions with it
+        op.execute(f"ALTER TABLE {table}_old RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at DROP NOT NULL")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_user_id_fkey "
+                   f"FOREIGN KEY (user_id) REFERENCES users (id)")
+        _create_indexes(table)
@@ -0,0 +1,106 @@
+"""Content-addressed LLM message store; llm_requests keep ordered hashes
+
+Revision ID: 017_llm_message_blobs
+Revises: 016_ai_partitions
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '017_llm_message_blobs'
+down_revision = '016_ai_partitions'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+EXPANDED_VIEW = """
+CREATE VIEW llm_requests_expanded AS
+SELECT r.*,
+       COALESCE(
+           r.messages_json,
+           (SELECT jsonb_agg(b.message ORDER BY h.ord)
+              FROM jsonb_array_elements_text(r.message_hashes) WITH ORDINALITY AS h(sha256, ord)
+              JOIN llm_message_blobs b ON b.sha256 = h.sha256)
+       ) AS messages
+FROM llm_requests r
+"""
+
+
+def _canonical(message) -> bytes:
+    # Must match app.services.llm_message_store.canonical_message_bytes
+    return json.dumps(message, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _backfill(conn) -> None:
+    """Move inline messages_json into blobs in keyset-paginated batches."""
+    last = None
+    while True:
+        where = "messages_json IS NOT NULL"
+        params = {"limit": BATCH_SIZE}
+        if last is not None:
+            where += " AND (created_at, id) > (:last_created, :last_id)"
+            params.update(last_created=last[0], last_id=last[1])
+        rows = conn.execute(sa.text(
+            f"SELECT id, created_at, messages_json FROM llm_requests WHERE {where} "
+            f"ORDER BY created_at, id LIMIT :limit"
+        ), params).all()
+        if not rows:
+            break
+
+        blobs = {}
+        updates = []
+        for row in rows:
+            hashes = []
+            for message in row.messages_json or []:
+                encoded = _canonical(message)
+                digest = hashlib.sha256(encoded).hexdigest()
+                hashes.append(digest)
+                blobs[digest] = {"sha256": digest, "message": json.dumps(message), "byte_size": len(encoded)}
+            updates.append({"id": row.id, "created_at": row.created_at, "hashes": json.dumps(hashes)})
+
+        if blobs:
+            conn.execute(sa.text(
+                "INSERT INTO llm_message_blobs (sha256, message, byte_size) "
+                "VALUES (:sha256, CAST(:message AS jsonb), :byte_size) ON CONFLICT (sha256) DO NOTHING"
+            ), list(blobs.values()))
+        conn.execute(sa.text(
+            "UPDATE llm_requests SET message_hashes = CAST(:hashes AS jsonb), messages_json = NULL "
+            "WHERE id = :id AND created_at = :created_at"
+        ), updates)
+        last = (rows[-1].created_at, rows[-1].id)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_message_blobs',
+        sa.Column('sha256', sa.String(), nullable=False),
+        sa.Column('message', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('byte_size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    op.add_column('llm_requests', sa.Column('message_hashes', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+    _backfill(op.get_bind())
+    op.execute(EXPANDED_VIEW)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW IF EXISTS llm_requests_expanded")
+    op.execute("""
+        UPDATE llm_requests r SET messages_json = (
+            SELECT jsonb_agg(b.message ORDER BY h.ord)
+              FROM jsonb_array_elements_text(r.message_hashes) WITH ORDINALITY AS h(sha256, ord)
+              JOIN llm_message_blobs b ON b.sha256 = h.sha256
+        )
+        WHERE r.message_hashes IS NOT NULL AND r.messages_json IS NULL
+    """)
+    op.drop_column('llm_requests', 'message_hashes')
+    op.drop_table('llm_message_blobs')
@@ -0,0 +1,38 @@
+"""Add conversation_turns table (server-held voice chat history)
+
+Revision ID: 018_conversation_turns
+Revises: 017_llm_message_blobs
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+# revision identifiers, used by Alembic.
+revision = '018_conversation_turns'
+down_revision = '017_llm_message_blobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'conversation_turns',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('conversation_id', UUID(as_uuid=True), sa.ForeignKey('conversations.id'), nullable=False),
+        sa.Column('session_no', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('conversation_id', 'seq', name='uq_conversation_turns_conversation_seq'),
+        sa.CheckConstraint("role IN ('assistant', 'user')", name='ck_conversation_turns_role'),
+    )
+    op.create_index('ix_conversation_turns_conversation_id', 'conversation_turns', ['conversation_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversation_turns_conversation_id', table_name='conversation_turns')
+    op.drop_table('conversation_turns')
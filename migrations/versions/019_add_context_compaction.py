@@ -0,0 +1,29 @@
+"""Add conversation history summary and LLM context token counts
+
+Revision ID: 019_context_compaction
+Revises: 018_conversation_turns
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '019_context_compaction'
+down_revision = '018_conversation_turns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('conversations', sa.Column('history_summary', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    # Added on the partitioned parent, so every partition gets the columns
+    op.add_column('llm_requests', sa.Column('context_tokens_before', sa.Integer(), nullable=True))
+    op.add_column('llm_requests', sa.Column('context_tokens_after', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('llm_requests', 'context_tokens_after')
+    op.drop_column('llm_requests', 'context_tokens_before')
+    op.drop_column('conversations', 'history_summary')
@@ -0,0 +1,28 @@
+"""Add provider prompt-cache token counts to LLM requests and rollups
+
+Revision ID: 020_cached_tokens
+Revises: 019_context_compaction
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '020_cached_tokens'
+down_revision = '019_context_compaction'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Added on the partitioned parent, so every partition gets the column
+    op.add_column('llm_requests', sa.Column('cached_tokens', sa.Integer(), nullable=True))
+    op.add_column('ai_request_rollups_hourly', sa.Column('tokens_in_sum', sa.BigInteger(), nullable=False, server_default='0'))
+    op.add_column('ai_request_rollups_hourly', sa.Column('cached_tokens_sum', sa.BigInteger(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('ai_request_rollups_hourly', 'cached_tokens_sum')
+    op.drop_column('ai_request_rollups_hourly', 'tokens_in_sum')
+    op.drop_column('llm_requests', 'cached_tokens')
@@ -0,0 +1,30 @@
+"""Add hedged STT outcome columns to stt_requests
+
+Revision ID: 021_stt_hedging
+Revises: 020_cached_tokens
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '021_stt_hedging'
+down_revision = '020_cached_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Added on the partitioned parent, so every partition gets the columns
+    op.add_column('stt_requests', sa.Column('winning_model', sa.String(), nullable=True))
+    op.add_column('stt_requests', sa.Column('hedged', sa.Boolean(), nullable=True))
+    op.add_column('stt_requests', sa.Column('primary_latency_ms', sa.Integer(), nullable=True))
+    op.add_column('stt_requests', sa.Column('fallback_latency_ms', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('stt_requests', 'fallback_latency_ms')
+    op.drop_column('stt_requests', 'primary_latency_ms')
+    op.drop_column('stt_requests', 'hedged')
+    op.drop_column('stt_requests', 'winning_model')
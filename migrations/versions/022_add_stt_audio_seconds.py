@@ -0,0 +1,24 @@
+"""Add measured audio duration to stt_requests
+
+Revision ID: 022_stt_audio_seconds
+Revises: 021_stt_hedging
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '022_stt_audio_seconds'
+down_revision = '021_stt_hedging'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Added on the partitioned parent, so every partition gets the column
+    op.add_column('stt_requests', sa.Column('audio_seconds', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('stt_requests', 'audio_seconds')
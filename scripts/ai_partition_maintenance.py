@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Retention job for the partitioned AI request tables (llm/stt/tts_requests).
+
+Creates upcoming monthly partitions, then detaches and drops partitions older
+than the retention window. With an archive dir, each dropped partition is first
+written to <archive_dir>/<partition>.ndjson.gz.
+
+Run daily (e.g. Railway cron):
+    python scripts/ai_partition_maintenance.py
+    python scripts/ai_partition_maintenance.py --keep-months 3 --archive-dir /data/ai_archive
+    python scripts/ai_partition_maintenance.py --dry-run
+
+Defaults come from AI_LOG_RETENTION_MONTHS and AI_LOG_ARCHIVE_DIR.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.ai_partition_service import ensure_partitions, apply_retention
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep-months", type=int, default=settings.ai_log_retention_months,
+                        help="Months to keep, including the current one")
+    parser.add_argument("--archive-dir", default=settings.ai_log_archive_dir,
+                        help="Archive dropped partitions here as gzip NDJSON")
+    parser.add_argument("--months-ahead", type=int, default=3, help="Future partitions to pre-create")
+    parser.add_argument("--dry-run", action="store_true", help="List partitions that would be dropped")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if not args.dry_run:
+            created = ensure_partitions(db, months_ahead=args.months_ahead)
+            for name in created:
+                print(f"  + created {name}")
+
+        results = apply_retention(db, keep_months=args.keep_months, archive_dir=args.archive_dir, dry_run=args.dry_run)
+        verb = "would drop" if args.dry_run else "dropped"
+        for r in results:
+            archive = f" → {r['archive']}" if r["archive"] else ""
+            print(f"  - {verb} {r['partition']} ({r['month']}){archive}")
+        print(f"Done: {len(results)} partition(s) {verb}, keeping {args.keep_months} month(s).")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
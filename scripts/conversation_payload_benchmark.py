@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Request size per voice turn: client-sent history vs server-held history.
+
+Simulates a voice conversation and measures, at selected turns, the body of
+POST /v1/conversations/{id}/voice-turn/respond and the server-side parse time:
+
+  legacy  {"user_transcript": ..., "messages_json": "<full history as JSON>"}
+  server  {"user_transcript": ...}   (history comes from conversation_turns)
+
+Also reports the size of the model context the server assembles (system prompt
++ capped history + new turn), which is what the LLM is billed on either way.
+
+Usage:
+    python scripts/conversation_payload_benchmark.py
+    python scripts/conversation_payload_benchmark.py --turns 1 10 30 60
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.conversation_history import cap_history
+from app.services.voice_turn_service import build_system_prompt
+
+USER_LINES = [
+    "Hi, I'd like to open a cuenta corriente please.",
+    "Sure, here is my pasaporte. Do you need anything else?",
+    "I live in Mexico City, near the centro. Is that okay?",
+    "How much is the comisión for international transfers?",
+]
+ASSISTANT_LINES = [
+    "Of course! Do you have your identification with you today? We'll need it to get started.",
+    "Perfect, thank you. And could you tell me your current address and a phone number?",
+    "That works. Would you like a debit card linked to the account as well?",
+    "Transfers abroad cost a small fee per operation -- would you like the full fee schedule?",
+]
+
+
+def simulate_history(turns: int) -> list:
+    system_prompt = build_system_prompt("banking", "bank_open_1")
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "assistant", "content": "Good morning -- how can I help you today?"},
+    ]
+    for i in range(turns - 1):
+        messages.append({"role": "user", "content": USER_LINES[i % len(USER_LINES)]})
+        messages.append({"role": "assistant", "content": ASSISTANT_LINES[i % len(ASSISTANT_LINES)]})
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 10, 30])
+    args = parser.parse_args()
+
+    transcript = USER_LINES[0]
+    print(f"{'turn':>5}{'legacy bytes':>15}{'server bytes':>15}{'legacy parse µs':>18}"
+          f"{'server parse µs':>18}{'model ctx bytes':>18}")
+    for turn in args.turns:
+        history = simulate_history(turn)
+        legacy_body = json.dumps({"user_transcript": transcript, "messages_json": json.dumps(history)})
+        server_body = json.dumps({"user_transcript": transcript})
+
+        # Legacy requests are parsed twice: the request body, then the embedded messages_json
+        legacy_parse = timeit.timeit(lambda: json.loads(json.loads(legacy_body)["messages_json"]), number=200) / 200
+        server_parse = timeit.timeit(lambda: json.loads(server_body), number=200) / 200
+
+        context = [history[0]] + cap_history(history[1:]) + [{"role": "user", "content": transcript}]
+        print(f"{turn:>5}{len(legacy_body.encode()):>15}{len(server_body.encode()):>15}"
+              f"{legacy_parse * 1e6:>18.1f}{server_parse * 1e6:>18.1f}{len(json.dumps(context).encode()):>18}")
+
+
+if __name__ == "__main__":
+    main()
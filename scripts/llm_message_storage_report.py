@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Report how much space LLM request messages take with content-addressed storage.
+
+Compares what llm_requests would hold if every request stored its full message
+list inline ("logical") against what is actually stored: remaining inline
+messages_json, the per-request hash lists, and the deduplicated blobs.
+
+    python scripts/llm_message_storage_report.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.llm_message_store import storage_report
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.2f} MB"
+
+
+def main():
+    db = SessionLocal()
+    try:
+        r = storage_report(db)
+    finally:
+        db.close()
+
+    print(f"LLM requests:          {r['requests']} ({r['inline_requests']} still inline)")
+    print(f"Distinct messages:     {r['blobs']}")
+    print(f"Logical size:          {_mb(r['logical_bytes'] + r['inline_bytes'])}")
+    print(f"  inline messages_json {_mb(r['inline_bytes'])}")
+    print(f"  hash lists           {_mb(r['hash_list_bytes'])}")
+    print(f"  message blobs        {_mb(r['blob_bytes'])}")
+    print(f"Stored size:           {_mb(r['stored_bytes'])}")
+    print(f"Dedup ratio:           {r['dedup_ratio'] or '-'}x")
+
+
+if __name__ == "__main__":
+    main()
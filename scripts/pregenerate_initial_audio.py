@@ -19,16 +19,12 @@ import time
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from pathlib import Path
 from openai import OpenAI
 from app.config import settings
 from app.data.seed_bank import SITUATIONS
 from app.data.grammar_situations import GRAMMAR_SITUATIONS
 from app.services.encounter_messages import get_initial_message_for_encounter
-from app.utils.audio import upload_to_r2, _get_s3_client
-
-AUDIO_DIR = Path("/tmp/initial_audio")
-AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+from app.services.r2_storage import get_s3_client, upload_bytes_sync
 
 # Import voice config from conversations.py
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -55,7 +51,7 @@ VOICE_CONFIG = {
 
 def r2_file_exists(filename: str) -> bool:
     """Check if a file already exists in R2."""
-    client = _get_s3_client()
+    client = get_s3_client()
     if not client:
         return False
     try:
@@ -87,14 +83,8 @@ def generate_and_upload(situation_id: str, title: str, animation_type: str, forc
         instructions=instructions,
     )
 
-    # Save locally
-    local_path = AUDIO_DIR / filename
-    with open(local_path, "wb") as f:
-        for chunk in response.iter_bytes():
-            f.write(chunk)
-
-    # Upload to R2
-    r2_url = upload_to_r2(str(local_path), filename)
+    # Upload to R2 straight from memory
+    r2_url = upload_bytes_sync(filename, b"".join(response.iter_bytes()))
     if not r2_url:
         return "r2_fail"
 
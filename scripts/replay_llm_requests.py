@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Replay logged LLM requests and compare against the recorded outputs.
+
+Streams llm_requests rows through a backend and prints latency/token/cost
+distributions (recorded vs replayed) plus a sample of output diffs.
+
+Usage:
+    python scripts/replay_llm_requests.py --backend stub --agent-id conversation_agent
+    python scripts/replay_llm_requests.py --backend openai --prompt-version v2 \\
+        --since 2026-10-01 --until 2026-10-08 --concurrency 8 --limit 500
+    python scripts/replay_llm_requests.py --backend openai --model gpt-5.4 --json report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.llm_replay import (
+    BACKENDS,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_DIFFS,
+    ReplayFilters,
+    iter_replay_cases,
+    run_replay,
+)
+
+
+def _date(value: str) -> datetime:
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _fmt(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.6f}" if isinstance(value, float) and 0 < value < 1 else f"{value:.0f}"
+
+
+def print_report(summary: dict) -> None:
+    print(f"\nBackend: {summary['backend']}")
+    print(f"Replayed: {summary['replayed']}  errors: {summary['errors']}  "
+          f"changed outputs: {summary['changed']}  mean similarity: {summary['mean_similarity']}")
+
+    print(f"\n{'metric':<12}{'side':<10}{'count':>8}{'mean':>12}{'p50':>12}{'p95':>12}{'p99':>12}{'max':>12}")
+    for metric in summary["original"]:
+        for side in ("original", "replay"):
+            d = summary[side][metric]
+            print(f"{metric:<12}{side:<10}{d['count']:>8}{_fmt(d['mean']):>12}{_fmt(d['p50']):>12}"
+                  f"{_fmt(d['p95']):>12}{_fmt(d['p99']):>12}{_fmt(d['max']):>12}")
+
+    for item in summary["diffs"]:
+        print(f"\n── {item['llm_request_id']} ──")
+        print(item["diff"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="stub")
+    parser.add_argument("--model", help="Override the recorded model (openai backend)")
+    parser.add_argument("--agent-id")
+    parser.add_argument("--prompt-version")
+    parser.add_argument("--since", type=_date, help="ISO date/time (inclusive)")
+    parser.add_argument("--until", type=_date, help="ISO date/time (exclusive)")
+    parser.add_argument("--include-failed", action="store_true", help="Also replay requests that failed")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per server-side fetch")
+    parser.add_argument("--max-diffs", type=int, default=DEFAULT_MAX_DIFFS)
+    parser.add_argument("--json", dest="json_path", help="Also write the full report as JSON")
+    args = parser.parse_args()
+
+    backend = BACKENDS[args.backend](model=args.model) if args.backend == "openai" else BACKENDS[args.backend]()
+    filters = ReplayFilters(
+        agent_id=args.agent_id,
+        prompt_version=args.prompt_version,
+        since=args.since,
+        until=args.until,
+        success_only=not args.include_failed,
+        limit=args.limit,
+    )
+
+    db = SessionLocal()
+    try:
+        cases = iter_replay_cases(db, filters, batch_size=args.batch_size)
+        report = asyncio.run(run_replay(cases, backend, concurrency=args.concurrency, max_diffs=args.max_diffs))
+    finally:
+        db.close()
+
+    summary = report.summary()
+    print_report(summary)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"\nReport written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
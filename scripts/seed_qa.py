@@ -25,7 +25,7 @@ from app.data.seed_bank import (
     SITUATIONS,
     SITUATION_WORDS,
 )
-from app.data.grammar_situations import GRAMMAR_SITUATIONS, GRAMMAR_WORD_TRANSLATIONS
+from app.data.grammar_situations import GRAMMAR_ANIMATION_TYPE, GRAMMAR_SITUATIONS, GRAMMAR_WORD_TRANSLATIONS
 
 engine = create_engine(settings.database_url, pool_pre_ping=True)
 Session = sessionmaker(bind=engine)
@@ -113,7 +113,7 @@ def seed():
             stmt = insert(Situation).values(
                 id=sid,
                 title=cfg["title"],
-                animation_type="grammar",
+                animation_type=GRAMMAR_ANIMATION_TYPE,
                 encounter_number=cfg["vocab_level"],
                 order_index=order_offset + cfg["vocab_level"],
                 is_free=True,
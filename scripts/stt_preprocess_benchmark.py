@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""STT preprocessing benchmark: bytes uploaded and STT latency, original vs preprocessed.
+
+Runs every recording in a corpus directory through the preprocessing stage
+(app/services/audio_preprocess.py: mono 16 kHz, energy-VAD trim, Opus) and
+reports, per file and in total:
+
+  original / processed bytes, duration before / after trimming, preprocess ms
+  with --transcribe: STT latency (gpt-4o-mini-transcribe) and transcript for both
+
+The "processed" upload is what the gateway would send: the original when the
+VAD finds no speech in a non-silent recording or the re-encode isn't smaller,
+nothing (STT skipped) when the recording is silent.
+
+Needs ffmpeg on PATH (and OPENAI_API_KEY for --transcribe). Use real device
+recordings (webm/mp4/wav) for representative numbers, since those carry the
+silence and 48 kHz stereo the stage removes.
+
+Usage:
+    python scripts/stt_preprocess_benchmark.py recordings/
+    python scripts/stt_preprocess_benchmark.py recordings/ --transcribe --limit 20
+"""
+
+import argparse
+import io
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.audio_preprocess import OUTPUT_FILENAME, _preprocess_in_worker
+from app.services.openai_media_gateway import STT_MODEL
+from app.utils.audio_duration import audio_duration_seconds
+
+AUDIO_SUFFIXES = {".webm", ".mp4", ".m4a", ".wav", ".mp3", ".ogg"}
+
+
+def transcribe(client, audio_bytes: bytes, filename: str):
+    audio_file = io.BytesIO(audio_bytes)
+    audio_file.name = filename
+    start = time.perf_counter()
+    text = client.audio.transcriptions.create(model=STT_MODEL, file=audio_file).text
+    return (time.perf_counter() - start) * 1000, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=Path, help="directory of recorded uploads")
+    parser.add_argument("--transcribe", action="store_true", help="also measure STT latency (API calls)")
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    files = sorted(p for p in args.corpus.iterdir() if p.suffix.lower() in AUDIO_SUFFIXES)[:args.limit]
+    if not files:
+        sys.exit(f"No recordings found in {args.corpus}")
+    if not shutil.which("ffmpeg"):
+        sys.exit("ffmpeg not found on PATH")
+
+    client = None
+    if args.transcribe:
+        from openai import OpenAI
+        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+
+    header = f"{'file':<32}{'bytes':>10}{'→ bytes':>10}{'sec':>7}{'→ sec':>7}{'prep ms':>9}"
+    if client:
+        header += f"{'stt ms':>9}{'→ stt ms':>10}"
+    print(header)
+
+    totals = {"bytes": 0, "processed": 0, "seconds": 0.0, "speech": 0.0, "prep_ms": 0.0, "stt": 0.0, "stt_processed": 0.0}
+    for path in files:
+        original = path.read_bytes()
+        start = time.perf_counter()
+        encoded, speech_seconds, decoded_seconds = _preprocess_in_worker(original)
+        prep_ms = (time.perf_counter() - start) * 1000
+        seconds = audio_duration_seconds(original) or decoded_seconds
+        processed_name = OUTPUT_FILENAME
+        if encoded is None or (speech_seconds and len(encoded) >= len(original)):
+            # The gateway falls back to the original upload
+            encoded, speech_seconds, processed_name = original, seconds, path.name
+
+        totals["bytes"] += len(original)
+        totals["processed"] += len(encoded)
+        totals["seconds"] += seconds
+        totals["speech"] += speech_seconds
+        totals["prep_ms"] += prep_ms
+        line = (f"{path.name[:31]:<32}{len(original):>10}{len(encoded):>10}"
+                f"{seconds:>7.2f}{speech_seconds:>7.2f}{prep_ms:>9.1f}")
+        if client:
+            stt_ms, text = transcribe(client, original, path.name)
+            stt_processed_ms, processed_text = transcribe(client, encoded, processed_name) if encoded else (0.0, "")
+            totals["stt"] += stt_ms
+            totals["stt_processed"] += stt_processed_ms
+            line += f"{stt_ms:>9.0f}{stt_processed_ms:>10.0f}"
+            if text.strip() != processed_text.strip():
+                line += f"\n    original:     {text}\n    preprocessed: {processed_text}"
+        print(line)
+
+    n = len(files)
+    print(f"\n{n} files: {totals['bytes']} → {totals['processed']} bytes "
+          f"({100 * (1 - totals['processed'] / max(totals['bytes'], 1)):.0f}% smaller), "
+          f"{totals['seconds']:.1f}s → {totals['speech']:.1f}s audio, "
+          f"{totals['prep_ms'] / n:.1f} ms preprocessing per file")
+    if client:
+        print(f"STT latency per file: {totals['stt'] / n:.0f} ms → {totals['stt_processed'] / n:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Tests for header-based audio duration parsing (app/utils/audio_duration.py)."""
+import io
+import struct
+import wave
+
+import pytest
+
+from app.utils.audio_duration import audio_duration_seconds, sniff_format
+
+
+def _wav(seconds: float, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _full_box(kind: bytes, payload: bytes, version: int = 0, flags: int = 0) -> bytes:
+    return _box(kind, bytes([version]) + flags.to_bytes(3, "big") + payload)
+
+
+def _mp4(duration: int, timescale: int = 1000) -> bytes:
+    mvhd = _full_box(b"mvhd", struct.pack(">IIII", 0, 0, timescale, duration) + b"\x00" * 80)
+    return _box(b"ftyp", b"M4A \x00\x00\x00\x00") + _box(b"mdat", b"\x00" * 500) + _box(b"moov", mvhd)
+
+
+def _fragmented_mp4(fragments, sample_duration: int = 1024, timescale: int = 48000) -> bytes:
+    mvhd = _full_box(b"mvhd", struct.pack(">IIII", 0, 0, 1000, 0) + b"\x00" * 80)
+    mdhd = _full_box(b"mdhd", struct.pack(">IIII", 0, 0, timescale, 0) + b"\x00" * 4)
+    trex = _full_box(b"trex", struct.pack(">IIIII", 1, 1, sample_duration, 0, 0))
+    moov = _box(b"moov", mvhd + _box(b"trak", _box(b"mdia", mdhd)) + _box(b"mvex", trex))
+    body = _box(b"ftyp", b"iso5\x00\x00\x00\x00") + moov
+    for samples in fragments:
+        tfhd = _full_box(b"tfhd", struct.pack(">I", 1), flags=0x20000)
+        trun = _full_box(b"trun", struct.pack(">II", samples, 0), flags=0x1)
+        body += _box(b"moof", _box(b"traf", tfhd + trun)) + _box(b"mdat", b"\x00" * 64)
+    return body
+
+
+def _ebml(element_id: int, payload: bytes) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + bytes([0x80 | len(payload)]) + payload
+
+
+UNKNOWN_SIZE = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+
+
+def _webm(block_ms, opus_toc: int = 0xFC) -> bytes:
+    """Chrome-style recording: no Duration, unknown-size Segment/Clusters, 20ms Opus blocks."""
+    header = _ebml(0x1A45DFA3, _ebml(0x4282, b"webm"))
+    info = _ebml(0x1549A966, _ebml(0x2AD7B1, (1_000_000).to_bytes(3, "big")))
+    clusters = b""
+    for start in range(0, len(block_ms), 50):
+        ts = block_ms[start]
+        clusters += b"\x1f\x43\xb6\x75" + UNKNOWN_SIZE + _ebml(0xE7, ts.to_bytes(2, "big"))
+        for t in block_ms[start:start + 50]:
+            clusters += _ebml(0xA3, b"\x81" + struct.pack(">h", t - ts) + b"\x80" + bytes([opus_toc]) + b"\x00" * 20)
+    return header + b"\x18\x53\x80\x67" + UNKNOWN_SIZE + info + clusters
+
+
+def _mp3_cbr(frames: int) -> bytes:
+    # MPEG1 Layer III, 128 kbps, 44.1 kHz, no padding: 417-byte frames
+    frame = b"\xff\xfb\x90\x00" + b"\x00" * 413
+    return b"ID3\x03\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10 + frame * frames
+
+
+def _ogg_opus(samples_48k: int, pre_skip: int = 312) -> bytes:
+    def page(granule: int, payload: bytes) -> bytes:
+        return b"OggS\x00\x00" + struct.pack("<qIII", granule, 1, 0, 0) + bytes([1, len(payload)]) + payload
+    head = b"OpusHead\x01\x01" + struct.pack("<HIhB", pre_skip, 48000, 0, 0)
+    return page(0, head) + page(samples_48k + pre_skip, b"\x00" * 20)
+
+
+@pytest.mark.parametrize("data, expected", [
+    (_wav(2.5), 2.5),
+    (_mp4(3250), 3.25),
+    (_fragmented_mp4([47, 47, 47]), 3 * 47 * 1024 / 48000),
+    (_webm(list(range(0, 4000, 20))), 4.0),
+    (_mp3_cbr(100), 100 * 417 * 8 / 128000),
+    (_ogg_opus(48000 * 3), 3.0),
+])
+def test_duration_from_headers(data, expected):
+    assert audio_duration_seconds(data) == pytest.approx(expected, abs=0.01)
+
+
+def test_sniffs_container_not_filename():
+    assert sniff_format(_wav(0.1)) == "wav"
+    assert sniff_format(_webm([0, 20])) == "webm"
+    assert sniff_format(_fragmented_mp4([1])) == "mp4"
+
+
+def test_unknown_or_truncated_input_returns_none():
+    assert audio_duration_seconds(b"") is None
+    assert audio_duration_seconds(b"not audio at all") is None
+    assert audio_duration_seconds(_mp4(3250)[:20]) is None
+    # A truncated recording still reports what it contains
+    assert 3.5 < audio_duration_seconds(_webm(list(range(0, 4000, 20)))[:-200]) < 4.0
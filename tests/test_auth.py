@@ -41,3 +41,15 @@ def test_login_wrong_password(client):
         "password": "wrongpassword123",
     })
     assert resp.status_code == 401
+
+
+def test_metrics_are_admin_only(client, db):
+    from app.models import User
+
+    assert client.get("/metrics").status_code in (401, 403)
+    _, headers = register_user(client, email="metrics@example.com")
+    assert client.get("/metrics", headers=headers).status_code == 403
+
+    db.query(User).filter(User.email == "metrics@example.com").update({"is_admin": True})
+    db.flush()
+    assert client.get("/metrics", headers=headers).status_code == 200
@@ -0,0 +1,89 @@
+import gzip
+import json
+
+from app.api.v1 import logs
+
+
+def _event(i, event="screen_view", level="info"):
+    return {
+        "level": level,
+        "event": event,
+        "message": f"event {i}",
+        "request_id": f"req-{i}",
+        "metadata": {"i": i},
+    }
+
+
+def test_single_event(client):
+    resp = client.post("/v1/log", json=_event(1))
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "logged"}
+
+
+def test_batch_json_array(client):
+    resp = client.post("/v1/log/batch", json=[_event(i) for i in range(5)])
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["received"] == 5
+    assert data["logged"] == 5
+
+
+def test_batch_gzip_ndjson(client):
+    body = "\n".join(json.dumps(_event(i)) for i in range(3)).encode()
+    resp = client.post(
+        "/v1/log/batch",
+        content=gzip.compress(body),
+        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["logged"] == 3
+
+
+def test_batch_validates_every_event(client):
+    bad = _event(2)
+    del bad["message"]
+    resp = client.post("/v1/log/batch", json={"events": [_event(1), bad]})
+    assert resp.status_code == 422
+
+
+def test_batch_sampling_keeps_errors(client, monkeypatch):
+    monkeypatch.setitem(logs.EVENT_SAMPLE_RATES, "scroll", 0.0)
+    events = [_event(i, event="scroll") for i in range(4)] + [_event(9, event="scroll", level="error")]
+    resp = client.post("/v1/log/batch", json=events)
+    data = resp.json()
+    assert data["sampled_out"] == 4
+    assert data["logged"] == 1
+
+
+def test_batch_rate_limited_per_user(client, monkeypatch):
+    monkeypatch.setattr(logs, "_rate_limiter", logs._EventRateLimiter(per_minute=3))
+    events = [dict(_event(i), user_id="rate-limited-user") for i in range(5)]
+    first = client.post("/v1/log/batch", json=events).json()
+    assert first["logged"] == 3
+    assert first["rate_limited"] == 2
+
+    second = client.post("/v1/log/batch", json=events)
+    assert second.status_code == 429
+
+
+def test_anonymous_batches_share_the_client_ip_bucket(client, monkeypatch):
+    monkeypatch.setattr(logs, "_rate_limiter", logs._EventRateLimiter(per_minute=3))
+    first = client.post("/v1/log/batch", json=[dict(_event(i), user_id="claimed-a") for i in range(2)]).json()
+    second = client.post("/v1/log/batch", json=[dict(_event(i), user_id="claimed-b") for i in range(2)]).json()
+    assert first["logged"] == 2
+    assert second["logged"] == 1 and second["rate_limited"] == 1
+
+
+def test_oversized_batches_are_rejected_before_parsing(client, monkeypatch):
+    monkeypatch.setattr(logs, "MAX_BATCH_BYTES", 100)
+    body = json.dumps([_event(i) for i in range(5)]).encode()
+    assert client.post("/v1/log/batch", content=body).status_code == 413
+
+    def chunked():
+        yield body[:60]
+        yield body[60:]
+
+    assert client.post("/v1/log/batch", content=chunked()).status_code == 413
+    bomb = gzip.compress(b"[" + b" " * 10_000 + b"]")
+    assert len(bomb) < 100
+    assert client.post("/v1/log/batch", content=bomb, headers={"Content-Encoding": "gzip"}).status_code == 413
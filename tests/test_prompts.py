@@ -12,7 +12,12 @@ from app.services.voice_turn_service import (
     get_conversation_system_prompt,
     build_conversation_prompt,
     build_system_prompt,
+    build_transcription_prompt,
+    build_voice_system_prompt,
+    warm_prompt_cache,
+    _render_system_prompt,
 )
+from app.services.prompt_registry import get_registry
 from app.data.situation_roles import (
     SITUATION_ROLES,
     GRAMMAR_SCENE_MAP,
@@ -182,3 +187,43 @@ class TestBuildConversationPrompt:
         )
         assert "Catalan" in prompt
         assert "Spanish" not in prompt
+
+
+class TestPromptMemoization:
+    def test_system_prompt_is_cached(self):
+        """A repeated build_system_prompt call is a cache hit with an identical result."""
+        first = build_system_prompt("banking", "bank_1", "english", catalan_mode=False)
+        hits = _render_system_prompt.cache_info().hits
+        assert build_system_prompt("banking", "bank_1", "english", catalan_mode=False) == first
+        assert _render_system_prompt.cache_info().hits == hits + 1
+
+    def test_registry_reload_invalidates(self, monkeypatch):
+        """A new prompt registry version is a cache miss."""
+        build_system_prompt("police", "pol_1", "english", catalan_mode=True)
+        registry = get_registry()
+        monkeypatch.setattr(registry, "version", registry.version + 1000)
+        monkeypatch.setattr(registry, "reload_interval", -1)
+        misses = _render_system_prompt.cache_info().misses
+        build_system_prompt("police", "pol_1", "english", catalan_mode=True)
+        assert _render_system_prompt.cache_info().misses == misses + 1
+
+    def test_transcription_prompt_keyed_on_words(self):
+        """Same title and words give the same prompt; different words don't."""
+        class W:
+            def __init__(self, spanish):
+                self.spanish = spanish
+        a = build_transcription_prompt("Banking", [W("banco"), W("cajero")])
+        assert a == build_transcription_prompt("Banking", [W("banco"), W("cajero")])
+        assert a != build_transcription_prompt("Banking", [W("banco")])
+
+    def test_warm_prompt_cache_covers_catalog(self):
+        """Warming builds every catalog situation in both languages."""
+        assert warm_prompt_cache() > 1000
+
+
+    def test_warm_prompt_cache_covers_grammar_voice_turns(self):
+        """Grammar voice turns hit the prompts warmed at startup."""
+        warm_prompt_cache()
+        misses = _render_system_prompt.cache_info().misses
+        build_voice_system_prompt("grammar_pronouns", "grammar", "english", catalan_mode=True)
+        assert _render_system_prompt.cache_info().misses == misses
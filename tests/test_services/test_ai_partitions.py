@@ -0,0 +1,80 @@
+"""Tests for AI request partition naming and retention windows."""
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.services import ai_partition_service
+from app.services.ai_partition_service import (
+    add_months,
+    apply_retention,
+    ensure_partitions,
+    list_partitions,
+    month_start,
+    partition_month,
+    partition_name,
+)
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+def test_month_helpers():
+    start = month_start(datetime(2026, 12, 17, 15, 30, tzinfo=timezone.utc))
+    assert start == datetime(2026, 12, 1, tzinfo=timezone.utc)
+    assert add_months(start, 1) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+    assert add_months(start, -12) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+
+def test_partition_name_roundtrip():
+    month = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    name = partition_name("llm_requests", month)
+    assert name == "llm_requests_p202603"
+    assert partition_month(name) == month
+    assert partition_month("llm_requests_default") is None
+
+
+def test_retention_skips_unpartitioned_tables(db):
+    # Test schema comes from create_all (plain tables) — retention must be a no-op
+    assert apply_retention(db, keep_months=1, dry_run=True) == []
+
+
+@pytest.fixture
+def partitioned(db, monkeypatch):
+    """A throwaway partitioned table (DDL is rolled back with the test transaction)."""
+    db.execute(text(
+        "CREATE TABLE part_test_requests (id serial, created_at timestamptz NOT NULL, "
+        "PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+    ))
+    db.execute(text("CREATE TABLE part_test_requests_default PARTITION OF part_test_requests DEFAULT"))
+    monkeypatch.setattr(ai_partition_service, "AI_PARTITIONED_TABLES", ("part_test_requests",))
+    return "part_test_requests"
+
+
+def _count(db, table):
+    return db.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+
+
+def test_ensure_partitions_creates_the_coming_months(db, partitioned):
+    created = ensure_partitions(db, months_ahead=2, now=NOW)
+    assert created == [f"{partitioned}_p202610", f"{partitioned}_p202611", f"{partitioned}_p202612"]
+    assert ensure_partitions(db, months_ahead=2, now=NOW) == []
+
+
+def test_ensure_partitions_moves_rows_out_of_the_default_partition(db, partitioned):
+    db.execute(text(f"INSERT INTO {partitioned} (created_at) VALUES ('2026-06-15'), ('2026-10-02'), ('2026-10-20')"))
+
+    created = ensure_partitions(db, months_ahead=0, now=NOW)
+    assert created == [f"{partitioned}_p202606", f"{partitioned}_p202610"]
+    assert _count(db, f"{partitioned}_default") == 0
+    assert _count(db, f"{partitioned}_p202610") == 2 and _count(db, f"{partitioned}_p202606") == 1
+
+
+def test_retention_drops_old_partitions(db, partitioned, tmp_path):
+    ensure_partitions(db, months_ahead=0, now=datetime(2026, 7, 1, tzinfo=timezone.utc))
+    ensure_partitions(db, months_ahead=0, now=NOW)
+    db.execute(text(f"INSERT INTO {partitioned} (created_at) VALUES ('2026-07-04')"))
+
+    assert [r["partition"] for r in apply_retention(db, keep_months=2, dry_run=True, now=NOW)] == [f"{partitioned}_p202607"]
+    results = apply_retention(db, keep_months=2, now=NOW)
+    assert [r["partition"] for r in results] == [f"{partitioned}_p202607"]
+    assert list_partitions(db, partitioned) == [f"{partitioned}_default", f"{partitioned}_p202610"]
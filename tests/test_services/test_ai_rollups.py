@@ -0,0 +1,88 @@
+"""Tests for hourly AI request rollups and latency sketches."""
+import random
+from datetime import datetime, timedelta, timezone
+
+from app.models import AIRequestRollup
+from app.services.ai_rollup_service import (
+    ALL_TIME,
+    DEFAULT_WINDOW_DAYS,
+    get_rollup_stats,
+    merge_sketches,
+    record_ai_request,
+    sketch_bin,
+    sketch_quantile,
+)
+
+
+def test_sketch_quantiles_within_relative_error():
+    rng = random.Random(7)
+    latencies = sorted(rng.randint(50, 5000) for _ in range(2000))
+    sketch = {}
+    for ms in latencies:
+        b = sketch_bin(ms)
+        sketch[b] = sketch.get(b, 0) + 1
+
+    for q in (0.5, 0.95, 0.99):
+        exact = latencies[int(q * (len(latencies) - 1))]
+        estimate = sketch_quantile(sketch, q)
+        assert abs(estimate - exact) / exact < 0.05
+
+
+def test_merge_sketches_adds_bins():
+    merged = merge_sketches([{"10": 2, "11": 1}, {"11": 3}, None])
+    assert merged == {10: 2, 11: 4}
+
+
+def test_record_ai_request_upserts_one_row(db):
+    for ms in (100, 200, 300):
+        record_ai_request(db, "llm", "rollup-test-model", True, ms, 0.01, agent_id="conversation_agent", learning_phase="2")
+    record_ai_request(db, "llm", "rollup-test-model", False, 50, agent_id="conversation_agent", learning_phase="2")
+
+    rows = db.query(AIRequestRollup).filter(AIRequestRollup.model == "rollup-test-model").all()
+    assert len(rows) == 1
+    row = rows[0]
+    assert row.calls == 3
+    assert row.errors == 1
+    assert row.latency_sum_ms == 600
+    assert row.latency_min_ms == 100
+    assert row.latency_max_ms == 300
+    assert sum(row.latency_sketch.values()) == 3
+
+
+def test_get_rollup_stats_groups_and_percentiles(db):
+    for ms in (100, 100, 1000):
+        record_ai_request(db, "stt", "stats-model-a", True, ms, 0.002)
+    record_ai_request(db, "stt", "stats-model-b", True, 400, 0.001, learning_phase="3")
+
+    stats = {s["model"]: s for s in get_rollup_stats(db, "stt", group_by="model")}
+    assert stats["stats-model-a"]["calls"] == 3
+    assert stats["stats-model-a"]["avg_ms"] == 400
+    assert stats["stats-model-a"]["p50_ms"] is not None
+    assert abs(stats["stats-model-a"]["p50_ms"] - 100) / 100 < 0.05
+
+    by_phase = get_rollup_stats(db, "stt", group_by="learning_phase", interval="hour")
+    assert any(s["learning_phase"] == "3" and "period_start" in s for s in by_phase)
+
+
+def test_rollup_reports_prompt_cache_hit_rate(db):
+    record_ai_request(db, "llm", "cache-model", True, 100, tokens_in=1000, cached_tokens=768)
+    record_ai_request(db, "llm", "cache-model", True, 100, tokens_in=1000, cached_tokens=0)
+    record_ai_request(db, "llm", "cache-model-none", True, 100)
+
+    stats = {s["model"]: s for s in get_rollup_stats(db, "llm", group_by="model")}
+    assert stats["cache-model"]["tokens_in"] == 2000
+    assert stats["cache-model"]["cached_tokens"] == 768
+    assert stats["cache-model"]["cache_hit_rate"] == 0.384
+    assert stats["cache-model-none"]["cache_hit_rate"] is None
+
+
+def test_get_rollup_stats_defaults_to_a_recent_window(db):
+    old = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(days=DEFAULT_WINDOW_DAYS + 1)
+    db.add(AIRequestRollup(bucket_start=old, kind="tts", model="window-model", agent_id="", learning_phase="",
+                           calls=1, errors=0, latency_sum_ms=100, cost_sum=0, latency_sketch={}))
+    record_ai_request(db, "tts", "window-model", True, 200)
+    db.flush()
+
+    stats = {s["model"]: s for s in get_rollup_stats(db, "tts")}
+    assert stats["window-model"]["calls"] == 1
+    assert {s["model"]: s for s in get_rollup_stats(db, "tts", start=ALL_TIME)}["window-model"]["calls"] == 2
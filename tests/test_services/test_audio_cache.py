@@ -0,0 +1,121 @@
+"""Tests for the /tmp/audio LRU cache and the /audio static mount."""
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.services import audio_cache
+from app.services.audio_cache import AudioCache, AudioFiles
+
+
+def _write(cache: AudioCache, name: str, size: int):
+    path = cache.directory / name
+    path.write_bytes(b"x" * size)
+    cache.register(str(path))
+    return path
+
+
+def test_register_evicts_least_recently_used(tmp_path):
+    metrics.reset()
+    cache = AudioCache(tmp_path, max_bytes=250)
+    a = _write(cache, "a.mp3", 100)
+    b = _write(cache, "b.mp3", 100)
+    cache.touch("a.mp3")
+    c = _write(cache, "c.mp3", 100)
+
+    assert a.exists() and c.exists() and not b.exists()
+    assert cache.stats()["audio_cache_bytes"] == 200
+    assert metrics.get_counter("audio_cache_evictions", reason="size") == 1
+
+
+def test_files_outside_the_directory_are_ignored(tmp_path):
+    cache = AudioCache(tmp_path / "audio", max_bytes=10)
+    (tmp_path / "audio").mkdir()
+    other = tmp_path / "elsewhere.mp3"
+    other.write_bytes(b"x" * 100)
+    cache.register(str(other))
+    assert other.exists() and cache.stats()["audio_cache_files"] == 0
+
+
+def test_expire_drops_files_unused_for_too_long(tmp_path):
+    cache = AudioCache(tmp_path, max_bytes=10_000)
+    old = _write(cache, "old.mp3", 10)
+    new = _write(cache, "new.mp3", 10)
+    cache._entries["old.mp3"] = (10, time.time() - 7200)
+
+    assert cache.expire(3600) == 1
+    assert not old.exists() and new.exists()
+
+
+def test_load_indexes_existing_files_oldest_first(tmp_path):
+    for i, name in enumerate(["1.mp3", "2.mp3", "3.mp3"]):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+
+    cache = AudioCache(tmp_path, max_bytes=200)
+    assert cache.load() == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["2.mp3", "3.mp3"]
+
+
+def test_audio_mount_sets_caching_headers_and_serves_ranges(tmp_path, monkeypatch):
+    cache = AudioCache(tmp_path, max_bytes=10_000)
+    monkeypatch.setattr(audio_cache, "_cache", cache)
+    (tmp_path / "clip.mp3").write_bytes(bytes(range(100)))
+    cache.register(str(tmp_path / "clip.mp3"))
+    cache._entries["clip.mp3"] = (100, 0.0)
+
+    app = FastAPI()
+    app.mount("/audio", AudioFiles(directory=str(tmp_path)), name="audio")
+    client = TestClient(app)
+
+    response = client.get("/audio/clip.mp3")
+    assert response.status_code == 200
+    assert "max-age" in response.headers["cache-control"]
+    assert cache._entries["clip.mp3"][1] > 0  # touched
+
+    etag = response.headers["etag"]
+    assert client.get("/audio/clip.mp3", headers={"If-None-Match": etag}).status_code == 304
+
+    partial = client.get("/audio/clip.mp3", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == bytes(range(10, 20))
+
+
+def test_eviction_spares_recently_used_files(tmp_path):
+    cache = AudioCache(tmp_path, max_bytes=150, min_age_seconds=60)
+    old = _write(cache, "old.mp3", 100)
+    cache._entries["old.mp3"] = (100, time.time() - 120)
+    fresh = _write(cache, "fresh.mp3", 100)
+    newest = _write(cache, "newest.mp3", 100)
+
+    assert not old.exists() and fresh.exists() and newest.exists()
+    assert cache.stats()["audio_cache_bytes"] == 200  # over budget until they age
+
+
+def test_load_keeps_files_registered_during_the_scan(tmp_path, monkeypatch):
+    (tmp_path / "old.mp3").write_bytes(b"x" * 10)
+    cache = AudioCache(tmp_path, max_bytes=10_000)
+    real_scandir = os.scandir
+
+    def scandir_then_register(path):
+        it = real_scandir(path)
+        _write(cache, "new.mp3", 20)
+        return it
+
+    monkeypatch.setattr(os, "scandir", scandir_then_register)
+    cache.load()
+    assert list(cache._entries) == ["old.mp3", "new.mp3"]
+    assert cache.stats()["audio_cache_bytes"] == 30
+
+
+def test_concatenated_files_are_registered(tmp_path, monkeypatch):
+    from app.utils.audio import concatenate_audio_files
+
+    cache = AudioCache(tmp_path, max_bytes=10_000)
+    monkeypatch.setattr(audio_cache, "_cache", cache)
+    parts = [_write(cache, name, 10) for name in ("a.mp3", "b.mp3")]
+    concatenate_audio_files(parts, str(tmp_path / "joined.mp3"))
+    assert cache._entries["joined.mp3"][0] == 20
@@ -0,0 +1,112 @@
+"""Tests for the PCM16 encoder service (warm process pool, streaming, concurrency bound).
+
+ffmpeg isn't required: the encoder command is replaced by a Python process that
+echoes stdin to stdout chunk by chunk, which exercises the same pipes.
+"""
+import asyncio
+import sys
+
+import pytest
+
+from app.config import settings
+from app.core import metrics
+from app.core.provider_limits import ProviderBusyError
+from app.services import audio_encoder
+from app.services.realtime_service import pcm16_to_mp3
+
+ECHO = (
+    "import sys\n"
+    "while True:\n"
+    "    data = sys.stdin.buffer.read1(4096)\n"
+    "    if not data:\n"
+    "        break\n"
+    "    sys.stdout.buffer.write(data)\n"
+    "    sys.stdout.buffer.flush()\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def echo_encoder(monkeypatch):
+    monkeypatch.setattr(audio_encoder, "lameenc", None)
+    monkeypatch.setattr(audio_encoder, "encoder_command", lambda fmt, rate: [sys.executable, "-c", ECHO])
+    monkeypatch.setattr(audio_encoder, "_limiter", None)
+    metrics.reset()
+    yield
+    audio_encoder.shutdown_encoders()
+
+
+async def _chunks(*chunks, delay=0.0):
+    for chunk in chunks:
+        yield chunk
+        await asyncio.sleep(delay)
+
+
+def test_stream_encodes_every_chunk():
+    async def run():
+        return [c async for c in audio_encoder.encode_stream(_chunks(b"ab", b"cd", b"ef", delay=0.2), "opus")]
+
+    out = asyncio.run(run())
+    assert b"".join(out) == b"abcdef"
+    assert len(out) >= 2  # output was yielded while input was still arriving
+
+
+def test_warm_processes_are_reused_and_replaced(monkeypatch):
+    monkeypatch.setattr(settings, "audio_encoder_warm_processes", 1)
+    audio_encoder._warm.fill("mp3", 24000)
+    assert audio_encoder._warm.idle_count() == 1
+
+    assert asyncio.run(audio_encoder.encode_pcm(b"xyz", "mp3")) == b"xyz"
+    assert metrics.get_counter("audio_encoder_take", format="mp3", warm=True) == 1
+    for _ in range(50):  # refilled in the background
+        if audio_encoder._warm.idle_count() == 1:
+            break
+        asyncio.run(asyncio.sleep(0.05))
+    assert audio_encoder._warm.idle_count() == 1
+
+
+def test_concurrency_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "audio_encoder_max_concurrency", 1)
+    monkeypatch.setattr(settings, "audio_encoder_max_queue", 0)
+
+    async def slow():
+        yield b"a"
+        await asyncio.sleep(0.3)
+
+    async def run():
+        consume = asyncio.create_task(_drain(audio_encoder.encode_stream(slow(), "opus")))
+        await asyncio.sleep(0.1)
+        with pytest.raises(ProviderBusyError):
+            await audio_encoder.encode_pcm(b"b", "opus")
+        assert b"".join(await consume) == b"a"
+
+    asyncio.run(run())
+
+
+async def _drain(stream):
+    return [c async for c in stream]
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(audio_encoder.encode_pcm(b"x", "flac"))
+
+
+def test_pcm16_to_mp3_writes_the_encoded_file(tmp_path):
+    path = tmp_path / "clip.mp3"
+    pcm16_to_mp3(b"\x01\x02\x03\x04", str(path))
+    assert path.read_bytes() == b"\x01\x02\x03\x04"
+
+
+def test_one_refill_thread_per_key_and_no_startup_warm_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "audio_encoder_warm_processes", 1)
+    assert audio_encoder.warm_encoders() == 0  # audio_encoder_prewarm is off
+
+    async def run():
+        return await asyncio.gather(*(audio_encoder.encode_pcm(b"x", "opus") for _ in range(4)))
+
+    assert asyncio.run(run()) == [b"x"] * 4
+    for _ in range(50):
+        if audio_encoder._warm.idle_count() == 1 and not audio_encoder._warm._filling:
+            break
+        asyncio.run(asyncio.sleep(0.05))
+    assert audio_encoder._warm.idle_count() == 1  # one refill worker, not one per take
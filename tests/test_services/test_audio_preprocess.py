@@ -0,0 +1,59 @@
+"""Tests for the optional STT preprocessing stage."""
+import asyncio
+import math
+import struct
+
+from app.config import settings
+from app.services import audio_preprocess
+from app.services.audio_preprocess import SAMPLE_RATE, preprocess_for_stt, trim_silence
+
+
+def _pcm(*segments):
+    """16 kHz PCM from (seconds, amplitude) segments; amplitude 0 is silence."""
+    samples = []
+    for seconds, amplitude in segments:
+        n = int(seconds * SAMPLE_RATE)
+        samples += [int(amplitude * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE)) for i in range(n)]
+    return struct.pack(f"<{len(samples)}h", *samples)
+
+
+def test_trim_keeps_speech_plus_padding():
+    pcm = _pcm((0.8, 0), (1.0, 8000), (0.6, 0))
+    trimmed = trim_silence(pcm, padding_ms=200)
+    seconds = len(trimmed) / 2 / SAMPLE_RATE
+    assert abs(seconds - 1.4) <= 0.04
+
+
+def test_quiet_speech_is_not_trimmed_away_but_silence_is():
+    quiet = _pcm((0.5, 20), (1.0, 600), (0.5, 20))
+    assert 1.0 <= len(trim_silence(quiet, padding_ms=0)) / 2 / SAMPLE_RATE <= 1.04
+    assert trim_silence(_pcm((1.0, 20))) == b""
+
+
+def test_disabled_or_failing_preprocessing_returns_the_upload(monkeypatch):
+    result = asyncio.run(preprocess_for_stt(b"webm bytes", "turn.webm"))
+    assert not result.changed and result.audio_bytes == b"webm bytes"
+
+    monkeypatch.setattr(settings, "stt_preprocess_enabled", True)
+    monkeypatch.setattr(audio_preprocess, "_ffmpeg", _broken_ffmpeg)
+    monkeypatch.setattr(settings, "stt_preprocess_workers", 1)
+    try:
+        result = asyncio.run(preprocess_for_stt(b"not audio", "turn.webm"))
+    finally:
+        audio_preprocess.shutdown_pool()
+    assert not result.changed and result.filename == "turn.webm"
+
+
+def _broken_ffmpeg(args, data):
+    raise RuntimeError("ffmpeg failed")
+
+
+def test_only_truly_silent_uploads_skip_stt(monkeypatch):
+    quiet = _pcm((1.0, 100))  # below the VAD floor, but not silence
+    monkeypatch.setattr(audio_preprocess, "_ffmpeg", lambda args, data: quiet)
+    encoded, speech_seconds, _ = audio_preprocess._preprocess_in_worker(b"webm bytes")
+    assert encoded is None and speech_seconds == 0.0  # the original is transcribed
+
+    silent = _pcm((1.0, 5))
+    monkeypatch.setattr(audio_preprocess, "_ffmpeg", lambda args, data: silent)
+    assert audio_preprocess._preprocess_in_worker(b"webm bytes")[0] == b""
@@ -0,0 +1,55 @@
+"""Tests for the circuit breaker state machine."""
+import time
+
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def _breaker(**kwargs):
+    options = dict(failure_threshold=3, failure_ratio=0.5, window_seconds=60, open_seconds=0.05, success_threshold=2)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def test_opens_after_enough_failures():
+    breaker = _breaker()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_occasional_failures_among_successes_keep_it_closed():
+    breaker = _breaker()
+    for _ in range(3):
+        for _ in range(4):
+            breaker.record_success()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_one_probe_and_closes_after_successes():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_success()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["open_remaining_s"] is not None
@@ -0,0 +1,117 @@
+"""Tests for context-window compaction."""
+import asyncio
+import uuid
+
+from app.models import Conversation, User
+from app.services import llm_gateway
+from app.services.context_compaction import compact_context, estimate_tokens, refresh_summary, trim_messages
+from app.services.conversation_history import append_turns, start_session
+
+
+def _turns(n):
+    turns = [{"seq": 1, "role": "assistant", "content": "¡Hola! ¿Qué desea?"}]
+    for i in range(n):
+        turns.append({"seq": 2 + 2 * i, "role": "user", "content": f"user line {i} " * 5})
+        turns.append({"seq": 3 + 2 * i, "role": "assistant", "content": f"assistant line {i} " * 8})
+    return turns
+
+
+NEW = {"role": "user", "content": "¿Cuánto cuesta?"}
+
+
+def test_short_conversation_is_sent_verbatim():
+    turns = _turns(2)
+    ctx = compact_context("SYSTEM", turns, NEW, summary=None, session_no=1, keep_turns=6)
+    assert ctx.messages == [{"role": "system", "content": "SYSTEM"}] + [
+        {"role": t["role"], "content": t["content"]} for t in turns
+    ] + [NEW]
+    assert ctx.tokens_before == ctx.tokens_after
+    assert not ctx.needs_summary_refresh
+
+
+def test_summary_replaces_covered_turns():
+    turns = _turns(10)
+    summary = {"session_no": 1, "through_seq": 13, "text": "The learner ordered coffee."}
+    ctx = compact_context("SYSTEM", turns, NEW, summary=summary, session_no=1, keep_turns=3)
+
+    # Stable system prompt first, summary as its own message right after it
+    assert ctx.messages[0] == {"role": "system", "content": "SYSTEM"}
+    assert "The learner ordered coffee." in ctx.messages[1]["content"]
+    # seq 14..15 are older than the last 3 turns but not summarized yet: kept verbatim
+    assert [t["seq"] for t in ctx.pending_turns] == [14, 15]
+    assert len(ctx.messages) == 2 + 2 + 6 + 1
+    assert ctx.tokens_after < ctx.tokens_before
+
+
+def test_summary_from_previous_session_is_ignored():
+    turns = _turns(10)
+    summary = {"session_no": 1, "through_seq": 13, "text": "Old session."}
+    ctx = compact_context("SYSTEM", turns, NEW, summary=summary, session_no=2, keep_turns=3)
+    assert all("Old session." not in m["content"] for m in ctx.messages)
+    assert ctx.needs_summary_refresh
+
+
+def test_summary_ending_before_the_capped_window_is_kept():
+    # cap_history already dropped turns 1-20; the summary only reaches seq 15
+    turns = [{"seq": seq, "role": "user" if seq % 2 else "assistant", "content": f"line {seq}"} for seq in range(21, 61)]
+    summary = {"session_no": 1, "through_seq": 15, "text": "The learner ordered coffee."}
+    ctx = compact_context("SYSTEM", turns, NEW, summary=summary, session_no=1, keep_turns=6)
+
+    assert "The learner ordered coffee." in ctx.messages[1]["content"]
+    assert ctx.messages[2:-1] == [{"role": t["role"], "content": t["content"]} for t in turns]
+    assert ctx.needs_summary_refresh
+
+
+def test_trim_messages_keeps_system_and_last_turns():
+    messages = [{"role": "system", "content": "S"}] + [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": str(i)} for i in range(21)
+    ]
+    ctx = trim_messages(messages, keep_turns=2)
+    assert ctx.messages[0] == {"role": "system", "content": "S"}
+    assert [m["content"] for m in ctx.messages[1:]] == ["16", "17", "18", "19", "20"]
+    assert ctx.tokens_before == estimate_tokens(messages)
+
+
+def test_consecutive_turns_share_a_stable_prefix():
+    # Between summary refreshes each turn's context extends the previous one,
+    # so the provider can serve everything but the new tail from its prompt cache
+    summary = {"session_no": 1, "through_seq": 5, "text": "Earlier turns."}
+    turns = _turns(5)
+    before = compact_context("SYSTEM", turns, NEW, summary=summary, session_no=1, keep_turns=3)
+    after = compact_context(
+        "SYSTEM",
+        turns + [{"seq": 12, "role": "user", "content": NEW["content"]}, {"seq": 13, "role": "assistant", "content": "Son 3 euros."}],
+        {"role": "user", "content": "Gracias."},
+        summary=summary, session_no=1, keep_turns=3,
+    )
+    assert after.messages[:len(before.messages)] == before.messages
+
+
+def test_refresh_summary_awaits_the_llm_on_the_calling_loop(db, seed_data, monkeypatch):
+    user = User(email=f"{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    conv = Conversation(user_id=user.id, situation_id="bank_open_1", mode="voice",
+                        target_word_ids=[], used_typed_word_ids=[], used_spoken_word_ids=[])
+    db.add(conv)
+    db.flush()
+    conv_id = conv.id
+    session_no = start_session(db, conv.id, "Hola")
+    append_turns(db, conv.id, [("user", "Quiero una cuenta"), ("assistant", "Claro.")])
+    loops = []
+
+    async def fake_generate(context, _db):
+        loops.append(asyncio.get_running_loop())
+        assert not context.trim_history
+        return {"content": " The user wants an account. "}
+
+    monkeypatch.setattr(llm_gateway, "generate_conversation", fake_generate)
+    monkeypatch.setattr("app.database.SessionLocal", lambda: db)
+
+    async def run():
+        await refresh_summary(str(conv_id), session_no, 3)
+        return asyncio.get_running_loop()
+
+    assert loops == [asyncio.run(run())]
+    summary = db.get(Conversation, conv_id).history_summary  # refresh_summary closed the session
+    assert summary == {"session_no": session_no, "through_seq": 3, "text": "The user wants an account."}
@@ -0,0 +1,109 @@
+import threading
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app.models import User, Conversation, ConversationTurn, Situation
+from app.services.conversation_history import append_turns, cap_history, get_history, start_session
+from tests.conftest import engine
+
+
+def _conversation(db):
+    user = User(id=uuid.uuid4(), email=f"history-{uuid.uuid4().hex[:8]}@example.com", password_hash="fake")
+    db.add(user)
+    db.flush()
+    conversation = Conversation(
+        user_id=user.id, situation_id="bank_open_1", mode="voice",
+        target_word_ids=["enc_1"], used_typed_word_ids=[], used_spoken_word_ids=[],
+    )
+    db.add(conversation)
+    db.flush()
+    return conversation
+
+
+def test_history_appends_incrementally(db, seed_data):
+    conversation = _conversation(db)
+    start_session(db, conversation.id, "¡Hola! ¿En qué le puedo ayudar?")
+    assert get_history(db, conversation.id) == [{"role": "assistant", "content": "¡Hola! ¿En qué le puedo ayudar?"}]
+
+    append_turns(db, conversation.id, [("user", "Quiero abrir una cuenta"), ("assistant", "Perfecto.")])
+    history = get_history(db, conversation.id)
+    assert [m["role"] for m in history] == ["assistant", "user", "assistant"]
+    assert history[-1]["content"] == "Perfecto."
+
+
+def test_restart_opens_new_session(db, seed_data):
+    conversation = _conversation(db)
+    start_session(db, conversation.id, "Primera vez")
+    append_turns(db, conversation.id, [("user", "hola"), ("assistant", "buenas")])
+    get_history(db, conversation.id)
+
+    start_session(db, conversation.id, "Segunda vez")
+    assert get_history(db, conversation.id) == [{"role": "assistant", "content": "Segunda vez"}]
+
+
+def test_cap_history_keeps_most_recent():
+    messages = [{"role": "user", "content": "x" * 100} for _ in range(10)]
+    assert len(cap_history(messages, max_messages=4, max_chars=10_000)) == 4
+    assert len(cap_history(messages, max_messages=40, max_chars=350)) == 3
+    # The newest message is always kept, even if it alone exceeds the budget
+    assert len(cap_history(messages, max_messages=40, max_chars=10)) == 1
+
+
+def test_rolled_back_turns_are_dropped_from_the_cache(db, seed_data):
+    conversation = _conversation(db)
+    start_session(db, conversation.id, "Hola")
+    savepoint = db.begin_nested()
+    append_turns(db, conversation.id, [("user", "a"), ("assistant", "b")])
+    assert len(get_history(db, conversation.id)) == 3
+    savepoint.rollback()
+
+    assert get_history(db, conversation.id) == [{"role": "assistant", "content": "Hola"}]
+    append_turns(db, conversation.id, [("user", "c"), ("assistant", "d")])
+    assert [m["content"] for m in get_history(db, conversation.id)] == ["Hola", "c", "d"]
+
+
+def test_concurrent_turns_get_distinct_seqs():
+    """Every thread appends a turn pair at once; the row lock serializes them."""
+    setup = Session(engine)
+    user = User(email=f"history-{uuid.uuid4().hex[:8]}@example.com", password_hash="fake")
+    situation = Situation(id=f"race_{uuid.uuid4().hex[:8]}", title="Race", animation_type="banking",
+                          encounter_number=1, order_index=999)
+    setup.add_all([user, situation])
+    setup.flush()
+    conversation = Conversation(user_id=user.id, situation_id=situation.id, mode="voice",
+                                target_word_ids=[], used_typed_word_ids=[], used_spoken_word_ids=[])
+    setup.add(conversation)
+    setup.flush()
+    start_session(setup, conversation.id, "Hola")
+    setup.commit()
+    conversation_id = conversation.id
+    barrier = threading.Barrier(6)
+    errors = []
+
+    def turn(i):
+        with Session(engine) as db:
+            try:
+                barrier.wait(timeout=10)
+                append_turns(db, conversation_id, [("user", f"u{i}"), ("assistant", f"a{i}")])
+                db.commit()
+            except Exception as e:  # surfaced below
+                errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=turn, args=(i,)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=30)
+        assert errors == []
+        seqs = [seq for (seq,) in setup.query(ConversationTurn.seq).filter(
+            ConversationTurn.conversation_id == conversation_id).order_by(ConversationTurn.seq)]
+        assert seqs == list(range(1, 14))
+    finally:
+        setup.query(ConversationTurn).filter(ConversationTurn.conversation_id == conversation_id).delete()
+        setup.query(Conversation).filter(Conversation.id == conversation_id).delete()
+        setup.delete(user)
+        setup.delete(situation)
+        setup.commit()
+        setup.close()
@@ -0,0 +1,114 @@
+"""Tests for recording used words on a conversation (atomic JSONB append)."""
+import threading
+import uuid
+
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import Conversation, Situation, User
+from app.services.conversation_service import get_word_progress, record_used_words
+from tests.conftest import engine, register_user
+
+
+def _conversation(db, target_word_ids, used=()):
+    user = User(email=f"{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    conv = Conversation(
+        user_id=user.id, situation_id="bank_open_1", mode="voice",
+        target_word_ids=target_word_ids, used_typed_word_ids=[], used_spoken_word_ids=list(used),
+    )
+    db.add(conv)
+    db.flush()
+    return conv
+
+
+def test_appends_only_new_words_and_reports_progress(db, seed_data):
+    conv = _conversation(db, ["enc_1", "enc_2", "hf_1"], used=["enc_1"])
+
+    progress = record_used_words(db, conv, ["enc_2", "enc_1", "enc_2"], "voice")
+    assert progress.used_word_ids == ["enc_1", "enc_2"]
+    assert progress.missing_word_ids == ["hf_1"] and not progress.complete
+    assert conv.used_spoken_word_ids == ["enc_1", "enc_2"] and conv not in db.dirty
+
+    progress = record_used_words(db, conv, ["hf_1"], "voice")
+    assert progress.complete and progress.missing_word_ids == []
+    assert conv.status == "active"  # only set with mark_complete
+
+
+def test_mark_complete_sets_status_in_the_same_statement(db, seed_data):
+    conv = _conversation(db, ["enc_1", "enc_2"], used=["enc_1"])
+    assert not record_used_words(db, conv, [], "voice", mark_complete=True).complete
+    assert record_used_words(db, conv, ["enc_2"], "voice", mark_complete=True).complete
+    db.expire(conv)
+    assert conv.status == "complete" and conv.used_spoken_word_ids == ["enc_1", "enc_2"]
+
+
+def test_word_progress_is_read_from_the_row(db, seed_data):
+    conv = _conversation(db, ["enc_1", "enc_2"])
+    record_used_words(db, conv, ["enc_1", "enc_2"], "voice", mark_complete=True)
+    set_committed_value(conv, "used_spoken_word_ids", [])  # a stale copy, as loaded before the write
+
+    assert get_word_progress(db, conv.id, "voice").complete
+    assert not get_word_progress(db, conv.id, "text").complete
+
+
+def test_mark_word_endpoint(client, seed_data, db):
+    _, headers = register_user(client)
+    client.post("/v1/situations/bank_open_1/start", headers=headers)
+    conv_id = client.post("/v1/conversations", headers=headers, json={
+        "situation_id": "bank_open_1", "mode": "voice",
+    }).json()["conversation_id"]
+
+    resp = client.post(f"/v1/conversations/{conv_id}/mark-word", headers=headers, data={"word_id": "enc_1"})
+    assert resp.status_code == 200
+    assert "enc_1" not in resp.json()["missing_word_ids"]
+    assert resp.json()["conversation_complete"] is False
+
+
+def test_concurrent_turns_do_not_lose_words():
+    """Each thread loads the conversation, waits for the others, then records its own word."""
+    word_ids = [f"w{i}" for i in range(8)]
+    setup = Session(engine)
+    user = User(email=f"{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    situation = Situation(id=f"race_{uuid.uuid4().hex[:8]}", title="Race", animation_type="banking",
+                          encounter_number=1, order_index=999)
+    setup.add_all([user, situation])
+    setup.flush()
+    conv = Conversation(user_id=user.id, situation_id=situation.id, mode="voice",
+                        target_word_ids=word_ids, used_typed_word_ids=[], used_spoken_word_ids=[])
+    setup.add(conv)
+    setup.commit()
+    conv_id = conv.id
+    barrier = threading.Barrier(len(word_ids))
+    errors = []
+
+    def turn(word_id):
+        with Session(engine) as db:
+            try:
+                loaded = db.get(Conversation, conv_id)
+                assert loaded.used_spoken_word_ids == []
+                barrier.wait(timeout=10)
+                record_used_words(db, loaded, [word_id, "w0"], "voice", mark_complete=True)
+                db.commit()
+            except Exception as e:  # surfaced below
+                errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=turn, args=(w,)) for w in word_ids]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=30)
+        assert errors == []
+        setup.expire_all()
+        final = setup.get(Conversation, conv_id)
+        assert sorted(final.used_spoken_word_ids) == word_ids  # every word, no duplicates
+        assert final.status == "complete"
+    finally:
+        setup.delete(setup.get(Conversation, conv_id))
+        setup.flush()
+        setup.delete(user)
+        setup.delete(situation)
+        setup.commit()
+        setup.close()
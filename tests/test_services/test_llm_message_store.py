@@ -0,0 +1,40 @@
+"""Tests for the content-addressed LLM message store."""
+from app.models import LLMMessageBlob, LLMRequest
+from app.services.llm_message_store import (
+    get_request_messages,
+    load_messages,
+    message_hash,
+    store_messages,
+)
+
+
+def test_message_hash_ignores_key_order():
+    assert message_hash({"role": "user", "content": "hola"}) == message_hash({"content": "hola", "role": "user"})
+    assert message_hash({"role": "user", "content": "hola"}) != message_hash({"role": "user", "content": "Hola"})
+
+
+def test_store_messages_dedupes_and_round_trips(db):
+    system = {"role": "system", "content": "Eres un camarero en un café. " * 50}
+    turn_1 = [system, {"role": "user", "content": "Un café, por favor"}]
+    turn_2 = turn_1 + [{"role": "assistant", "content": "¡Claro!"}, {"role": "user", "content": "Gracias"}]
+
+    hashes_1 = store_messages(db, turn_1)
+    hashes_2 = store_messages(db, turn_2)
+
+    assert hashes_2[:2] == hashes_1
+    stored = db.query(LLMMessageBlob).filter(LLMMessageBlob.sha256.in_(hashes_2)).count()
+    assert stored == 4
+    assert load_messages(db, hashes_2) == turn_2
+
+
+def test_get_request_messages_reads_hashes_and_legacy_inline(db):
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+    hashed = LLMRequest(request_id="msg-store-test", provider="openai", model="m", prompt_version="v1",
+                        agent_id="conversation_agent", message_hashes=store_messages(db, messages))
+    legacy = LLMRequest(request_id="msg-store-test", provider="openai", model="m", prompt_version="v1",
+                        agent_id="conversation_agent", messages_json=messages)
+    db.add_all([hashed, legacy])
+    db.flush()
+
+    assert get_request_messages(db, hashed) == messages
+    assert get_request_messages(db, legacy) == messages
@@ -0,0 +1,95 @@
+"""Tests for the offline LLM replay harness."""
+import asyncio
+
+import pytest
+
+from app.models import LLMRequest
+from app.services.llm_message_store import store_messages
+from app.services.llm_replay import (
+    ReplayCase,
+    ReplayFilters,
+    ReplayResult,
+    StubReplayBackend,
+    iter_replay_cases,
+    run_replay,
+)
+
+
+def _log_request(db, text, prompt_version="replay-v1", hashed=True):
+    messages = [{"role": "system", "content": "Eres un mesero."}, {"role": "user", "content": text}]
+    record = LLMRequest(
+        request_id="replay-test", provider="openai", model="gpt-5.4-mini", prompt_version=prompt_version,
+        agent_id="replay_test_agent", success=True, latency_ms=800, tokens_in=120, tokens_out=30,
+        estimated_cost=0.0002, response_json={"text": f"Respuesta a {text}"},
+    )
+    if hashed:
+        record.message_hashes = store_messages(db, messages)
+    else:
+        record.messages_json = messages
+    db.add(record)
+    db.flush()
+    return record
+
+
+def test_iter_replay_cases_filters_and_rebuilds_messages(db):
+    _log_request(db, "hola")
+    _log_request(db, "adiós", hashed=False)
+    _log_request(db, "otra", prompt_version="replay-v2")
+
+    cases = list(iter_replay_cases(db, ReplayFilters(agent_id="replay_test_agent", prompt_version="replay-v1"), batch_size=1))
+    assert [c.messages[-1]["content"] for c in cases] == ["hola", "adiós"]
+    assert cases[0].messages[0] == {"role": "system", "content": "Eres un mesero."}
+    assert cases[0].original_text == "Respuesta a hola"
+
+
+def test_stub_replay_reports_no_diffs(db):
+    for text in ("uno", "dos", "tres"):
+        _log_request(db, text)
+
+    cases = iter_replay_cases(db, ReplayFilters(agent_id="replay_test_agent"))
+    summary = asyncio.run(run_replay(cases, StubReplayBackend(), concurrency=2)).summary()
+
+    assert summary["replayed"] == 3
+    assert summary["changed"] == 0
+    assert summary["mean_similarity"] == 1.0
+    assert summary["original"]["latency_ms"]["count"] == 3
+    assert summary["original"]["cost"]["total"] > 0
+
+
+def test_replay_collects_diffs():
+    class EchoBackend:
+        name = "echo"
+
+        async def complete(self, case):
+            return ReplayResult(text=case.messages[-1]["content"], latency_ms=5, tokens_in=10, tokens_out=2)
+
+    case = ReplayCase(
+        llm_request_id="x", agent_id=None, prompt_version=None, model="m",
+        messages=[{"role": "user", "content": "nuevo"}], temperature=None, max_tokens=None, return_json=False,
+        original_text="viejo", original_latency_ms=100, original_tokens_in=10, original_tokens_out=2, original_cost=None,
+    )
+    summary = asyncio.run(run_replay(iter([case]), EchoBackend())).summary()
+
+    assert summary["changed"] == 1
+    assert "-viejo" in summary["diffs"][0]["diff"]
+    assert "+nuevo" in summary["diffs"][0]["diff"]
+
+
+def test_a_failing_backend_stops_the_replay():
+    class BrokenBackend:
+        name = "broken"
+
+        async def complete(self, case):
+            raise RuntimeError("backend crashed")
+
+    case = ReplayCase(
+        llm_request_id="x", agent_id=None, prompt_version=None, model="m",
+        messages=[{"role": "user", "content": "hola"}], temperature=None, max_tokens=None, return_json=False,
+        original_text="hola", original_latency_ms=100, original_tokens_in=10, original_tokens_out=2, original_cost=None,
+    )
+
+    async def run():
+        return await asyncio.wait_for(run_replay(iter([case] * 50), BrokenBackend(), concurrency=2), timeout=5)
+
+    with pytest.raises(RuntimeError, match="backend crashed"):
+        asyncio.run(run())
@@ -0,0 +1,39 @@
+"""Tests for the precomputed per-locale rendering data."""
+from types import SimpleNamespace
+
+from app.config import settings
+from app.services.locales import DEFAULT_DIALECT, LOCALES, SPANISH_DIALECTS, get_locale, get_locale_for
+
+
+def test_every_language_and_dialect_is_precomputed():
+    assert len(LOCALES) == 2 * len(SPANISH_DIALECTS)
+    assert get_locale(SimpleNamespace(catalan_mode=True, dialect="colombia")) is LOCALES[("catalan", "colombia")]
+
+
+def test_unknown_or_missing_dialect_falls_back_to_the_default():
+    assert get_locale_for(False, None) is LOCALES[("spanish", DEFAULT_DIALECT)]
+    assert get_locale_for(False, "argentina") is LOCALES[("spanish", DEFAULT_DIALECT)]
+
+
+def test_tts_accent_follows_language_and_dialect():
+    voice, instructions = get_locale_for(False, "mexico").tts("banking")
+    assert voice == "shimmer"
+    assert instructions.startswith("Speak with a Mexican Spanish accent, mixing English and Spanish words naturally.")
+    assert "Costa Rican Spanish accent" in get_locale_for(False, "costa_rica").tts("banking")[1]
+    assert get_locale_for(True, "costa_rica").tts("banking")[1].startswith(
+        "Speak with a Catalan accent, mixing English and Catalan words naturally."
+    )
+    assert get_locale_for().tts("unknown") == ("alloy", None)
+
+
+def test_language_mode_and_initial_message(monkeypatch):
+    catalan = get_locale_for(True)
+    assert catalan.language_mode("spanish_audio") == "catalan_audio"
+    assert catalan.language_mode("english") == "english"
+    assert get_locale_for().language_mode("spanish_text") == "spanish_text"
+    assert catalan.initial_message("air_1") == "Good afternoon -- may I see your passport and reservation?"
+
+    monkeypatch.setattr(settings, "r2_public_url", None)
+    assert catalan.initial_audio_url("air_1") is None
+    monkeypatch.setattr(settings, "r2_public_url", "https://cdn.example.com")
+    assert catalan.initial_audio_url("air_1") == "https://cdn.example.com/initial_msg_air_1.mp3"
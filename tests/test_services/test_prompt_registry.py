@@ -0,0 +1,60 @@
+"""Tests for the in-memory prompt template registry."""
+import json
+import os
+
+import pytest
+
+from app.core import metrics
+from app.services.prompt_registry import PROMPTS_PATH, PromptRegistry, PromptValidationError
+
+
+def _write(path, prompts, mtime=None):
+    path.write_text(json.dumps(prompts))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_render_matches_str_format_for_shipped_prompts():
+    registry = PromptRegistry(PROMPTS_PATH)
+    for agent_id in registry.agent_ids():
+        template = registry.get(agent_id)
+        values = {name: f"<{name} {{x}}>" for name in template.fields}
+        assert template.render(**values) == template.content.format(**values)
+
+
+def test_unknown_agent_raises_value_error(tmp_path):
+    path = tmp_path / "prompts.json"
+    _write(path, {"a": {"prompt_version": "v2", "content": "Hi {name}"}})
+    with pytest.raises(ValueError):
+        PromptRegistry(path).get("missing")
+
+
+def test_hot_reload_on_change_and_rejects_invalid_file(tmp_path):
+    path = tmp_path / "prompts.json"
+    _write(path, {"a": {"prompt_version": "v2", "content": "Hola {name}"}}, mtime=1_000_000)
+    registry = PromptRegistry(path, reload_interval=0)
+    assert registry.get("a").render(name="Ana") == "Hola Ana"
+    assert registry.version == 1
+
+    _write(path, {"a": {"prompt_version": "v3", "content": "Adiós {name}"}}, mtime=1_000_010)
+    assert registry.get("a").render(name="Ana") == "Adiós Ana"
+    assert registry.version == 2
+
+    errors_before = metrics.get_counter("prompt_registry_reload_errors")
+    _write(path, {"a": {"content": "Broken {name"}}, mtime=1_000_020)
+    assert registry.get("a").render(name="Ana") == "Adiós Ana"
+    assert registry.version == 2
+    assert metrics.get_counter("prompt_registry_reload_errors") == errors_before + 1
+
+
+def test_validation_rejects_positional_fields(tmp_path):
+    path = tmp_path / "prompts.json"
+    _write(path, {"a": {"content": "Hi {0}"}})
+    with pytest.raises(PromptValidationError):
+        PromptRegistry(path).load()
+
+
+def test_render_requires_all_fields():
+    template = PromptRegistry(PROMPTS_PATH).get("conversation_agent_beginner")
+    with pytest.raises(KeyError):
+        template.render(ai_role="a waiter")
@@ -0,0 +1,124 @@
+"""Tests for per-provider admission control."""
+import asyncio
+import threading
+
+import pytest
+
+from app.core import metrics
+from app.core.provider_limits import ProviderBusyError, ProviderLimiter, retry_after_seconds
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"headers": headers})()
+
+
+def test_concurrency_is_capped():
+    limiter = ProviderLimiter("test-cap", max_concurrency=2, max_queue=10, queue_timeout=5)
+    active = []
+    peak = []
+
+    async def work():
+        async with limiter.slot():
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.pop()
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(8)))
+
+    asyncio.run(main())
+    assert max(peak) == 2
+    assert limiter.in_flight == 0 and limiter.queue_depth == 0
+
+
+def test_full_queue_and_queue_timeout_fail_fast():
+    limiter = ProviderLimiter("test-busy", max_concurrency=1, max_queue=1, queue_timeout=0.05)
+
+    async def main():
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(ProviderBusyError, match="queue full"):
+            await limiter.acquire()
+        with pytest.raises(ProviderBusyError, match="queue timeout"):
+            await waiting
+        limiter.release()
+
+    asyncio.run(main())
+    assert limiter.in_flight == 0 and limiter.queue_depth == 0
+    assert metrics.get_counter("provider_rejected", provider="test-busy", reason="queue_full") >= 1
+
+
+def test_slot_is_handed_across_event_loops():
+    limiter = ProviderLimiter("test-loops", max_concurrency=1, max_queue=5, queue_timeout=5)
+    acquired = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        async def run():
+            async with limiter.slot():
+                acquired.set()
+                await asyncio.to_thread(release.wait)
+        asyncio.run(run())
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    acquired.wait(5)
+
+    async def main():
+        threading.Timer(0.05, release.set).start()
+        async with limiter.slot():
+            return limiter.in_flight
+
+    assert asyncio.run(main()) == 1
+    holder.join(5)
+    assert limiter.in_flight == 0
+
+
+def test_call_retries_after_retry_after():
+    limiter = ProviderLimiter("test-429", max_concurrency=1, max_queue=1, queue_timeout=5)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise _RateLimited({"retry-after-ms": "20"})
+        return "ok"
+
+    assert asyncio.run(limiter.call(flaky)) == "ok"
+    assert len(attempts) == 2
+    assert metrics.get_counter("provider_rate_limited", provider="test-429") >= 1
+
+
+def test_retry_after_parsing():
+    assert retry_after_seconds(_RateLimited({"retry-after": "3"})) == 3.0
+    assert retry_after_seconds(_RateLimited({"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(_RateLimited({"retry-after": "9999"})) == 20.0
+    assert 0.5 <= retry_after_seconds(_RateLimited({})) <= 0.625
+    assert retry_after_seconds(ValueError("boom")) is None
+
+
+def test_busy_realtime_answers_503_before_the_stream_starts(client, db, seed_data, monkeypatch):
+    from app.core import provider_limits
+    from app.models import Conversation, User
+    from tests.conftest import register_user
+
+    _, headers = register_user(client)
+    user = db.query(User).filter(User.email == "test@example.com").one()
+    conv = Conversation(user_id=user.id, situation_id="bank_open_1", mode="voice",
+                        target_word_ids=[], used_typed_word_ids=[], used_spoken_word_ids=[])
+    db.add(conv)
+    db.flush()
+    saturated = ProviderLimiter("realtime", max_concurrency=1, max_queue=0, queue_timeout=0.01)
+    saturated._in_flight = 1
+    monkeypatch.setitem(provider_limits._limiters, "realtime", saturated)
+
+    response = client.post(f"/v1/conversations/{conv.id}/voice-turn/respond",
+                           json={"user_transcript": "hola"}, headers=headers)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,81 @@
+"""Tests for in-memory R2 uploads (single put, multipart, aborted multipart)."""
+import threading
+
+import pytest
+
+from app.config import settings
+from app.core import metrics
+from app.services import r2_storage
+
+
+class FakeS3:
+    def __init__(self, fail_part: int = 0):
+        self.objects = {}
+        self.parts = {}
+        self.calls = []
+        self.fail_part = fail_part
+        self.lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        with self.lock:
+            self.calls.append("put_object")
+            self.objects[Key] = Body
+
+    def create_multipart_upload(self, Bucket, Key, ContentType):
+        self.calls.append("create_multipart_upload")
+        self.parts[Key] = {}
+        return {"UploadId": f"up-{Key}"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append("upload_part")
+        if PartNumber == self.fail_part:
+            raise ConnectionError("reset by peer")
+        self.parts[Key][PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append("complete_multipart_upload")
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        self.objects[Key] = b"".join(self.parts[Key][n] for n in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append("abort_multipart_upload")
+        self.parts.pop(Key, None)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    client = FakeS3()
+    monkeypatch.setattr(r2_storage, "_client", client)
+    monkeypatch.setattr(r2_storage, "MIN_PART_BYTES", 4)
+    monkeypatch.setattr(settings, "r2_public_url", "https://cdn.example")
+    monkeypatch.setattr(settings, "r2_multipart_threshold_bytes", 10)
+    monkeypatch.setattr(settings, "r2_multipart_part_bytes", 4)
+    metrics.reset()
+    return client
+
+
+def test_small_object_is_a_single_put(s3):
+    url = r2_storage.upload_bytes_sync("a.mp3", b"tiny")
+    assert url == "https://cdn.example/a.mp3"
+    assert s3.calls == ["put_object"] and s3.objects["a.mp3"] == b"tiny"
+
+
+def test_large_object_is_uploaded_in_parts(s3):
+    data = bytes(range(11))
+    assert r2_storage.upload_bytes_sync("big.mp3", data) == "https://cdn.example/big.mp3"
+    assert s3.calls.count("upload_part") == 3
+    assert s3.objects["big.mp3"] == data
+
+
+def test_failed_multipart_is_aborted(s3):
+    s3.fail_part = 2
+    assert r2_storage.upload_bytes_sync("big.mp3", bytes(12)) is None
+    assert "abort_multipart_upload" in s3.calls and "big.mp3" not in s3.objects
+    assert metrics.get_counter("r2_upload", result="error", mode="sync") == 1
+
+
+def test_unconfigured_r2_uploads_nothing(s3, monkeypatch):
+    monkeypatch.setattr(settings, "r2_public_url", None)
+    assert r2_storage.upload_bytes_sync("a.mp3", b"x") is None
+    assert s3.calls == []
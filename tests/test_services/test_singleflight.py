@@ -0,0 +1,131 @@
+"""Tests for single-flight request coalescing."""
+import asyncio
+import threading
+import time
+
+from app.core import metrics
+from app.core.singleflight import SingleFlight
+from app.services import openai_media_gateway as gateway
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+    metrics.reset()
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert [r for r, _ in results] == ["result"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert metrics.get_counter("singleflight_coalesced", flight="test") == 4
+    assert flight.in_flight() == 0
+
+
+def test_errors_are_shared_and_the_key_is_freed():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(run()))
+
+    async def ok():
+        return 1
+
+    assert asyncio.run(flight.do("k", ok)) == (1, False)
+
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(run()) == ("done", False)
+
+
+def test_followers_of_a_cancelled_leader_run_the_call_themselves():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(*followers)
+
+    results = asyncio.run(run())
+    assert [r for r, _ in results] == ["done", "done"]
+    assert len(calls) == 2  # the cancelled leader, then one new leader for both followers
+    assert flight.in_flight() == 0
+
+
+def test_threads_share_one_sync_call():
+    flight = SingleFlight("test")
+    calls = []
+    results = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.1)
+        return 42
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do_sync("k", work))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and [r for r, _ in results] == [42] * 4
+
+
+class _FakeSpeech:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        time.sleep(0.1)
+        return type("Speech", (), {"iter_bytes": lambda self: iter([b"mp3-", kwargs["input"].encode()])})()
+
+
+def test_identical_tts_requests_share_one_synthesis(tmp_path, monkeypatch):
+    speech = _FakeSpeech()
+    client = type("Client", (), {})()
+    client.audio = type("Audio", (), {"speech": speech})()
+    monkeypatch.setattr(gateway, "_client", client)
+    paths = [str(tmp_path / f"{i}.mp3") for i in range(3)]
+
+    async def run():
+        return await asyncio.gather(*(gateway.synthesize_speech("hola", path, voice="nova") for path in paths))
+
+    assert asyncio.run(run()) == paths
+    assert speech.calls == 1
+    assert all(open(path, "rb").read() == b"mp3-hola" for path in paths)
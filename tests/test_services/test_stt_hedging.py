@@ -0,0 +1,171 @@
+"""Tests for hedged, deadline-bounded STT."""
+import asyncio
+import io
+import time
+import uuid
+import wave
+
+import pytest
+
+from app.config import settings
+from app.core.circuit_breaker import OPEN, get_breaker, reset_breakers
+from app.models import STTRequest
+from app.services import openai_media_gateway as gateway
+from app.utils.audio_duration import AudioTooLongError
+
+
+class _FakeTranscriptions:
+    def __init__(self, behaviour):
+        self.behaviour = behaviour  # model -> (delay_s, text or exception)
+        self.calls = 0
+
+    def create(self, model, file, timeout=None, **kwargs):
+        self.calls += 1
+        delay, outcome = self.behaviour[model]
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return type("Transcript", (), {"text": outcome})()
+
+
+@pytest.fixture
+def fake_stt(monkeypatch):
+    monkeypatch.setattr(settings, "stt_hedge_default_delay_ms", 50)
+    monkeypatch.setattr(settings, "stt_deadline_seconds", 2.0)
+    gateway._stt_latencies.clear()
+    reset_breakers()
+
+    def install(behaviour):
+        client = type("Client", (), {})()
+        client.audio = type("Audio", (), {})()
+        client.audio.transcriptions = _FakeTranscriptions(behaviour)
+        monkeypatch.setattr(gateway, "_client", client)
+        return client.audio.transcriptions
+
+    yield install
+    gateway._stt_latencies.clear()
+    reset_breakers()
+
+
+def _transcribe(**kwargs):
+    return asyncio.run(gateway.transcribe_audio(b"\x00" * 100, "turn.webm", **kwargs))
+
+
+def test_fast_primary_is_not_hedged(fake_stt, db):
+    fake_stt({gateway.STT_MODEL: (0, "hola"), gateway.STT_FALLBACK_MODEL: (0, "unused")})
+    request_id = f"stt-{uuid.uuid4()}"
+    assert _transcribe(request_id=request_id, db=db) == "hola"
+
+    record = db.query(STTRequest).filter(STTRequest.request_id == request_id).one()
+    assert record.winning_model == gateway.STT_MODEL
+    assert record.hedged is False
+    assert record.primary_latency_ms is not None
+    assert record.fallback_latency_ms is None
+
+
+def test_slow_primary_is_hedged_and_fallback_wins(fake_stt, db):
+    fake_stt({gateway.STT_MODEL: (0.5, "tarde"), gateway.STT_FALLBACK_MODEL: (0, "rápido")})
+    request_id = f"stt-{uuid.uuid4()}"
+
+    async def timed():
+        started = time.perf_counter()
+        text = await gateway.transcribe_audio(b"\x00" * 100, "turn.webm", request_id=request_id, db=db)
+        return text, time.perf_counter() - started
+
+    # (asyncio.run then waits for the abandoned primary's worker thread; a server loop doesn't)
+    text, elapsed = asyncio.run(timed())
+    assert text == "rápido"
+    assert elapsed < 0.4
+
+    record = db.query(STTRequest).filter(STTRequest.request_id == request_id).one()
+    assert record.winning_model == gateway.STT_FALLBACK_MODEL
+    assert record.hedged is True
+    assert record.primary_latency_ms >= 50
+    assert record.fallback_latency_ms is not None
+
+
+def test_failed_primary_falls_back_immediately(fake_stt):
+    fake_stt({gateway.STT_MODEL: (0, ValueError("unsupported format")), gateway.STT_FALLBACK_MODEL: (0, "hola")})
+    assert _transcribe() == "hola"
+
+
+def test_open_breaker_skips_the_primary(fake_stt, db, monkeypatch):
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 2)
+    fake_stt({gateway.STT_MODEL: (0, ValueError("unsupported format")), gateway.STT_FALLBACK_MODEL: (0, "hola")})
+    _transcribe()
+    _transcribe()
+    assert get_breaker(gateway.STT_MODEL, "webm").state == OPEN
+
+    calls = []
+    transcriptions = gateway._client.audio.transcriptions
+    original = transcriptions.create
+    transcriptions.create = lambda model, **kw: calls.append(model) or original(model, **kw)
+    request_id = f"stt-{uuid.uuid4()}"
+    assert _transcribe(request_id=request_id, db=db) == "hola"
+    assert calls == [gateway.STT_FALLBACK_MODEL]
+
+    record = db.query(STTRequest).filter(STTRequest.request_id == request_id).one()
+    assert record.winning_model == gateway.STT_FALLBACK_MODEL
+    assert record.primary_latency_ms is None
+
+
+def test_deadline_bounds_the_whole_call(fake_stt, monkeypatch):
+    monkeypatch.setattr(settings, "stt_deadline_seconds", 0.2)
+    fake_stt({gateway.STT_MODEL: (0.6, "tarde"), gateway.STT_FALLBACK_MODEL: (0.6, "tarde")})
+    with pytest.raises(TimeoutError):
+        _transcribe()
+
+
+def test_hedge_delay_follows_recent_latencies(monkeypatch):
+    monkeypatch.setattr(settings, "stt_hedge_min_samples", 10)
+    gateway._stt_latencies.clear()
+    assert gateway.stt_hedge_delay_ms() == settings.stt_hedge_default_delay_ms
+    for ms in range(1000, 2000, 10):
+        gateway.record_stt_latency(ms)
+    assert 1900 <= gateway.stt_hedge_delay_ms() <= 2000
+    gateway._stt_latencies.clear()
+
+
+def _wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(b"\x00\x00" * int(seconds * 8000))
+    return buffer.getvalue()
+
+
+def test_measured_duration_prices_the_call(fake_stt, db):
+    fake_stt({gateway.STT_MODEL: (0, "hola"), gateway.STT_FALLBACK_MODEL: (0, "unused")})
+    request_id = f"stt-{uuid.uuid4()}"
+    asyncio.run(gateway.transcribe_audio(_wav(6.0), "turn.wav", request_id=request_id, db=db))
+
+    record = db.query(STTRequest).filter(STTRequest.request_id == request_id).one()
+    assert record.audio_seconds == 6.0
+    assert record.estimated_cost == pytest.approx(0.1 * gateway.STT_COST_PER_MINUTE[gateway.STT_MODEL])
+
+
+def test_too_long_audio_is_rejected_before_the_provider(fake_stt, monkeypatch):
+    monkeypatch.setattr(settings, "stt_max_audio_seconds", 5)
+    fake_stt({})  # any provider call would raise KeyError
+    with pytest.raises(AudioTooLongError):
+        asyncio.run(gateway.transcribe_audio(_wav(6.0), "turn.wav"))
+
+
+def test_tiny_clip_skips_the_provider(fake_stt):
+    fake_stt({})
+    assert asyncio.run(gateway.transcribe_audio(_wav(0.05), "turn.wav")) == ""
+
+
+def test_identical_concurrent_uploads_share_one_transcription(fake_stt, monkeypatch):
+    monkeypatch.setattr(settings, "stt_hedging_enabled", False)
+    transcriptions = fake_stt({gateway.STT_MODEL: (0.2, "hola"), gateway.STT_FALLBACK_MODEL: (0, "unused")})
+
+    async def run():
+        same = [gateway.transcribe_audio(b"\x00" * 100, "turn.webm", prompt="p") for _ in range(3)]
+        other = gateway.transcribe_audio(b"\x01" * 100, "turn.webm", prompt="p")
+        return await asyncio.gather(*same, other)
+
+    assert asyncio.run(run()) == ["hola"] * 4
+    assert transcriptions.calls == 2  # one for the three identical uploads, one for the other
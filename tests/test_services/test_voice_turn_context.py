@@ -0,0 +1,85 @@
+"""Tests for the per-conversation voice-turn context cache."""
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from app.config import settings
+from app.models import Conversation, User
+from app.services import voice_turn_context
+from app.services.locales import get_locale_for
+from app.services.voice_turn_context import get_voice_turn_context, invalidate_user
+
+SPANISH = get_locale_for(False)
+CATALAN = get_locale_for(True)
+
+
+@pytest.fixture
+def conversation(db, seed_data):
+    voice_turn_context.clear_voice_context_cache()
+    user = User(email=f"{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    conv = Conversation(
+        user_id=user.id, situation_id="bank_open_1", mode="voice",
+        target_word_ids=["enc_2", "enc_1", "hf_1"], used_typed_word_ids=[], used_spoken_word_ids=[],
+    )
+    db.add(conv)
+    db.flush()
+    yield conv
+    voice_turn_context.clear_voice_context_cache()
+
+
+def _count_statements(db, fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind().engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.get_bind().engine, "before_cursor_execute", listener)
+    return result, statements
+
+
+def test_miss_loads_everything_in_two_queries_and_hits_run_none(db, conversation):
+    context, statements = _count_statements(db, lambda: get_voice_turn_context(db, conversation, SPANISH))
+    assert len(statements) == 2, statements
+    assert [w.id for w in context.words] == ["enc_2", "enc_1", "hf_1"]  # target order
+    assert context.situation_title == "Opening a Bank Account"
+    assert context.language_mode == "english" and context.vocab_level == 0
+    assert "cuenta" in context.transcription_prompt and context.system_prompt and context.voice
+    assert [w.spanish for w in context.words_by_ids(["hf_1", "enc_1"])] == ["cuenta", "hola"]
+
+    again, statements = _count_statements(db, lambda: get_voice_turn_context(db, conversation, SPANISH))
+    assert again is context and statements == []
+
+
+def test_locale_and_expiry_rebuild_the_context(db, conversation, monkeypatch):
+    spanish = get_voice_turn_context(db, conversation, SPANISH)
+    catalan = get_voice_turn_context(db, conversation, CATALAN)
+    assert catalan is not spanish and catalan.locale.catalan_mode
+    colombian = get_voice_turn_context(db, conversation, get_locale_for(False, "colombia"))
+    assert colombian is not spanish and "Colombian" in colombian.tts_instructions
+
+    monkeypatch.setattr(settings, "voice_context_ttl_seconds", 0)
+    assert get_voice_turn_context(db, conversation, CATALAN) is not catalan
+
+
+def test_invalidate_user_drops_their_conversations(db, conversation):
+    context = get_voice_turn_context(db, conversation, SPANISH)
+    assert invalidate_user(uuid.uuid4()) == 0
+    assert invalidate_user(conversation.user_id) == 1
+    assert get_voice_turn_context(db, conversation, SPANISH) is not context
+
+
+def test_cache_is_bounded(db, conversation, monkeypatch):
+    monkeypatch.setattr(settings, "voice_context_cache_size", 1)
+    get_voice_turn_context(db, conversation, SPANISH)
+    other = Conversation(
+        user_id=conversation.user_id, situation_id="rest_order_1", mode="voice",
+        target_word_ids=["enc_4"], used_typed_word_ids=[], used_spoken_word_ids=[],
+    )
+    db.add(other)
+    db.flush()
+    get_voice_turn_context(db, other, SPANISH)
+    assert voice_turn_context.voice_context_stats() == {"voice_context_cache_size": 1}
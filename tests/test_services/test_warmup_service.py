@@ -0,0 +1,139 @@
+"""Tests for the next-encounter warm-up and parked Realtime sessions."""
+import asyncio
+import json
+
+import pytest
+from websockets.protocol import State
+
+from app.config import settings
+from app.core import metrics
+from app.services import realtime_service, warmup_service
+from app.services.locales import get_locale_for
+
+
+class FakeWS:
+    def __init__(self, events=()):
+        self.state = State.OPEN
+        self.sent = []
+        self.events = list(events)
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def recv(self):
+        return json.dumps(self.events.pop(0))
+
+    async def close(self):
+        self.state = State.CLOSED
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+@pytest.fixture
+def warmup(monkeypatch):
+    monkeypatch.setattr(settings, "warmup_enabled", True)
+    monkeypatch.setattr(warmup_service, "_tasks", {})
+    monkeypatch.setattr(warmup_service, "_prepared", {})
+    monkeypatch.setattr(warmup_service, "_initial_audio", {})
+    monkeypatch.setattr(realtime_service, "_warm_sessions", realtime_service._WarmSessions())
+    metrics.reset()
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    sockets = []
+
+    async def fake_open(instructions, voice):
+        ws = FakeWS([{"type": "response.done", "response": {"usage": {"input_tokens": 5}}}])
+        sockets.append((instructions, voice, ws))
+        return ws
+
+    monkeypatch.setattr(realtime_service, "_open_session", fake_open)
+    return sockets
+
+
+def test_warmups_are_deduplicated_per_user_and_capped(warmup, monkeypatch):
+    monkeypatch.setattr(settings, "warmup_max_concurrent", 2)
+    started = []
+
+    async def slow_warm(user_id, situation_id, locale):
+        started.append((user_id, situation_id))
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(warmup_service, "_warm", slow_warm)
+
+    async def scenario():
+        assert warmup_service.schedule_warmup("u1", "s2")
+        assert not warmup_service.schedule_warmup("u1", "s2")
+        first = warmup_service._tasks["u1"][1]
+        assert warmup_service.schedule_warmup("u1", "s3")  # replaces the warm-up for s2
+        assert warmup_service.schedule_warmup("u2", "s2")
+        assert not warmup_service.schedule_warmup("u3", "s2")  # cap reached
+        await asyncio.sleep(0)
+        assert first.cancelled()
+        assert warmup_service.cancel_warmup("u2")
+        await warmup_service.shutdown_warmup()
+        assert warmup_service._tasks == {}
+
+    asyncio.run(scenario())
+    assert started == [("u1", "s3"), ("u2", "s2")]
+    assert metrics.get_counter("warmup", result="deduplicated") == 1
+    assert metrics.get_counter("warmup", result="skipped") == 1
+
+
+def test_warmup_prepares_words_prompts_and_a_realtime_session(warmup, opened, db, seed_data, monkeypatch):
+    from app.models import User
+
+    user = User(email="warm@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    monkeypatch.setattr("app.database.SessionLocal", lambda: db)
+    monkeypatch.setattr(settings, "r2_public_url", None)
+
+    asyncio.run(warmup_service._warm(str(user.id), "bank_open_1", get_locale_for(False, "colombia")))
+
+    assert metrics.get_counter("warmup", result="ok") == 1
+    assert realtime_service.warm_session_count() == 1
+    instructions, voice, _ = opened[0]
+    assert "Colombian Spanish accent" in warmup_service._prepared[str(user.id)].tts_instructions
+    assert instructions.startswith(warmup_service._prepared[str(user.id)].system_prompt)
+    assert warmup_service.take_warm_selection(user.id, "rest_order_1") is None
+    word_ids = warmup_service.take_warm_selection(user.id, "bank_open_1")
+    assert word_ids[:3] == ["enc_1", "enc_2", "enc_3"] and len(word_ids) == 5
+    assert warmup_service.take_warm_selection(user.id, "bank_open_1") is None  # consumed
+
+
+def test_stream_realtime_uses_a_parked_session(warmup, opened, monkeypatch):
+    monkeypatch.setattr(settings, "realtime_warm_max_sessions", 1)
+
+    async def scenario():
+        assert await realtime_service.prewarm_session("You are a teller.", "alloy", "Speak slowly.")
+        assert not await realtime_service.prewarm_session("You are a waiter.", "alloy", None)  # full
+        messages = [{"role": "system", "content": "You are a teller."}, {"role": "user", "content": "hola"}]
+        events = [e async for e in realtime_service.stream_realtime(messages, "alloy", "Speak slowly.")]
+        return events
+
+    events = asyncio.run(scenario())
+    assert len(opened) == 1  # no second connection for the turn
+    ws = opened[0][2]
+    assert [m["type"] for m in ws.sent] == ["conversation.item.create", "response.create"]
+    assert events[-1]["type"] == "done" and ws.state is State.CLOSED
+    assert metrics.get_counter("realtime_warm_session", result="used") == 1
+
+
+def test_parked_sessions_expire(warmup, opened, monkeypatch):
+    monkeypatch.setattr(settings, "realtime_warm_session_ttl_seconds", 0.01)
+
+    async def scenario():
+        assert await realtime_service.prewarm_session("prompt", "alloy")
+        await asyncio.sleep(0.05)
+        key = realtime_service.session_key("prompt", "alloy")
+        return realtime_service._warm_sessions.take(key)
+
+    assert asyncio.run(scenario()) is None
+    assert opened[0][2].state is State.CLOSED
+    assert metrics.get_counter("realtime_warm_session", result="expired") == 1
@@ -0,0 +1,62 @@
+"""Tests for the read-only word views (word catalog)."""
+from sqlalchemy import event, select
+
+from app.config import settings
+from app.models import Word
+from app.services import word_catalog
+from app.services.word_catalog import WORD_COLUMNS, WordView, get_word_views, word_views_from_rows
+
+
+def _catalan_words(db):
+    db.add_all([
+        Word(id="cat_1", spanish="mesa", english="table", catalan="taula", word_category="encounter"),
+        Word(id="cat_2", spanish="bien", english="well", catalan="bé", word_category="grammar"),
+    ])
+    db.flush()
+
+
+def _count_statements(db, fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind().engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.get_bind().engine, "before_cursor_execute", listener)
+    return result, statements
+
+
+def test_views_follow_the_requested_order_and_skip_unknown_ids(db, seed_data):
+    words = get_word_views(db, ["hf_1", "missing", "enc_2"])
+    assert words == [
+        WordView("hf_1", "hola", "hello", None, "high_frequency", 1),
+        WordView("enc_2", "depositar", "to deposit", None, "encounter", None),
+    ]
+
+
+def test_catalan_view_swaps_only_encounter_and_high_frequency_words(db, seed_data):
+    _catalan_words(db)
+    assert [w.spanish for w in get_word_views(db, ["cat_1", "cat_2", "enc_1"], catalan_mode=True)] == [
+        "taula", "bien", "cuenta",
+    ]
+    assert [w.spanish for w in get_word_views(db, ["cat_1"])] == ["mesa"]
+
+
+def test_cached_words_run_no_statements(db, seed_data):
+    get_word_views(db, ["enc_1", "enc_2"])
+    words, statements = _count_statements(db, lambda: get_word_views(db, ["enc_2", "enc_1"], catalan_mode=True))
+    assert statements == [] and [w.id for w in words] == ["enc_2", "enc_1"]
+
+
+def test_catalog_expires(db, seed_data, monkeypatch):
+    get_word_views(db, ["enc_1"])
+    monkeypatch.setattr(settings, "word_catalog_ttl_seconds", 0)
+    _, statements = _count_statements(db, lambda: get_word_views(db, ["enc_1"]))
+    assert len(statements) == 1
+
+
+def test_views_from_column_rows_fill_the_catalog(db, seed_data):
+    _catalan_words(db)
+    rows = db.execute(select(*WORD_COLUMNS).where(Word.id.in_(["cat_1", "enc_1"])).order_by(Word.id)).all()
+    assert [w.spanish for w in word_views_from_rows(rows, catalan_mode=True)] == ["taula", "cuenta"]
+    assert word_catalog.word_catalog_stats() == {"word_catalog_size": 2}
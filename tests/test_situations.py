@@ -38,3 +38,49 @@ def test_complete_situation(client, seed_data):
     data = resp.json()
     # Should suggest next situation in banking series
     assert "next_situation_id" in data
+
+
+def test_lesson_bundle_starts_the_encounter(client, seed_data, db):
+    from sqlalchemy import event
+    from app.models import Conversation, ConversationTurn, DailyEncounterLog
+
+    _, headers = register_user(client)
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind().engine, "before_cursor_execute", listener)
+    try:
+        resp = client.post("/v1/situations/bank_open_1/bundle", headers=headers)
+    finally:
+        event.remove(db.get_bind().engine, "before_cursor_execute", listener)
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["situation"]["id"] == "bank_open_1"
+    assert [w["id"] for w in data["words"]] == ["enc_1", "enc_2", "enc_3", "hf_1", "hf_2"]
+    assert data["system_prompt"] and data["initial_message"]
+    assert data["voice"]["voice"]
+    assert data["grammar_config"] is None
+    assert "total;dur=" in resp.headers["server-timing"]
+    # Auth lookup + gate + conversations + 2 word queries + latest turn + writes
+    assert len(statements) <= 12, statements
+
+    conversation = db.query(Conversation).filter(Conversation.id == data["conversation_id"]).one()
+    assert conversation.mode == "voice"
+    assert db.query(ConversationTurn).filter(ConversationTurn.conversation_id == conversation.id).count() == 1
+    assert db.query(DailyEncounterLog).count() == 1
+
+
+def test_lesson_bundle_reuses_the_word_selection(client, seed_data):
+    _, headers = register_user(client)
+    start = client.post("/v1/situations/bank_open_1/start", headers=headers).json()
+    first = client.post("/v1/situations/bank_open_1/bundle", headers=headers).json()
+    second = client.post("/v1/situations/bank_open_1/bundle", headers=headers).json()
+
+    assert [w["id"] for w in first["words"]] == [w["id"] for w in start["words"]]
+    assert [w["id"] for w in second["words"]] == [w["id"] for w in start["words"]]
+    assert first["conversation_id"] == second["conversation_id"]
+
+
+def test_lesson_bundle_unknown_situation(client, seed_data):
+    _, headers = register_user(client)
+    assert client.post("/v1/situations/nope/bundle", headers=headers).status_code == 404